@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for N-1 contingency screening of radial grids such as the CINELDI MV reference grid,
+i.e. analysing the consequences of the outage of each line in turn.
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import copy
+import concurrent.futures
+import radial_power_flow as rpf
+
+# Data shared by all contingencies in a worker process (set once per process by _init_worker)
+_contingency_data = None
+
+
+def _init_worker(contingency_data):
+    """ Set up the radial power flow model shared by all contingencies in the worker process """
+
+    global _contingency_data
+    _contingency_data = dict(contingency_data)
+    _contingency_data['net'] = copy.deepcopy(contingency_data['net'])
+    _contingency_data['model'] = rpf.radial_power_flow(_contingency_data['net'])
+
+
+def get_islanded_buses(model, line_ID):
+    """ Find the buses that are disconnected from the external grid by the outage of a line
+        of a radial network (i.e. the buses downstream of the line)
+
+        Inputs:
+            model: radial_power_flow object for the network
+            line_ID: ID of the line
+
+        Outputs:
+            i_island: Array with positional indices of the islanded buses
+            i_upstream: Positional index of the bus at the upstream end of the line
+    """
+
+    i_island = model.topology.get_downstream_buses(line_ID, positional = True)
+    i_upstream = model.topology.line_parent[model.line_IDs.get_loc(line_ID)]
+
+    return i_island, i_upstream
+
+
+def get_result_summary(model, V, line_mask=None):
+    """ Get the lowest voltage and the highest line loading for each operating state of a
+        power flow solution (ignoring buses and lines that are not energized)
+
+        Inputs:
+            model: radial_power_flow object
+            V: 2D complex array (operating states × buses) with bus voltages (p.u.)
+            line_mask: Boolean array with True for lines to include (optional; default: all)
+
+        Outputs:
+            min_vm_pu: Array with the lowest bus voltage (p.u.) of each operating state
+            max_loading_percent: Array with the highest line loading (%) of each operating state
+    """
+
+    with np.errstate(invalid='ignore'):
+        I_series = (V[:, model.f_bus] - V[:, model.t_bus]) / model.z_branch
+        i_ka = np.maximum(np.abs(I_series + V[:, model.f_bus] * model.y_sh_half),
+            np.abs(-I_series + V[:, model.t_bus] * model.y_sh_half)) * model.i_base_ka
+        loading_percent = i_ka / model.max_i_ka * 100
+    if line_mask is not None:
+        loading_percent = loading_percent[:, line_mask]
+
+    min_vm_pu = np.nanmin(np.abs(V), axis=1)
+    max_loading_percent = np.nanmax(loading_percent, axis=1, initial=0) if loading_percent.size > 0 \
+        else np.zeros(V.shape[0])
+
+    return min_vm_pu, max_loading_percent
+
+
+def _run_contingency(line_ID):
+    """ Analyse the outage of one line
+
+        Inputs:
+            line_ID: ID of the line
+
+        Outputs:
+            result: Dictionary with the results for the contingency
+    """
+
+    d = _contingency_data
+    model = d['model']
+    p_mw = d['p_mw']
+    q_mvar = d['q_mvar']
+    result = {'line': line_ID, 'n_buses_islanded': 0, 'unsupplied_mw': 0.0, 'unsupplied_mwh': 0.0,
+        'reconnected_by': None, 'min_vm_pu': np.nan, 'max_loading_percent': np.nan, 'converged': False}
+
+    i_island, i_upstream = get_islanded_buses(model, line_ID)
+    supplied = model.supplied.copy()
+    supplied[i_island] = False
+    unsupplied_mw = p_mw[:, i_island].sum(axis=1)
+
+    # Power flow with the outage: the islanded buses draw no current and the line charging of
+    # the line on outage is removed, so that the tree ordering of the intact network is reused
+    p_mw_c = p_mw.copy()
+    q_mvar_c = q_mvar.copy()
+    p_mw_c[:, i_island] = 0
+    q_mvar_c[:, i_island] = 0
+    k = model.line_IDs.get_loc(line_ID)
+    y_sh_bus = model.y_sh_bus.copy()
+    y_sh_bus[i_upstream] -= model.y_sh_half[k]
+    y_sh_bus[i_island] = 0
+    V, converged, n_iterations = model.solve(p_mw_c, q_mvar_c, v_init = d['V_base'], y_sh_bus = y_sh_bus)
+    V[:, ~supplied] = np.nan
+    line_mask = supplied[model.f_bus] & supplied[model.t_bus]
+    min_vm_pu, max_loading_percent = get_result_summary(model, V, line_mask)
+
+    # Try to restore the supply of the islanded buses by closing a normally open line
+    if d['reconnect'] and len(i_island) > 0:
+        net = d['net']
+        bus_IDs_island = model.bus_IDs[i_island]
+        bus_IDs_supplied = model.bus_IDs[supplied]
+        line_open = net.line.loc[~net.line['in_service'].astype(bool)]
+        candidates = line_open.index[(line_open['from_bus'].isin(bus_IDs_island) & line_open['to_bus'].isin(bus_IDs_supplied))
+            | (line_open['to_bus'].isin(bus_IDs_island) & line_open['from_bus'].isin(bus_IDs_supplied))]
+        best = None
+        for line_ID_tie in candidates:
+            net.line.loc[[line_ID, line_ID_tie], 'in_service'] = [False, True]
+            try:
+                model_tie = rpf.radial_power_flow(net)
+                V_tie, converged_tie, n_iterations = model_tie.solve(p_mw, q_mvar)
+            except ValueError:
+                continue
+            finally:
+                net.line.loc[[line_ID, line_ID_tie], 'in_service'] = [True, False]
+            min_vm_pu_tie, max_loading_percent_tie = get_result_summary(model_tie, V_tie)
+            if converged_tie.all() and (best is None or min_vm_pu_tie.min() > best[1].min()):
+                best = (line_ID_tie, min_vm_pu_tie, max_loading_percent_tie, converged_tie)
+        if best is not None:
+            line_ID_tie, min_vm_pu, max_loading_percent, converged = best
+            result['reconnected_by'] = line_ID_tie
+            unsupplied_mw = np.zeros(p_mw.shape[0])
+            i_island = []
+
+    result.update({'n_buses_islanded': len(i_island), 'unsupplied_mw': unsupplied_mw.max(),
+        'unsupplied_mwh': unsupplied_mw.sum() * d['time_step_hours'],
+        'min_vm_pu': np.nanmin(min_vm_pu[converged]) if converged.any() else np.nan,
+        'max_loading_percent': np.nanmax(max_loading_percent[converged]) if converged.any() else np.nan,
+        'converged': converged.all()})
+
+    return result
+
+
+def screen_n_1(net, line_IDs=None, profiles_mapped=None, time_steps=None, time_step_hours=1.0, reconnect=False,
+    n_processes=None):
+    """ N-1 contingency screening of a radial network: the outage of each line is analysed in turn,
+        finding the buses (and load) that are disconnected and running power flow for the
+        remaining network. The power flows for the remaining network reuse the tree ordering
+        and path matrix of the intact network, with the islanded buses masked out. The
+        contingencies are distributed over several processes.
+
+        NB: When called from a script, the call must be protected by if __name__ == '__main__'
+        on platforms that start worker processes by spawning (e.g. Windows).
+
+        Inputs:
+            net: pandapower network (as set up by pandapower_read_csv)
+            line_IDs: List of IDs of the lines to analyse outages for
+                (optional; default: all in-service lines)
+            profiles_mapped: DataFrame with relative load profiles (unitless) as returned by
+                load_profiles.map_rel_load_profiles, to analyse each outage for all time steps of a
+                time series (optional; default: analyse the current loads of the network only)
+            time_steps: List of time steps (index values of profiles_mapped) (optional; default: all)
+            time_step_hours: Duration of each time step (hours) for the unsupplied energy
+                (optional; default: 1 hour)
+            reconnect: True to try to restore the supply of disconnected buses by closing one of
+                the lines that are out of service in the network (e.g. normally open lines), choosing
+                the line that gives the highest lowest voltage (optional; default: False)
+            n_processes: Number of worker processes (optional; default: number of CPUs;
+                1 runs all contingencies in the current process)
+
+        Outputs:
+            results: DataFrame indexed by the ID of the line on outage with columns
+                'n_buses_islanded' (number of buses disconnected from the external grid),
+                'unsupplied_mw' (net demand of the disconnected buses; highest over the time steps),
+                'unsupplied_mwh' (unsupplied energy over the time steps), 'reconnected_by' (ID of the
+                line closed to restore supply, if any), 'min_vm_pu' and 'max_loading_percent' (for
+                the remaining network, over the time steps) and 'converged'
+    """
+
+    model = rpf.radial_power_flow(net)
+    if line_IDs is None:
+        line_IDs = list(model.line_IDs)
+
+    p_mw, q_mvar = model.get_bus_injections(profiles_mapped, time_steps)
+
+    # Solution for the intact network, used as starting point for the power flows with outages
+    V_base, converged, n_iterations = model.solve(p_mw, q_mvar)
+    V_base[:, ~model.supplied] = model.v_root
+
+    contingency_data = {'net': net, 'p_mw': p_mw, 'q_mvar': q_mvar, 'V_base': V_base,
+        'time_step_hours': time_step_hours, 'reconnect': reconnect}
+
+    if n_processes is None:
+        n_processes = os.cpu_count()
+
+    if n_processes == 1 or len(line_IDs) == 1:
+        _init_worker(contingency_data)
+        result_list = [_run_contingency(line_ID) for line_ID in line_IDs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = n_processes, initializer = _init_worker,
+            initargs = (contingency_data,)) as executor:
+            chunksize = max(1, len(line_IDs) // (4*n_processes))
+            result_list = list(executor.map(_run_contingency, line_IDs, chunksize = chunksize))
+
+    results = pd.DataFrame(result_list).set_index('line')
+    # Keep line IDs as they are (and not as floating point numbers because of the missing values)
+    results['reconnected_by'] = pd.Series([result['reconnected_by'] for result in result_list], index = results.index, dtype=object)
+
+    return results
@@ -39,7 +39,7 @@ load_data = pd.read_csv(filename_load_data_fullpath,sep=';')
 load_data.set_index('Time',inplace = True)
 
 # Read grid data
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+net = ppcsv.read_net_from_csv_cached(path_data_set, baseMVA=10)
 
 # Read load scenarios
 scen = ls.read_scenario_from_csv(path_data_set,filename_point_load = filename_scenario)
@@ -17,6 +17,7 @@ import os
 import load_scenarios as ls
 import load_profiles as lp
 import pandapower_read_csv as ppcsv
+import hosting_capacity as hc
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 import math
@@ -36,7 +37,7 @@ filename_load_data_fullpath = os.path.join(path_data_set,'load_data_CINELDI_MV_r
 filename_load_mapping_fullpath = os.path.join(path_data_set,'mapping_loads_to_CINELDI_MV_reference_grid.csv')
 
 # %% Read pandapower network
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+net = ppcsv.read_net_from_csv_cached(path_data_set, baseMVA=10)
 
 #adding a load of 1MW at . positive values equals load
 p_mw = 1
@@ -58,5 +59,12 @@ print('Total load demand in the system assuming a peak load model: ' + str(net.r
 
 pp_plotting.pf_res_plotly(net)
 
+# %% Hosting capacity for additional load (with the same power factor) at each bus, 
+# i.e. the largest additional load for which voltages and line currents are within their limits
+
+capacity = hc.calc_hosting_capacity(net, kind='load', cos_phi=pf, n_processes=1)
+
+print('Hosting capacity for additional load at bus 95: ' + str(capacity.loc[95,'capacity_mw']) + ' MW (limited by ' + str(capacity.loc[95,'limiting']) + ')')
+
 # %%
 
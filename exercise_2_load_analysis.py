@@ -17,6 +17,7 @@ import pandas as pd
 import os
 import load_scenarios as ls
 import load_profiles as lp
+import load_sensitivity as lsens
 import pandapower_read_csv as ppcsv
 import matplotlib.pyplot as plt
 import matplotlib as mpl
@@ -48,46 +49,27 @@ i_time_series_new_load = 90
 
 # %% Read pandapower network
 
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+net = ppcsv.read_net_from_csv_cached(path_data_set, baseMVA=10)
 
 ###################TASK2###################
-def getLowestVoltage(loadDict, net):
-    voltageList = []
-    for key in loadDict:
-        if key in net.bus['name'].values:
-            voltage = net.res_bus.loc[key, 'vm_pu']
-            voltageList.append(voltage)
-    print(f'Lowest voltage in the area is {min(voltageList)} pu')
-    return min(voltageList)
-
-
-def LoadTable(loadDict):
-    agg=0
-    iteration=0
-    print("Bus      Value")
-    for key,value in loadDict.items():
-        print(f"{key}      {value[0]}\n")
-        agg+=value[0]
-        iteration+=1
-    print(f"Aggregated    {agg}\n")
-    return(agg)
-
 def multiplyBuses(buslist, scalingfactors):
-    vList=[]
-    aggList=[]
-    for scfact in scalingfactors:
-        net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
-        net.load.loc[net.load['bus'].isin(buslist), 'p_mw']*=scfact 
-        pp.runpp(net,init='results',algorithm='bfsw')
-        newloadDict={90:net.load.loc[net.load['bus']==90, 'p_mw'].values, 91:net.load.loc[net.load['bus']==91, 
-            'p_mw'].values, 92:net.load.loc[net.load['bus']==92, 'p_mw'].values, 96:net.load.loc[net.load['bus']==96, 'p_mw'].values}
-        aggList.append(LoadTable(newloadDict))
-        vList.append(getLowestVoltage(newloadDict, net))
+    # Voltages for the scaled loads are found from the voltage sensitivities at the operating point
+    # of the network (see load_sensitivity.py) instead of re-reading the network and running power
+    # flow for each scaling factor; the power flow is solved exactly next to where the voltage limit
+    # of the buses or the loading limit of the lines (100 %) is first violated
+    sens = lsens.get_load_sensitivity(net)
+    results = sens.scale_loads(buslist, scalingfactors, scale_q=False, bus_IDs_voltage=buslist,
+        min_vm_pu=net.bus.loc[buslist, 'min_vm_pu'].max(), max_loading_percent=100)
+    aggList = results['p_mw'].tolist()
+    vList = results['min_vm_pu'].tolist()
 
     plt.plot(aggList, vList, marker='o', linestyle='-', color='b')
+    violation = results['violation']
+    plt.plot(results.loc[violation, 'p_mw'], results.loc[violation, 'min_vm_pu'], 'o', color='r', label='Limit violated')
     plt.xlabel('Aggregated Load (MW)')
     plt.ylabel('Voltage (p.u.)')
     plt.title('Voltage as a Function of Aggregated Load')
+    plt.legend()
     plt.grid(True)
     plt.show()
 scalingFactors=[1,1.2,1.4,1.6,1.8,2]
@@ -60,7 +60,7 @@ data_load_point.set_index(keys = 'bus_i', drop = True, inplace = True)
 
 # %% Read pandapower network
 
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+net = ppcsv.read_net_from_csv_cached(path_data_set, baseMVA=10)
 
 
 # %% Set up hourly normalized load time series for a representative day (task 2; this code is provided to the students)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for reading the grid data files of the CINELDI MV reference grid (.csv files on the
+MATPOWER format) with a common schema, i.e. with the decimal separator detected from the file
+and the column names of the previous version of the files translated to the current names.
+"""
+
+import pandas as pd
+import re
+
+# Translation of the column names used in the previous version of the grid data files (until
+# around August 2022) to the standard MATPOWER format (but lowercase) used in the current version
+COLUMN_NAMES_OLD = {
+    'bus': {'ID': 'bus_i', 'type': 'bus_type', 'area_num': 'bus_area', 'Va - degr': 'Va',
+        'baseKV': 'base_kV', 'max_Vm': 'Vmax', 'min_Vm': 'Vmin'},
+    'branch': {'r': 'br_r', 'x': 'br_x', 'b': 'br_b', 'rateA': 'rate_A',
+        'rateB': 'rate_B', 'rateC': 'rate_C', 'ratio': 'tap'}}
+
+# Column that is only present in the current version of each type of grid data file
+COLUMN_CURRENT_VERSION = {'bus': 'bus_i', 'branch': 'br_r'}
+
+# Numbers written with the decimal separator ',' (as a complete field of a .csv file)
+_DECIMAL_COMMA_PATTERN = re.compile(r'^\s*[-+]?\d*,\d+([eE][-+]?\d+)?\s*$')
+
+
+def detect_decimal_separator(filename, sep=';', n_lines=100):
+    """ Detect the decimal separator used in a .csv file from its first lines
+
+        Inputs:
+            filename: Full path of the .csv file
+            sep: Field separator of the file (optional; default: ';')
+            n_lines: Number of lines to inspect (optional; default: 100)
+
+        Outputs:
+            decimal: ',' if numbers in the file are written with decimal separator ','; otherwise '.'
+    """
+
+    with open(filename, 'r', encoding='utf-8-sig', errors='replace') as f:
+        for i_line, line in enumerate(f):
+            if i_line > n_lines:
+                break
+            if i_line > 0 and any(_DECIMAL_COMMA_PATTERN.match(field) for field in line.rstrip('\r\n').split(sep)):
+                return ','
+
+    return '.'
+
+
+def get_column_names(columns, table):
+    """ Translate column names of a grid data file to the names used in the current version of
+        the files, if the columns are those of the previous version
+
+        Inputs:
+            columns: List (or Index) of column names of the file
+            table: Type of grid data file ('bus' or 'branch'; other types are not translated)
+
+        Outputs:
+            columns_new: Dictionary with the translation of column names (empty if the file is of
+                the current version)
+    """
+
+    if table not in COLUMN_NAMES_OLD or COLUMN_CURRENT_VERSION[table] in columns:
+        return {}
+
+    return {col: COLUMN_NAMES_OLD[table][col] for col in columns if col in COLUMN_NAMES_OLD[table]}
+
+
+def read_grid_table(filename, table=None, sep=';', decimal=None):
+    """ Read a grid data file with numeric columns parsed by the .csv reader and with the column
+        names of the current version of the grid data files
+
+        Inputs:
+            filename: Full path of the .csv file
+            table: Type of grid data file ('bus', 'branch', or None for other files, e.g.
+                extra branch data, that are read without translating the column names)
+                (optional; default: None)
+            sep: Field separator of the file (optional; default: ';')
+            decimal: Decimal separator (optional; default: detected from the file)
+
+        Outputs:
+            df: DataFrame with the data of the file
+    """
+
+    if decimal is None:
+        decimal = detect_decimal_separator(filename, sep)
+
+    df = pd.read_csv(filename, sep=sep, decimal=decimal)
+
+    columns_new = get_column_names(df.columns, table)
+    if len(columns_new) > 0:
+        df = df.rename(columns = columns_new)
+
+    return df
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for calculating the hosting capacity for new load or generation at each bus of a
+radial grid such as the CINELDI MV reference grid, i.e. the largest additional load demand
+(or generation) at the bus for which bus voltages and line currents stay within their limits.
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import math
+import concurrent.futures
+import radial_power_flow as rpf
+
+# Data shared by all bus searches in a worker process (set once per process by _init_worker)
+_hc_data = None
+
+
+def _init_worker(hc_data):
+    """ Set up the radial power flow model shared by all bus searches in the worker process """
+
+    global _hc_data
+    _hc_data = dict(hc_data)
+    _hc_data['model'] = rpf.radial_power_flow(hc_data['net'])
+
+
+def get_limit_violation(model, V, min_vm_pu, max_vm_pu, max_loading_percent):
+    """ Check power flow solutions against voltage and line loading limits
+
+        Inputs:
+            model: radial_power_flow object
+            V: 2D complex array (operating states × buses) with bus voltages (p.u.)
+            min_vm_pu, max_vm_pu: Arrays with lower and upper voltage limits of each bus (p.u.)
+            max_loading_percent: Upper line loading limit (%)
+
+        Outputs:
+            limiting: None if no limit is violated; otherwise 'min_vm_pu', 'max_vm_pu' or
+                'max_loading_percent' for the limit with the largest violation
+            element: ID of the bus or line with the largest violation (None if no limit is violated)
+            results: Dictionary with 'min_vm_pu', 'max_vm_pu' and 'max_loading_percent' over
+                all operating states
+            violation: Array with the largest violation of any limit for each operating state
+                (p.u. for voltages and p.u. of the rating for line loadings; negative if all
+                limits are respected)
+    """
+
+    vm_pu = np.abs(V[:, model.supplied])
+    bus_IDs = model.bus_IDs[model.supplied]
+    i_ka = np.maximum(np.abs((V[:, model.f_bus] - V[:, model.t_bus]) / model.z_branch + V[:, model.f_bus] * model.y_sh_half),
+        np.abs((V[:, model.t_bus] - V[:, model.f_bus]) / model.z_branch + V[:, model.t_bus] * model.y_sh_half)) * model.i_base_ka
+    loading_percent = np.nan_to_num(i_ka / model.max_i_ka * 100)
+
+    # Violations relative to the limits (operating states × buses or lines)
+    violations = {
+        'min_vm_pu': min_vm_pu[model.supplied] - vm_pu,
+        'max_vm_pu': vm_pu - max_vm_pu[model.supplied],
+        'max_loading_percent': (loading_percent - max_loading_percent) / 100}
+    element_IDs = {'min_vm_pu': bus_IDs, 'max_vm_pu': bus_IDs, 'max_loading_percent': model.line_IDs}
+
+    limiting = None
+    element = None
+    violation_max = 0
+    violation = np.full(V.shape[0], -np.inf)
+    for limit, violation_limit in violations.items():
+        if violation_limit.size == 0:
+            continue
+        violation = np.maximum(violation, violation_limit.max(axis=1))
+        if violation_limit.max() > violation_max:
+            violation_max = violation_limit.max()
+            limiting = limit
+            element = element_IDs[limit][violation_limit.max(axis=0).argmax()]
+
+    results = {'min_vm_pu': vm_pu.min(), 'max_vm_pu': vm_pu.max(),
+        'max_loading_percent': loading_percent.max() if loading_percent.size > 0 else np.nan}
+
+    return limiting, element, results, violation
+
+
+def _search_bus(bus_ID):
+    """ Find the hosting capacity at one bus by bisection, warm starting each power flow from
+        the solution for the largest feasible addition found so far. For time series, the
+        bisection is done for the time steps closest to the limits only, and the result is
+        verified for all time steps (adding time steps where limits are violated, if any).
+
+        Inputs:
+            bus_ID: ID of the bus
+
+        Outputs:
+            result: Dictionary with the hosting capacity and the limit that determines it
+    """
+
+    d = _hc_data
+    model = d['model']
+    i_bus = model.bus_IDs.get_loc(bus_ID)
+    n_states = d['p_mw'].shape[0]
+    result = {'bus': bus_ID, 'capacity_mw': np.nan, 'limiting': None, 'limiting_element': None,
+        'min_vm_pu': np.nan, 'max_vm_pu': np.nan, 'max_loading_percent': np.nan}
+
+    if not model.supplied[i_bus]:
+        result['limiting'] = 'not supplied'
+        return result
+
+    def evaluate(p_add_mw, states, v_init):
+        p_mw = d['p_mw'][states]
+        q_mvar = d['q_mvar'][states]
+        p_mw[:, i_bus] += d['sign'] * p_add_mw * d['profile_new'][states]
+        q_mvar[:, i_bus] += d['sign'] * p_add_mw * d['tan_phi'] * d['profile_new'][states]
+        V, converged, n_iterations = model.solve(p_mw, q_mvar, v_init = v_init, max_iteration = d['max_iteration'])
+        limiting, element, results, violation = get_limit_violation(model, V, d['min_vm_pu'], d['max_vm_pu'], d['max_loading_percent'])
+        if not converged.all():
+            limiting, element = 'not converged', None
+            violation[~converged] = np.inf
+        return V, limiting, element, results, violation
+
+    # Base case (without additional load or generation)
+    states_all = np.arange(n_states)
+    V_full, limiting, element, results, violation = evaluate(0, states_all, None)
+    if limiting is not None:
+        result.update({'capacity_mw': 0.0, 'limiting': 'base case ' + limiting, 'limiting_element': element})
+        result.update(results)
+        return result
+    p_full, results_full = 0.0, results
+
+    # Time steps closest to the limits
+    states = np.sort(np.argsort(-violation, kind='stable')[:d['n_states_screen']])
+    p_hi, limiting_hi, element_hi = None, None, None
+    while True:
+        p_lo, V_lo = p_full, V_full[states]
+
+        # Increase the upper bound until a limit is violated
+        if p_hi is None:
+            p_hi = max(d['p_init_mw'], p_lo)
+            while True:
+                V, limiting, element, results, violation = evaluate(p_hi, states, V_lo)
+                if limiting is not None:
+                    limiting_hi, element_hi = limiting, element
+                    break
+                p_lo, V_lo = p_hi, V
+                if p_hi >= d['p_max_mw']:
+                    limiting_hi, element_hi = 'upper bound', None
+                    break
+                p_hi = min(2 * p_hi, d['p_max_mw'])
+
+        # Bisection between the largest feasible and the smallest infeasible addition
+        if limiting_hi != 'upper bound':
+            while p_hi - p_lo > d['tolerance_mw']:
+                p_mid = (p_lo + p_hi) / 2
+                V, limiting, element, results, violation = evaluate(p_mid, states, V_lo)
+                if limiting is None:
+                    p_lo, V_lo = p_mid, V
+                else:
+                    p_hi, limiting_hi, element_hi = p_mid, limiting, element
+
+        # Verify the result for all time steps
+        if len(states) == n_states:
+            V, limiting, element, results, violation = evaluate(p_lo, states_all, V_lo)
+        else:
+            V, limiting, element, results, violation = evaluate(p_lo, states_all, V_full)
+        if limiting is None:
+            p_full, results_full = p_lo, results
+            break
+
+        # Add the time steps where limits are violated and search below the verified addition
+        states_new = np.argsort(-violation, kind='stable')[:d['n_states_screen']]
+        states = np.union1d(states, states_new[violation[states_new] > 0])
+        p_hi, limiting_hi, element_hi = p_lo, limiting, element
+
+    result.update({'capacity_mw': p_full, 'limiting': limiting_hi, 'limiting_element': element_hi})
+    result.update(results_full)
+
+    return result
+
+
+def calc_hosting_capacity(net, bus_IDs=None, kind='load', cos_phi=1.0, profiles_mapped=None, time_steps=None,
+    profile_new=None, max_loading_percent=100, p_init_mw=1.0, p_max_mw=50.0, tolerance_mw=0.01,
+    max_iteration=100, n_states_screen=48, n_processes=None):
+    """ Calculate the hosting capacity for new load or generation at each bus of a radial network,
+        i.e. the largest addition at the bus (one bus at a time) for which the bus voltages stay
+        within the voltage limits of the buses (min_vm_pu and max_vm_pu in net.bus) and the line
+        currents stay within the line ratings (max_i_ka in net.line). The capacity is found by
+        bisection, and the buses are distributed over several processes.
+
+        NB: When called from a script, the call must be protected by if __name__ == '__main__'
+        on platforms that start worker processes by spawning (e.g. Windows).
+
+        Inputs:
+            net: pandapower network (as set up by pandapower_read_csv)
+            bus_IDs: List of IDs of the buses to calculate the hosting capacity for
+                (optional; default: all buses)
+            kind: 'load' for new load or 'generation' for new generation (optional; default: 'load')
+            cos_phi: Power factor of the new load or generation (optional; default: 1.0)
+            profiles_mapped: DataFrame with relative load profiles (unitless) as returned by
+                load_profiles.map_rel_load_profiles, to check the limits for all time steps of a time
+                series (optional; default: check the limits for the current loads of the network only)
+            time_steps: List of time steps (index values of profiles_mapped) (optional; default: all)
+            profile_new: Array with relative profile (unitless) of the new load or generation for
+                each time step (optional; default: constant at the hosting capacity)
+            max_loading_percent: Upper line loading limit (%) (optional; default: 100)
+            p_init_mw: First addition (MW) to try before bisection (optional; default: 1 MW)
+            p_max_mw: Largest addition (MW) to consider (optional; default: 50 MW)
+            tolerance_mw: Tolerance of the hosting capacity (MW) (optional; default: 0.01 MW)
+            max_iteration: Maximum number of iterations of each power flow (optional; default: 100)
+            n_states_screen: Number of time steps closest to the limits that the bisection is
+                done for before verifying the result for all time steps (optional; default: 48)
+            n_processes: Number of worker processes (optional; default: number of CPUs;
+                1 runs all searches in the current process)
+
+        Outputs:
+            capacity: DataFrame indexed by bus ID with columns 'capacity_mw' (hosting capacity),
+                'limiting' (limit that determines the hosting capacity: 'min_vm_pu', 'max_vm_pu',
+                'max_loading_percent', 'not converged', 'upper bound' if p_max_mw is reached, or
+                'base case ...' if a limit is violated without addition), 'limiting_element'
+                (ID of the bus or line where the limit is violated), and 'min_vm_pu', 'max_vm_pu'
+                and 'max_loading_percent' with the highest addition within the limits
+    """
+
+    if kind == 'load':
+        sign = 1
+    elif kind == 'generation':
+        sign = -1
+    else:
+        raise ValueError('Unknown value of argument kind: ' + str(kind))
+
+    model = rpf.radial_power_flow(net)
+    if bus_IDs is None:
+        bus_IDs = list(model.bus_IDs)
+
+    p_mw, q_mvar = model.get_bus_injections(profiles_mapped, time_steps)
+    if profile_new is None:
+        profile_new = np.ones(p_mw.shape[0])
+    profile_new = np.asarray(profile_new, dtype=np.float64)
+    if len(profile_new) != p_mw.shape[0]:
+        raise ValueError('The profile of the new load or generation must have one value for each time step')
+
+    hc_data = {'net': net, 'p_mw': p_mw, 'q_mvar': q_mvar, 'profile_new': profile_new,
+        'sign': sign, 'tan_phi': math.tan(math.acos(cos_phi)),
+        'min_vm_pu': net.bus['min_vm_pu'].to_numpy(dtype=np.float64),
+        'max_vm_pu': net.bus['max_vm_pu'].to_numpy(dtype=np.float64),
+        'max_loading_percent': max_loading_percent, 'p_init_mw': p_init_mw, 'p_max_mw': p_max_mw,
+        'tolerance_mw': tolerance_mw, 'max_iteration': max_iteration, 'n_states_screen': n_states_screen}
+
+    if n_processes is None:
+        n_processes = os.cpu_count()
+
+    if n_processes == 1 or len(bus_IDs) == 1:
+        _init_worker(hc_data)
+        result_list = [_search_bus(bus_ID) for bus_ID in bus_IDs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = n_processes, initializer = _init_worker,
+            initargs = (hc_data,)) as executor:
+            result_list = list(executor.map(_search_bus, bus_IDs))
+
+    capacity = pd.DataFrame(result_list).set_index('bus')
+
+    return capacity
@@ -8,15 +8,708 @@ Module for handling load profiles, i.e. time series for load demand (typically h
 """
 
 import pandas as pd
+import numpy as np
+import scipy.sparse as sp
 import pandapower as pp
 import os
+import hashlib
+import shutil
 from pandas.core.algorithms import isin
 from numpy import  sqrt, real, imag, pi
 import load_scenarios as ls
 
+# Subfolder (of the folder of the load data file) used for binary cache files by default
+CACHE_SUBFOLDER = '.load_profiles_cache'
+
+# File names of the arrays in a load matrix folder (see write_load_matrix)
+LOAD_MATRIX_FILENAMES = {'values': 'values.npy', 'index': 'index.npy', 'columns': 'columns.npy', 
+    'load_max': 'load_max.npy'}
+
+
+def parse_timestamp_index(index):
+    """ Convert an index of time stamps on the format "dd.mm.yyyy H" (with hours 1-indexed, 
+        i.e. from 1 to 24, for hourly data) or "dd.mm.yyyy HH:MM" (time of the start of the time 
+        step, for data with sub-hourly resolution) to a DatetimeIndex (with hours 0-indexed)
+
+        Inputs:
+            index: Index (or list) with time stamp strings
+
+        Outputs:
+            timestamps: DatetimeIndex with the corresponding time stamps
+    """
+
+    index = pd.Index(index)
+    if not (index.dtype == object or pd.api.types.is_string_dtype(index.dtype)):
+        # Time stamps have already been parsed (e.g. by the .xlsx reader)
+        return pd.DatetimeIndex(index)
+
+    # Split date and time of day once for the whole index
+    date_time = index.str.rsplit(' ', n=1, expand=True)
+    dates = date_time.get_level_values(0)
+    times = date_time.get_level_values(1)
+
+    if times.str.contains(':').any():
+        hours_minutes = times.str.split(':', n=1, expand=True)
+        minutes_of_day = hours_minutes.get_level_values(0).astype(int).to_numpy() * 60 \
+            + hours_minutes.get_level_values(1).astype(int).to_numpy()
+    else:
+        minutes_of_day = (times.astype(int).to_numpy() - 1) * 60
+
+    # Each date is repeated for all time steps of the day, so only the unique dates need to be parsed
+    codes, dates_unique = pd.factorize(dates)
+    days = pd.to_datetime(dates_unique, format='%d.%m.%Y').to_numpy()[codes]
+    timestamps = pd.DatetimeIndex(days + minutes_of_day * np.timedelta64(1, 'm'))
+
+    return timestamps
+
+
+def get_resolution(index):
+    """ Return the (fixed) time resolution of a DatetimeIndex as a Timedelta 
+        (the most common difference between consecutive time stamps; 1 hour for a single time stamp)
+    """
+
+    if len(index) < 2:
+        return pd.Timedelta(hours=1)
+
+    diffs, counts = np.unique(np.diff(index.asi8), return_counts=True)
+
+    return pd.Timedelta(int(diffs[counts.argmax()]), unit='ns')
+
+
+def resample_load_data(loaddata, resolution, method='interpolate'):
+    """ Resample load data to a different fixed time resolution, operating on all load 
+        time series at once
+
+        Inputs:
+            loaddata: DataFrame with load data (time stamps as index and load IDs as columns)
+                with fixed time resolution
+            resolution: New time resolution (Timedelta or string such as '1h' or '15min'); 
+                either the current or the new resolution must be a whole multiple of the other
+            method: How to obtain values for a finer time resolution; 'interpolate' for linear 
+                interpolation between the time steps, or 'repeat' to repeat the value of each 
+                time step (which preserves energy) (optional; default: 'interpolate'). 
+                For a coarser resolution, the values are always averaged over each new time step, 
+                and time steps at the end that do not make up a full new time step are left out.
+
+        Outputs:
+            loaddata_resampled: DataFrame with resampled load data
+    """
+
+    resolution = pd.Timedelta(pd.tseries.frequencies.to_offset(resolution))
+    resolution_in = get_resolution(loaddata.index)
+    values = loaddata.to_numpy(dtype=np.float64)
+    n_time_steps, n_series = values.shape
+
+    if resolution >= resolution_in:
+        factor = resolution / resolution_in
+        if factor != int(factor):
+            raise ValueError('New resolution must be a multiple of the current resolution ' + str(resolution_in))
+        factor = int(factor)
+        n_time_steps_new = n_time_steps // factor
+        values_new = values[:n_time_steps_new*factor].reshape(n_time_steps_new, factor, n_series).mean(axis=1)
+        index_new = loaddata.index[:n_time_steps_new*factor:factor]
+    else:
+        factor = resolution_in / resolution
+        if factor != int(factor):
+            raise ValueError('Current resolution ' + str(resolution_in) + ' must be a multiple of the new resolution')
+        factor = int(factor)
+        if method == 'repeat':
+            values_new = np.repeat(values, factor, axis=0)
+        elif method == 'interpolate':
+            # Position of each new time step between the old time steps (the values after the 
+            # last old time step are kept constant)
+            position = np.arange(n_time_steps*factor) / factor
+            i_before = np.minimum(position.astype(int), n_time_steps-1)
+            i_after = np.minimum(i_before+1, n_time_steps-1)
+            frac = (position - i_before)[:,None]
+            values_new = values[i_before] * (1-frac) + values[i_after] * frac
+        else:
+            raise ValueError('Unknown resampling method: ' + str(method))
+        index_new = pd.DatetimeIndex(np.repeat(loaddata.index.to_numpy(), factor) 
+            + np.tile(np.arange(factor) * resolution.to_timedelta64(), n_time_steps))
+
+    loaddata_resampled = pd.DataFrame(values_new, index = index_new, columns = loaddata.columns)
+
+    return loaddata_resampled
+
+
+def normalize_load_data(loaddata):
+    """ Normalize time stamp index and column names of load data read from file
+
+        Inputs:
+            loaddata: DataFrame with load data as read from file, with time stamp strings as
+                index and load IDs (possibly strings) as columns
+
+        Outputs:
+            loaddata: DataFrame with time stamps as index and load IDs (integers) as columns
+    """
+
+    # Fix time stamp index of the DataFrame (not really needed, but nice to have for later processing)
+    loaddata.index = parse_timestamp_index(loaddata.index)
+
+    # Convert column names to integers in case they are strings 
+    loaddata.columns = pd.Index(data = [int(i) for i in loaddata.columns.to_list()])
+
+    return loaddata
+
+
+def read_load_data_file(loaddata_filename):
+    """ Read load data file and normalize its time stamp index and column names
+
+        Inputs:
+            loaddata_filename: Full path of load data file (either .xlsx or .csv)
+
+        Outputs:
+            loaddata: DataFrame with load data; indices are time stamps and columns are 
+                load IDs (integers)
+    """
+
+    filename, ext = os.path.splitext(loaddata_filename)
+    if ext == '.xlsx':
+        loaddata = pd.read_excel(loaddata_filename, index_col=0, parse_dates=False)
+    elif ext == '.csv':
+        loaddata = pd.read_csv(loaddata_filename, sep = ';', index_col=0, parse_dates=False)
+    else:
+        print('Error: Only .csv and .xlsx load data files supported')
+        raise
+
+    return normalize_load_data(loaddata)
+
+
+def iter_load_data_windows(loaddata_filename, window='day', chunksize=10000):
+    """ Read load data file in chunks and yield consecutive time windows of the load data, 
+        so that the processing of the first windows can start before the whole file is read 
+        and memory use is bounded by the chunk size and the window length
+
+        Inputs:
+            loaddata_filename: Full path of load data file (either .xlsx or .csv; NB: .xlsx files
+                are read in one go and only .csv files are read in chunks)
+            window: Length of time windows; 'day', 'week' or number of hours (integer)
+                (optional; default: 'day')
+            chunksize: Number of rows to read from the file at a time (optional; default: 10000)
+
+        Outputs (yielded):
+            loaddata_window: DataFrame with load data for a time window, with index and columns 
+                normalized as for read_load_data_file; windows start at the first time stamp in 
+                the file, and the last window may be incomplete
+    """
+
+    if window == 'day':
+        window_length = pd.Timedelta(days=1)
+    elif window == 'week':
+        window_length = pd.Timedelta(weeks=1)
+    else:
+        window_length = pd.Timedelta(hours=int(window))
+
+    filename, ext = os.path.splitext(loaddata_filename)
+    if ext == '.xlsx':
+        chunks = [pd.read_excel(loaddata_filename, index_col=0, parse_dates=False)]
+    elif ext == '.csv':
+        chunks = pd.read_csv(loaddata_filename, sep = ';', index_col=0, parse_dates=False, chunksize=chunksize)
+    else:
+        print('Error: Only .csv and .xlsx load data files supported')
+        raise
+
+    buffer = None
+    window_end = None
+    for chunk in chunks:
+        chunk = normalize_load_data(chunk)
+        if buffer is None:
+            buffer = chunk
+            window_end = chunk.index[0] + window_length
+        else:
+            buffer = pd.concat([buffer, chunk])
+
+        # Yield all windows that are complete, i.e. that end before the last time stamp read so far
+        n_window = buffer.index.searchsorted(window_end)
+        while n_window < len(buffer):
+            if n_window > 0:
+                yield buffer.iloc[:n_window]
+                buffer = buffer.iloc[n_window:]
+            window_end += window_length
+            n_window = buffer.index.searchsorted(window_end)
+
+    # Yield the last window(s) when the end of the file has been reached
+    while buffer is not None and len(buffer) > 0:
+        n_window = buffer.index.searchsorted(window_end)
+        if n_window > 0:
+            yield buffer.iloc[:n_window]
+            buffer = buffer.iloc[n_window:]
+        window_end += window_length
+
+
+def get_file_key(filename):
+    """ Return key identifying the current version of a file, i.e. a tuple with the full path, 
+        the size (bytes) and the modification time (ns) of the file
+    """
+
+    filename = os.path.abspath(filename)
+    stat = os.stat(filename)
+
+    return filename, stat.st_size, stat.st_mtime_ns
+
+
+def get_cache_filename(loaddata_filename, cache_folder=None, suffix='.npz'):
+    """ Return file name of a binary cache file for a load data file. The file name consists of 
+        a prefix identifying the load data file (its name and a hash of its full path, so that 
+        load data files with the same name in different folders can share a cache folder) and 
+        a hash of its size and modification time, so that a modified load data file is never 
+        matched with an outdated cache file.
+
+        Inputs:
+            loaddata_filename: Full path of load data file
+            cache_folder: Folder for cache files (optional; default: subfolder of the folder 
+                of the load data file)
+            suffix: Suffix (extension) identifying the type of cache file (optional; default: '.npz',
+                i.e. the cache file with the parsed load data)
+
+        Outputs:
+            cache_filename: Full path of the cache file (which does not necessarily exist)
+    """
+
+    loaddata_filename = os.path.abspath(loaddata_filename)
+    folder, filename = os.path.split(loaddata_filename)
+    if cache_folder is None:
+        cache_folder = os.path.join(folder, CACHE_SUBFOLDER)
+
+    path, size, mtime_ns = get_file_key(loaddata_filename)
+    path_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+    key_hash = hashlib.sha1(('%d|%d' % (size, mtime_ns)).encode('utf-8')).hexdigest()[:16]
+
+    cache_filename = os.path.join(cache_folder, '%s_%s_%s%s' % (os.path.splitext(filename)[0], path_hash, 
+        key_hash, suffix))
+
+    return cache_filename
+
+
+def remove_outdated_cache_files(cache_filename):
+    """ Remove cache files (or folders) of the same type as a given cache file that were 
+        created for previous versions of the same load data file, i.e. with the same prefix 
+        (load data file name and path hash) and suffix but a different version hash
+
+        Inputs:
+            cache_filename: Full path of the current cache file (as returned by get_cache_filename)
+    """
+
+    cache_folder, filename = os.path.split(cache_filename)
+    prefix, key_hash_suffix = filename.rsplit('_', 1)
+    suffix = key_hash_suffix[16:]
+
+    for filename_old in os.listdir(cache_folder):
+        if filename_old == filename or filename_old.endswith('.tmp') or '_' not in filename_old:
+            continue
+        prefix_old, key_hash_suffix_old = filename_old.rsplit('_', 1)
+        if prefix_old == prefix and key_hash_suffix_old[16:] == suffix:
+            filename_old_fullpath = os.path.join(cache_folder, filename_old)
+            if os.path.isdir(filename_old_fullpath):
+                shutil.rmtree(filename_old_fullpath)
+            else:
+                os.remove(filename_old_fullpath)
+
+
+def read_load_data_cache(cache_filename):
+    """ Read parsed load data from binary cache file
+
+        Inputs:
+            cache_filename: Full path of the cache file
+
+        Outputs:
+            loaddata: DataFrame with load data as returned by read_load_data_file
+                (None if the cache file does not exist or cannot be read)
+    """
+
+    if not os.path.isfile(cache_filename):
+        return None
+
+    try:
+        with np.load(cache_filename, allow_pickle=False) as cache:
+            values = cache['values']
+            index = pd.DatetimeIndex(cache['index'].view('datetime64[ns]'))
+            columns = pd.Index(data = cache['columns'])
+    except (OSError, ValueError, KeyError):
+        print('Warning: Could not read load data cache file ' + cache_filename + '; reading load data file instead')
+        return None
+
+    loaddata = pd.DataFrame(values, index = index, columns = columns, copy = False)
+
+    return loaddata
+
+
+def write_load_data_cache(cache_filename, loaddata):
+    """ Write parsed load data to binary cache file (replacing cache files for previous 
+        versions of the same load data file)
+
+        Inputs:
+            cache_filename: Full path of the cache file
+            loaddata: DataFrame with load data as returned by read_load_data_file
+    """
+
+    try:
+        os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+
+        # Write to a temporary file first so that other processes never see a partially written cache file
+        filename_tmp = cache_filename + '.%d.tmp' % os.getpid()
+        with open(filename_tmp, 'wb') as f:
+            np.savez(f, values = loaddata.to_numpy(), index = loaddata.index.asi8, 
+                columns = loaddata.columns.to_numpy())
+        os.replace(filename_tmp, cache_filename)
+
+        remove_outdated_cache_files(cache_filename)
+    except OSError:
+        print('Warning: Could not write load data cache file ' + cache_filename)
+
+
+def is_load_matrix_folder(folder):
+    """ Return True if folder contains a load matrix as written by write_load_matrix """
+
+    return os.path.isdir(folder) and all(os.path.isfile(os.path.join(folder, filename)) 
+        for filename in LOAD_MATRIX_FILENAMES.values())
+
+
+def write_load_matrix(folder, loaddata):
+    """ Write load data to a load matrix folder, i.e. a contiguous float32 matrix (time steps × 
+        load IDs) that can be memory-mapped, together with the time stamps, a lookup table of 
+        load IDs and the peak load of each load ID
+
+        Inputs:
+            folder: Path of load matrix folder (is created if it does not exist)
+            loaddata: DataFrame with load data as returned by read_load_data_file, or an iterable 
+                of such DataFrames for consecutive time windows (e.g. from iter_load_data_windows),
+                which are written one at a time
+    """
+
+    folder_tmp = folder + '.%d.tmp' % os.getpid()
+    os.makedirs(folder_tmp, exist_ok=True)
+    filename_values = os.path.join(folder_tmp, LOAD_MATRIX_FILENAMES['values'])
+
+    if isinstance(loaddata, pd.DataFrame):
+        values = np.lib.format.open_memmap(filename_values, mode='w+', dtype=np.float32, shape=loaddata.shape)
+        values[:] = loaddata.to_numpy()
+        index = loaddata.index.asi8
+        columns = loaddata.columns
+        load_max = loaddata.max().to_numpy(dtype=np.float64)
+    else:
+        # The number of time steps is not known in advance, so the windows are first appended 
+        # to a raw data file and then copied block by block to the .npy file
+        filename_raw = os.path.join(folder_tmp, 'values.raw')
+        index_windows = []
+        columns = None
+        load_max = None
+        with open(filename_raw, 'wb') as f:
+            for loaddata_window in loaddata:
+                if columns is None:
+                    columns = loaddata_window.columns
+                elif not loaddata_window.columns.equals(columns):
+                    raise ValueError('All time windows of the load data must have the same load IDs')
+                f.write(np.ascontiguousarray(loaddata_window.to_numpy(dtype=np.float32)).tobytes())
+                index_windows.append(loaddata_window.index.asi8)
+                load_max_window = loaddata_window.max().to_numpy(dtype=np.float64)
+                load_max = load_max_window if load_max is None else np.fmax(load_max, load_max_window)
+
+        index = np.concatenate(index_windows)
+        values_raw = np.memmap(filename_raw, dtype=np.float32, mode='r', shape=(len(index), len(columns)))
+        values = np.lib.format.open_memmap(filename_values, mode='w+', dtype=np.float32, shape=values_raw.shape)
+        n_rows_block = max(1, 2**22 // max(1, len(columns)))
+        for i_row in range(0, len(index), n_rows_block):
+            values[i_row:i_row+n_rows_block] = values_raw[i_row:i_row+n_rows_block]
+        del values_raw
+        os.remove(filename_raw)
+
+    values.flush()
+    del values
+
+    np.save(os.path.join(folder_tmp, LOAD_MATRIX_FILENAMES['index']), index)
+    np.save(os.path.join(folder_tmp, LOAD_MATRIX_FILENAMES['columns']), columns.to_numpy(dtype=np.int64))
+    np.save(os.path.join(folder_tmp, LOAD_MATRIX_FILENAMES['load_max']), load_max)
+
+    # Replace any existing load matrix only when the new one is complete
+    if os.path.isdir(folder):
+        shutil.rmtree(folder)
+    os.replace(folder_tmp, folder)
+
+
+def open_load_matrix(folder):
+    """ Open load matrix folder written by write_load_matrix
+
+        Inputs:
+            folder: Path of load matrix folder
+
+        Outputs:
+            values: Read-only memory-mapped float32 array (time steps × load IDs) with load data
+            index: DatetimeIndex with the time stamps of the time steps
+            columns: Index with the load IDs (integers) of the columns
+            load_max: Array with peak load for each load ID
+    """
+
+    values = np.load(os.path.join(folder, LOAD_MATRIX_FILENAMES['values']), mmap_mode='r')
+    index = pd.DatetimeIndex(np.load(os.path.join(folder, LOAD_MATRIX_FILENAMES['index'])).view('datetime64[ns]'))
+    columns = pd.Index(data = np.load(os.path.join(folder, LOAD_MATRIX_FILENAMES['columns'])))
+    load_max = np.load(os.path.join(folder, LOAD_MATRIX_FILENAMES['load_max']))
+
+    return values, index, columns, load_max
+
+
+def calc_load_statistics(values, index, columns, n_rows_block=8760):
+    """ Calculate statistics for each load time series in a single pass over the load data 
+        (block by block, so that memory-mapped load data are not read into memory at once)
+
+        Inputs:
+            values: 2D array (time steps × load IDs) with load data
+            index: DatetimeIndex with the time stamps of the time steps (sorted)
+            columns: Index with the load IDs
+            n_rows_block: Approximate number of time steps to process at a time
+                (optional; default: 8760)
+
+        Outputs:
+            stats: Dictionary with entries 'series' for a DataFrame with one row per load ID
+                and columns 'peak', 'peak_time_step' (0-indexed), 'peak_time', 'mean', 'energy' 
+                (in units of the load data multiplied by hours) and 'utilization_time' (hours), 
+                'daily_max' for a DataFrame with daily peak loads (days × load IDs), and 
+                'monthly_max' for a DataFrame with monthly peak loads (months × load IDs)
+    """
+
+    n_time_steps, n_series = values.shape
+
+    # Duration of each time step in hours (assuming a fixed resolution)
+    if n_time_steps > 1:
+        dt_hours = (index[1] - index[0]) / pd.Timedelta(hours=1)
+    else:
+        dt_hours = 1.0
+
+    # First time step of each day; blocks are made up of whole days
+    days = index.normalize()
+    i_day_start = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    i_block_start = i_day_start[np.unique(np.searchsorted(i_day_start, 
+        np.arange(0, n_time_steps, n_rows_block), side='right') - 1)]
+    i_block_end = np.r_[i_block_start[1:], n_time_steps]
+
+    peak = np.full(n_series, -np.inf)
+    peak_time_step = np.zeros(n_series, dtype=np.int64)
+    total = np.zeros(n_series)
+    daily_max = np.empty((len(i_day_start), n_series))
+    for i_start, i_end in zip(i_block_start, i_block_end):
+        block = np.asarray(values[i_start:i_end], dtype=np.float64)
+        total += block.sum(axis=0)
+
+        i_max_block = block.argmax(axis=0)
+        peak_block = block[i_max_block, np.arange(n_series)]
+        I_new_peak = peak_block > peak
+        peak[I_new_peak] = peak_block[I_new_peak]
+        peak_time_step[I_new_peak] = i_start + i_max_block[I_new_peak]
+
+        i_days_block = np.flatnonzero((i_day_start >= i_start) & (i_day_start < i_end))
+        daily_max[i_days_block] = np.maximum.reduceat(block, i_day_start[i_days_block] - i_start, axis=0)
+
+    # Monthly peak loads follow from the daily peak loads
+    day_index = days[i_day_start]
+    months = day_index.to_period('M')
+    i_month_start = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    monthly_max = np.maximum.reduceat(daily_max, i_month_start, axis=0)
+
+    energy = total * dt_hours
+    with np.errstate(divide='ignore', invalid='ignore'):
+        utilization_time = energy / peak
+
+    series = pd.DataFrame({'peak': peak, 'peak_time_step': peak_time_step, 'peak_time': index[peak_time_step],
+        'mean': total / n_time_steps, 'energy': energy, 'utilization_time': utilization_time}, index = columns)
+
+    stats = {'series': series, 
+        'daily_max': pd.DataFrame(daily_max, index = day_index, columns = columns),
+        'monthly_max': pd.DataFrame(monthly_max, index = day_index[i_month_start], columns = columns)}
+
+    return stats
+
+
+def read_load_statistics_cache(cache_filename):
+    """ Read load statistics (as returned by calc_load_statistics) from binary cache file
+
+        Inputs:
+            cache_filename: Full path of the cache file
+
+        Outputs:
+            stats: Dictionary with load statistics (None if the cache file does not exist or cannot be read)
+    """
+
+    if not os.path.isfile(cache_filename):
+        return None
+
+    try:
+        with np.load(cache_filename, allow_pickle=False) as cache:
+            columns = pd.Index(data = cache['columns'])
+            series = pd.DataFrame({'peak': cache['peak'], 'peak_time_step': cache['peak_time_step'],
+                'peak_time': pd.DatetimeIndex(cache['peak_time'].view('datetime64[ns]')), 'mean': cache['mean'],
+                'energy': cache['energy'], 'utilization_time': cache['utilization_time']}, index = columns)
+            daily_max = pd.DataFrame(cache['daily_max'], columns = columns,
+                index = pd.DatetimeIndex(cache['daily_index'].view('datetime64[ns]')))
+            monthly_max = pd.DataFrame(cache['monthly_max'], columns = columns,
+                index = pd.DatetimeIndex(cache['monthly_index'].view('datetime64[ns]')))
+    except (OSError, ValueError, KeyError):
+        print('Warning: Could not read load statistics cache file ' + cache_filename)
+        return None
+
+    stats = {'series': series, 'daily_max': daily_max, 'monthly_max': monthly_max}
+
+    return stats
+
+
+def write_load_statistics_cache(cache_filename, stats):
+    """ Write load statistics (as returned by calc_load_statistics) to binary cache file
+
+        Inputs:
+            cache_filename: Full path of the cache file
+            stats: Dictionary with load statistics
+    """
+
+    series = stats['series']
+    try:
+        os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+        filename_tmp = cache_filename + '.%d.tmp' % os.getpid()
+        with open(filename_tmp, 'wb') as f:
+            np.savez(f, columns = series.index.to_numpy(dtype=np.int64), peak = series['peak'].to_numpy(),
+                peak_time_step = series['peak_time_step'].to_numpy(), 
+                peak_time = pd.DatetimeIndex(series['peak_time']).asi8, mean = series['mean'].to_numpy(),
+                energy = series['energy'].to_numpy(), utilization_time = series['utilization_time'].to_numpy(),
+                daily_max = stats['daily_max'].to_numpy(), daily_index = stats['daily_max'].index.asi8,
+                monthly_max = stats['monthly_max'].to_numpy(), monthly_index = stats['monthly_max'].index.asi8)
+        os.replace(filename_tmp, cache_filename)
+
+        remove_outdated_cache_files(cache_filename)
+    except OSError:
+        print('Warning: Could not write load statistics cache file ' + cache_filename)
+
+
+def calc_squared_distances(X, C):
+    """ Return matrix with squared Euclidean distances between the rows of X and the rows of C """
+
+    D2 = (X**2).sum(axis=1)[:,None] - 2 * X @ C.T + (C**2).sum(axis=1)[None,:]
+
+    return np.maximum(D2, 0)
+
+
+def cluster_days(X, n_clusters, method='kmedoids', n_iter=100, seed=0):
+    """ Cluster the rows of a matrix (e.g. one row per day) with k-means or k-medoids and 
+        select one row as representative for each cluster
+
+        Inputs:
+            X: 2D array with one row per object to cluster
+            n_clusters: Number of clusters
+            method: 'kmeans' (representative is the row closest to the cluster mean) or 
+                'kmedoids' (representative is the row minimizing the sum of distances to the 
+                other rows in the cluster) (optional; default: 'kmedoids')
+            n_iter: Maximum number of iterations (optional; default: 100)
+            seed: Seed for the random initialization (optional; default: 0)
+
+        Outputs:
+            i_repr: Array with the row index of the representative of each cluster
+            labels: Array with the cluster (0-indexed) of each row
+    """
+
+    n_rows = X.shape[0]
+    n_clusters = min(n_clusters, n_rows)
+    rng = np.random.default_rng(seed)
+
+    # k-means++ initialization
+    i_repr = [rng.integers(n_rows)]
+    D2_min = calc_squared_distances(X, X[i_repr]).ravel()
+    for k in range(1, n_clusters):
+        if D2_min.sum() > 0:
+            i_new = rng.choice(n_rows, p = D2_min / D2_min.sum())
+        else:
+            i_new = rng.choice(np.setdiff1d(np.arange(n_rows), i_repr))
+        i_repr.append(i_new)
+        D2_min = np.minimum(D2_min, calc_squared_distances(X, X[[i_new]]).ravel())
+    i_repr = np.array(i_repr)
+
+    labels = None
+    if method == 'kmeans':
+        C = X[i_repr].astype(np.float64)
+        for it in range(n_iter):
+            labels_new = calc_squared_distances(X, C).argmin(axis=1)
+            if labels is not None and np.array_equal(labels, labels_new):
+                break
+            labels = labels_new
+
+            # Cluster means as a single sparse product
+            n_members = np.bincount(labels, minlength = n_clusters)
+            one_hot = sp.csr_matrix((np.ones(n_rows), (labels, np.arange(n_rows))), shape = (n_clusters, n_rows))
+            C_new = np.asarray(one_hot @ X) / np.maximum(n_members, 1)[:,None]
+
+            # Empty clusters are moved to the row that is farthest from its cluster mean
+            I_empty = n_members == 0
+            if I_empty.any():
+                D2_own = calc_squared_distances(X, C_new)[np.arange(n_rows), labels]
+                C_new[I_empty] = X[np.argsort(D2_own)[::-1][:I_empty.sum()]]
+            C = C_new
+
+        D2 = calc_squared_distances(X, C)
+        labels = D2.argmin(axis=1)
+        # Representative of each cluster is the member closest to the cluster mean
+        D2_members = np.where(labels[:,None] == np.arange(n_clusters)[None,:], D2, np.inf)
+        i_repr = D2_members.argmin(axis=0)
+
+    elif method == 'kmedoids':
+        for it in range(n_iter):
+            labels = calc_squared_distances(X, X[i_repr]).argmin(axis=1)
+            i_repr_new = i_repr.copy()
+            for k in range(n_clusters):
+                i_members = np.flatnonzero(labels == k)
+                if len(i_members) == 0:
+                    continue
+                D_members = np.sqrt(calc_squared_distances(X[i_members], X[i_members]))
+                i_repr_new[k] = i_members[D_members.sum(axis=1).argmin()]
+            if np.array_equal(i_repr, i_repr_new):
+                break
+            i_repr = i_repr_new
+        labels = calc_squared_distances(X, X[i_repr]).argmin(axis=1)
+
+    else:
+        raise ValueError('Unknown clustering method: ' + str(method))
+
+    return i_repr, labels
+
+
+def read_load_mapping(filename_load_mapping):
+    """ Read mapping between load IDs in the load data and bus IDs in the network and compile
+        it into a sparse weight matrix, so that the load profiles of the buses are obtained as 
+        profiles @ weights, where profiles is a (time steps × load IDs) matrix
+
+        Inputs:
+            filename_load_mapping: Full path to file defining how load profiles are mapped onto 
+                buses of the grid model (columns 'bus_i' and 'time_series_ID'; a bus can be mapped 
+                to several load IDs by having several rows for the bus, in which case the load 
+                profile of the bus is a weighted sum of these load profiles with weights given by 
+                the optional column 'weight', normalized to sum to one for each bus)
+
+        Outputs:
+            load_mapping: Dictionary with entries 'weights' for the sparse weight matrix 
+                (load IDs × bus IDs), 'load_IDs' for the list of load IDs (rows of the weight matrix) 
+                and 'bus_IDs' for the list of bus IDs (columns of the weight matrix, in the order of 
+                first appearance in the file)
+    """
+
+    mapping_load_to_bus = pd.read_csv(filename_load_mapping, sep = ';')
+
+    i_load, load_IDs = pd.factorize(mapping_load_to_bus['time_series_ID'])
+    i_bus, bus_IDs = pd.factorize(mapping_load_to_bus['bus_i'])
+    if 'weight' in mapping_load_to_bus.columns:
+        weights = mapping_load_to_bus['weight'].to_numpy(dtype=np.float64)
+    else:
+        weights = np.ones(len(mapping_load_to_bus))
+
+    # Normalize weights so that the (relative) load profile of each bus is a weighted average
+    weights = weights / np.bincount(i_bus, weights = weights)[i_bus]
+
+    weight_matrix = sp.csr_matrix((weights, (i_load, i_bus)), shape = (len(load_IDs), len(bus_IDs)))
+
+    load_mapping = {'weights': weight_matrix, 'load_IDs': load_IDs.to_list(), 'bus_IDs': bus_IDs.to_list()}
+
+    return load_mapping
+
+
 class load_profiles(object):
     
-    def __init__(self, loaddata_filename:str, normalized = True):
+    def __init__(self, loaddata_filename:str, normalized = True, use_cache = True, cache_folder = None,
+        backend = 'dataframe'):
         """
         Initialization of load profiles object. It is assumed that the input data
         are annual load demand time series with hourly resolution (kWh/h) for a set
@@ -24,82 +717,338 @@ class load_profiles(object):
         
         Inputs:
             loaddata_filename: 
-                Full path of load data file (either .xlsx or .csv)
+                Full path of load data file (either .xlsx or .csv) or of a load matrix
+                folder written by write_load_matrix, or DataFrame with load data as returned
+                by read_load_data_file (in which case no cache is used)
 
             normalized:
                 True if load profile data are already normalized and unitless and meant be used to scale 
                 an absolute load value (in kWh/h); False is load data are in absolute values (units kWh/h)
+
+            use_cache:
+                True if the parsed load data should be read from (and written to) a binary cache file
+                (optional; default: True)
+
+            cache_folder:
+                Folder for binary cache files (optional; default: subfolder of the folder of the load data file)
+
+            backend:
+                'dataframe' to hold the load data in memory as DataFrames; 'memmap' to memory-map 
+                a float32 load matrix from disk and compute relative load profiles only when accessed 
+                (optional; default: 'dataframe', except for load matrix folders)
         """
 
-        # Load the load data
-        filename, ext = os.path.splitext(loaddata_filename)
-        if ext == '.xlsx':
-            loaddata = pd.read_excel(loaddata_filename, index_col=0, parse_dates=False)
-        elif ext == '.csv':
-            loaddata = pd.read_csv(loaddata_filename, sep = ';', index_col=0, parse_dates=False)
+        cache_filename = None
+        if isinstance(loaddata_filename, pd.DataFrame):
+            loaddata_in = loaddata_filename
+            loaddata_filename = None
+            use_cache = False
+            backend = 'dataframe'
+        elif is_load_matrix_folder(loaddata_filename):
+            backend = 'memmap'
+            matrix_folder = loaddata_filename
+        elif backend == 'memmap':
+            if not use_cache:
+                raise ValueError('The memmap backend requires use_cache = True or a load matrix folder as input')
+            # Convert the load data file to a load matrix folder in the cache folder (if not done before),
+            # streaming the file one week at a time so that it is never held in memory as a whole
+            matrix_folder = get_cache_filename(loaddata_filename, cache_folder, suffix='.matrix')
+            if not is_load_matrix_folder(matrix_folder):
+                write_load_matrix(matrix_folder, iter_load_data_windows(loaddata_filename, window='week'))
+                remove_outdated_cache_files(matrix_folder)
+        elif backend != 'dataframe':
+            raise ValueError('Unknown load data backend: ' + str(backend))
+
+        if backend == 'memmap':
+            values, index, columns, load_max_values = open_load_matrix(matrix_folder)
+            loaddata = pd.DataFrame(values, index = index, columns = columns, copy = False)
+            load_max = pd.Series(load_max_values, index = columns)
+
+            # Relative load profiles are computed from the peak load vector when accessed
+            loaddata_rel = None
+            if normalized:
+                rel_scale = None
+            else:
+                rel_scale = 1.0 / load_max_values
         else:
-            print('Error: Only .csv and .xlsx load data files supported')
-            raise
-
-        # Fix time stamp index of the DataFrame (not really needed, but nice to have for later processing)
-        timestamp_list = [i.split(" ") for i in loaddata.index]
-        loaddata.index = pd.to_datetime([d + " " + "%.2d" % (int(t) - 1) for d, t in timestamp_list], dayfirst=True)
-       
-        # Convert column names to integers in case they are strings 
-        col_int = [int(i) for i in loaddata.columns.to_list()]
-        loaddata.columns = pd.Index(data = col_int)
-
-        # Annual peak load for each bus
-        load_max = loaddata.max()
+            # Load the load data, using the binary cache if the file has been parsed before
+            loaddata = None
+            if loaddata_filename is None:
+                loaddata = loaddata_in
+            elif use_cache:
+                cache_filename = get_cache_filename(loaddata_filename, cache_folder)
+                loaddata = read_load_data_cache(cache_filename)
+            if loaddata is None:
+                loaddata = read_load_data_file(loaddata_filename)
+                if cache_filename is not None:
+                    write_load_data_cache(cache_filename, loaddata)
+
+            # Annual peak load for each bus
+            load_max = loaddata.max()
         
-        if normalized:
-            # The load data are already normalized (and unitless) and can be used to scale a scalar load value (in kW)
-            loaddata_rel = loaddata
-        else:
-            # Relative load profiles, for each bus normalized to annual peak load for that bus
-            loaddata_rel = loaddata.divide(load_max)
+            if normalized:
+                # The load data are already normalized (and unitless) and can be used to scale a scalar load value (in kW)
+                loaddata_rel = loaddata
+            else:
+                # Relative load profiles, for each bus normalized to annual peak load for that bus
+                loaddata_rel = loaddata.divide(load_max)
+            values = loaddata_rel.to_numpy()
+            rel_scale = None
 
         # Store variables to object
         self.loaddata_filename = loaddata_filename
+        self.use_cache = use_cache
+        self.cache_folder = cache_folder
+        self.cache_filename = cache_filename
+        self.backend = backend
+        self.normalized = normalized
         self.loaddata = loaddata
-        self.loaddata_rel = loaddata_rel
+        self.resolution = get_resolution(loaddata.index)
+        self.time_steps_per_hour = pd.Timedelta(hours=1) / self.resolution
+        self.time_steps_per_day = int(pd.Timedelta(days=1) / self.resolution)
+        self._loaddata_rel = loaddata_rel
         self.load_max = load_max
+        self._values = values
+        self._rel_scale = rel_scale
+        self._stats = None
+        self._load_mappings = {}
+        self._cs_profile_library = {}
+        self._cs_scenarios = {}
+
+
+    @property
+    def loaddata_rel(self):
+        """ Relative load profiles (DataFrame); for the memmap backend, computed when accessed """
+
+        if self._loaddata_rel is not None:
+            return self._loaddata_rel
+
+        return pd.DataFrame(self.get_rel_values(), index = self.loaddata.index, columns = self.loaddata.columns)
+
 
+    def get_rel_values(self, time_steps=slice(None), load_IDs=None):
+        """
+        Get relative load profile values for a subset of time steps and load IDs, reading 
+        (for the memmap backend) only the requested part of the load data
+
+        Inputs:
+            time_steps: Slice or array with positional (0-indexed) indices of time steps
+                (optional; default: all time steps)
+            load_IDs: List of load IDs (optional; default: all load IDs)
 
-    def get_profile_days(self,days:int):
+        Outputs:
+            values: 2D array with relative load profiles (time steps × load IDs); this is a view of
+                the load data if time_steps is a slice, load_IDs is None and no normalization is needed
+        """
+
+        if load_IDs is None:
+            i_cols = slice(None)
+        else:
+            i_cols = self.loaddata.columns.get_indexer(load_IDs)
+            if (i_cols < 0).any():
+                raise KeyError('Load IDs not in load data: ' + str(np.asarray(load_IDs)[i_cols < 0].tolist()))
+
+        if isinstance(time_steps, slice) or isinstance(i_cols, slice):
+            values = self._values[time_steps, i_cols]
+        else:
+            values = self._values[np.ix_(np.asarray(time_steps), i_cols)]
+
+        if self._rel_scale is not None:
+            values = values * self._rel_scale[i_cols]
+
+        return values
+
+
+    def get_statistics(self):
+        """
+        Get statistics for each load time series (in the units of the load data as read from file, 
+        i.e. before any normalization). The statistics are calculated once and stored next to the 
+        binary cache file for later use.
+
+        Outputs:
+            stats: Dictionary with entries 'series' for a DataFrame with one row per load ID
+                and columns 'peak', 'peak_time_step' (0-indexed), 'peak_time', 'mean', 'energy' 
+                and 'utilization_time' (hours), 'daily_max' for a DataFrame with daily peak loads 
+                (days × load IDs), and 'monthly_max' for a DataFrame with monthly peak loads 
+                (months × load IDs)
+        """
+
+        if self._stats is not None:
+            return self._stats
+
+        stats = None
+        cache_filename_stats = None
+        if self.use_cache:
+            cache_filename_stats = get_cache_filename(self.loaddata_filename, self.cache_folder, suffix='.stats.npz')
+            stats = read_load_statistics_cache(cache_filename_stats)
+        if stats is None:
+            stats = calc_load_statistics(self.loaddata.to_numpy(), self.loaddata.index, self.loaddata.columns)
+            if cache_filename_stats is not None:
+                write_load_statistics_cache(cache_filename_stats, stats)
+
+        self._stats = stats
+
+        return stats
+
+
+    def resample(self, resolution, method='interpolate'):
+        """
+        Return load profiles object with the load data resampled to a different time resolution 
+        (see resample_load_data)
+
+        Inputs:
+            resolution: New time resolution (Timedelta or string such as '1h' or '15min')
+            method: 'interpolate' or 'repeat' for finer time resolution (optional; default: 'interpolate')
+
+        Outputs:
+            load_profiles_resampled: load_profiles object (with the dataframe backend)
+        """
+
+        loaddata_resampled = resample_load_data(self.loaddata, resolution, method = method)
+
+        return load_profiles(loaddata_resampled, normalized = self.normalized)
+
+
+    def get_time_steps_days(self, days):
+        """
+        Get positional (0-indexed) indices of the time steps for a given set of days
+
+        Inputs:
+            days: List of integers for the index of the days of the year (1-indexed)
+
+        Outputs:
+            i_time_steps: Slice (for a set of consecutive days) or array with the indices of 
+                the time steps of the selected days
+        """
+
+        days = np.atleast_1d(np.asarray(days, dtype=int))
+        if len(days) > 0 and np.all(np.diff(days) == 1):
+            # Consecutive days can be extracted as a single slice
+            i_time_steps = slice((days[0]-1)*self.time_steps_per_day, days[-1]*self.time_steps_per_day)
+        else:
+            i_time_steps = ((days[:,None]-1)*self.time_steps_per_day + np.arange(self.time_steps_per_day)).ravel()
+
+        return i_time_steps
+
+
+    def get_profile_days(self,days:int,as_array=False,load_IDs=None):
         """
         Get (relative) load profiles for a given set of days
         
         Inputs:
             days: List of integers for the index of the days of the year to
                 to extract load profiles for (1-indexed)
+            as_array: True if the profiles should be returned as a NumPy array rather than a 
+                DataFrame; for a set of consecutive days, the array is a view of the load data
+                when no normalization is needed (optional; default: False)
+            load_IDs: List of load IDs to extract load profiles for (optional; default: all)
         
         Outputs:
             profile_days: DataFrame with the slices of the relative load profile 
                 DataFrame corresponding to the selected days; indices are time steps
-                and columns are load IDs
+                and columns are load IDs (or, if as_array is True, 2D array with the 
+                same values)
         """
 
-        # Build DataFrame with the time steps corresponding to the selected days
-        profile_days = pd.DataFrame(columns = self.loaddata_rel.columns)
-        for day in days:
-            profile_day = self.loaddata_rel.iloc[(day-1)*24:day*24,:]
-            profile_days = pd.concat([profile_days, profile_day])
+        i_time_steps = self.get_time_steps_days(days)
+
+        values = self.get_rel_values(i_time_steps, load_IDs)
+        if as_array:
+            return values
 
-        # Remove timestamp from index and let index be 0-indexed integers 
-        profile_days.reset_index(inplace=True,drop=True)
+        # Build DataFrame with the time steps corresponding to the selected days,
+        # letting the index be 0-indexed integers rather than time stamps
+        if load_IDs is None:
+            columns = self.loaddata.columns
+        else:
+            columns = pd.Index(data = load_IDs)
+        profile_days = pd.DataFrame(np.array(values, dtype=np.float64), columns = columns)
 
         return profile_days
 
 
+    def get_representative_days(self, n_days=10, method='kmedoids', load_IDs=None, n_iter=100, seed=0):
+        """
+        Select representative days by clustering the daily (relative) load profiles of all days
+        of the year, where each day is represented by the load profiles of all load IDs
+
+        Inputs:
+            n_days: Number of representative days (clusters) (optional; default: 10)
+            method: 'kmeans' or 'kmedoids' (see cluster_days) (optional; default: 'kmedoids')
+            load_IDs: List of load IDs to consider (optional; default: all)
+            n_iter: Maximum number of clustering iterations (optional; default: 100)
+            seed: Seed for the random initialization (optional; default: 0)
+
+        Outputs:
+            repr_days: Dictionary with entries 'days' for the list of representative days 
+                (1-indexed and sorted, i.e. on the format accepted by get_profile_days and 
+                map_rel_load_profiles), 'weights' for the list of the number of days each 
+                representative day represents, 'labels' for an array with the (0-indexed) 
+                representative day of each day of the year, and 'error' for a DataFrame (one row 
+                per load ID) comparing the energy and peak load of the load profiles with the energy 
+                and peak load obtained from the weighted representative days
+        """
+
+        # One row per (full) day with the load profiles of all load IDs for all time steps of the day
+        n_per_day = self.time_steps_per_day
+        n_days_year = len(self.loaddata.index) // n_per_day
+        profiles = np.asarray(self.get_rel_values(slice(0, n_days_year*n_per_day), load_IDs), dtype=np.float64)
+        n_series = profiles.shape[1]
+        X = profiles.reshape(n_days_year, n_per_day*n_series)
+
+        i_repr, labels = cluster_days(X, n_days, method = method, n_iter = n_iter, seed = seed)
+
+        # Sort representative days chronologically
+        i_sort = np.argsort(i_repr)
+        i_repr = i_repr[i_sort]
+        labels = np.argsort(i_sort)[labels]
+        weights = np.bincount(labels, minlength = len(i_repr))
+
+        # Approximation error for energy and peak load of each load ID
+        profiles_days = profiles.reshape(n_days_year, n_per_day, n_series)
+        profiles_repr = profiles_days[i_repr]
+        dt_hours = 1 / self.time_steps_per_hour
+        energy = profiles_days.sum(axis=(0,1)) * dt_hours
+        energy_approx = (weights[:,None] * profiles_repr.sum(axis=1)).sum(axis=0) * dt_hours
+        peak = profiles_days.max(axis=(0,1))
+        peak_approx = profiles_repr.max(axis=(0,1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error = pd.DataFrame({'energy': energy, 'energy_approx': energy_approx, 
+                'energy_rel_error': energy_approx / energy - 1, 'peak': peak, 'peak_approx': peak_approx,
+                'peak_rel_error': peak_approx / peak - 1}, 
+                index = self.loaddata.columns if load_IDs is None else pd.Index(data = load_IDs))
+
+        repr_days = {'days': (i_repr + 1).tolist(), 'weights': weights.tolist(), 'labels': labels, 'error': error}
+
+        return repr_days
+
+
+    def get_load_mapping(self, filename_load_mapping):
+        """ 
+        Return mapping between load IDs and bus IDs compiled into a sparse weight matrix 
+        (see read_load_mapping); the mapping file is only read again if it has been modified
+
+            Inputs:
+                filename_load_mapping: Full path to file defining how load profiles are mapped onto buses of the grid model
+
+            Outputs:
+                load_mapping: Dictionary with entries 'weights', 'load_IDs' and 'bus_IDs' 
+        """
+
+        file_key = get_file_key(filename_load_mapping)
+        if file_key not in self._load_mappings:
+            self._load_mappings[file_key] = read_load_mapping(filename_load_mapping)
+
+        return self._load_mappings[file_key]
+
+
     def map_rel_load_profiles(self, filename_load_mapping, repr_days=[29*2+1] ):
         """ 
         Return relative load profiles mapped to existing and new load points in the network
 
             Inputs:
-                filename_load: Full path to load demand data file 
-                filename_scenario: Full path to file name defining load-development scenario
                 filename_load_mapping: Full path to file defining how load profiles are mapped onto buses of the grid model
+                    (see read_load_mapping)
                 repr_days: List with indices of the days of the year to extract load profiles for (1-indexed);
                     (optional; default: 28 February)
 
@@ -108,23 +1057,38 @@ class load_profiles(object):
                     representative days; indices are time steps in days and columns are bus IDs
         """
 
-        # Read load profiles (for representative days)
-        profile_repr_days = self.get_profile_days(repr_days)    
-
-        # Read mapping between load IDs in the load data and bus IDs in the network    
-        mapping_load_to_bus = pd.read_csv(filename_load_mapping, sep = ';')
-        load_IDs = mapping_load_to_bus['time_series_ID'].to_list()
-        bus_IDs = mapping_load_to_bus['bus_i'].to_list()
+        # Mapping between load IDs in the load data and bus IDs in the network    
+        load_mapping = self.get_load_mapping(filename_load_mapping)
 
-        # Mapped relative load profiles for existing loads in the network
-        mapped_load_profiles = profile_repr_days.loc[:,load_IDs]
+        # Relative load profiles (for representative days) for the mapped load IDs
+        profile_repr_days = self.get_profile_days(repr_days, as_array = True, load_IDs = load_mapping['load_IDs'])
 
-        # Identifying the profiles with bus in the network rather than load ID in the load data set
-        mapped_load_profiles.columns = bus_IDs
+        # Mapped relative load profiles for existing loads in the network, identifying the profiles 
+        # with bus in the network rather than load ID in the load data set
+        mapped_load_profiles = pd.DataFrame(np.asarray(profile_repr_days @ load_mapping['weights']), 
+            columns = load_mapping['bus_IDs'])
 
         return mapped_load_profiles
 
 
+    def get_mapped_load(self, net, filename_load_mapping, column='p_mw'):
+        """ 
+        Return load time series in absolute values (e.g. MW) for the loads of a network, evaluated 
+        lazily for the time steps and buses that are requested (see class mapped_load)
+
+            Inputs:
+                net: pandapower network with loads indexed by bus ID (as set up by pandapower_read_csv)
+                filename_load_mapping: Full path to file defining how load profiles are mapped onto buses of the grid model
+                column: Column of net.load with the peak load values to scale the relative load 
+                    profiles by (optional; default: 'p_mw')
+
+            Outputs:
+                load_mapped: mapped_load object
+        """
+
+        return mapped_load(self, net, filename_load_mapping, column = column)
+
+
     def map_cs_load_profiles(self,mapped_load_profiles,filename_scenario,filename_load_profiles_cs=None,n_days=1):
         """ Add relative load profiles for charging stations to existing mapping of profiles to grid model
 
@@ -173,23 +1137,29 @@ class load_profiles(object):
                 profile_cs: Relative load profiles (unitless) for a specified charging stations
         """
 
-        # Read load profiles from file 
-        profile_cs_in = pd.read_csv(filename_full_cs_load, sep=';')    
-        if profile_cs_in.shape[0] != 24:
-            print('Error: Relative load profile inputs for charging stations need to include a full day (24 hours)')
-            exit()
+        # Read load profiles from file (or from the library of load profiles already read)
+        file_key = get_file_key(filename_full_cs_load)
+        if file_key not in self._cs_profile_library:
+            profile_cs_in = pd.read_csv(filename_full_cs_load, sep=';')    
+            if profile_cs_in.shape[0] != 24:
+                print('Error: Relative load profile inputs for charging stations need to include a full day (24 hours)')
+                exit()
 
-        # We let the hours be zero-indexed
-        profile_cs_in.drop('hour',axis=1, inplace=True)
+            # We let the hours be zero-indexed
+            profile_cs_in.drop('hour',axis=1, inplace=True)
 
-        # Duplicate profiles to cover n_days full days
-        profile_cs = profile_cs_in.copy()
-        for day in range(n_days-1):
-            profile_cs = profile_cs.append(profile_cs_in,ignore_index = True)
+            self._cs_profile_library[file_key] = profile_cs_in
+        profile_cs_in = self._cs_profile_library[file_key]
 
         # Extract only specified set of load profiles
         if labels is not None:
-            profile_cs = profile_cs[labels]
+            profile_cs_in = profile_cs_in[labels]
+
+        # Duplicate profiles to cover n_days full days (repeating each hour for sub-hourly time resolution)
+        values_cs = profile_cs_in.to_numpy()
+        if self.time_steps_per_hour > 1:
+            values_cs = np.repeat(values_cs, int(self.time_steps_per_hour), axis=0)
+        profile_cs = pd.DataFrame(np.tile(values_cs, (n_days, 1)), columns = profile_cs_in.columns)
 
         return profile_cs
 
@@ -209,6 +1179,12 @@ class load_profiles(object):
                     charging station loads (strings)
         """
 
+        # Reuse the result if the scenario file has already been read
+        file_key = get_file_key(filename_fullpath_scenario)
+        if file_key in self._cs_scenarios:
+            bus_IDs_new_cs_loads, labels_cs_profiles = self._cs_scenarios[file_key]
+            return list(bus_IDs_new_cs_loads), list(labels_cs_profiles)
+
         # Read load scenario with new loads (assumed to be at buses which currently have no existing load points)
         file_path_split = os.path.split(filename_fullpath_scenario)
         scen_folder = file_path_split[0]
@@ -228,5 +1204,118 @@ class load_profiles(object):
             # Bus numbers and load profile labels for new charging station loads
             bus_IDs_new_cs_loads = list(scen_cs_loads['bus_i'].unique())
             labels_cs_profiles = list(scen_cs_loads['label'])
+
+            self._cs_scenarios[file_key] = (bus_IDs_new_cs_loads, labels_cs_profiles)
         
-            return bus_IDs_new_cs_loads, labels_cs_profiles
\ No newline at end of file
+            return list(bus_IDs_new_cs_loads), list(labels_cs_profiles)
+
+
+class mapped_load(object):
+    """ Load time series in absolute values for the loads of a pandapower network, obtained by 
+        scaling relative load profiles mapped to the buses by the peak load of each load. Values 
+        are only computed for the time steps and buses that are requested, and buses in the load 
+        mapping that have no load in the network (e.g. potential new loads) are left out. 
+    """
+
+    def __init__(self, load_profiles, net, filename_load_mapping, column='p_mw'):
+        """
+        Inputs:
+            load_profiles: load_profiles object
+            net: pandapower network with loads indexed by bus ID (as set up by pandapower_read_csv);
+                the peak load values are read from net.load when the load time series are evaluated, 
+                so that later changes to the loads are taken into account
+            filename_load_mapping: Full path to file defining how load profiles are mapped onto buses of the grid model
+            column: Column of net.load with the peak load values (optional; default: 'p_mw')
+        """
+
+        load_mapping = load_profiles.get_load_mapping(filename_load_mapping)
+
+        self.load_profiles = load_profiles
+        self.net = net
+        self.column = column
+        self.load_IDs = np.asarray(load_mapping['load_IDs'])
+        self.bus_IDs_mapping = pd.Index(data = load_mapping['bus_IDs'])
+        self.weights = load_mapping['weights'].tocsc()
+
+
+    @property
+    def bus_IDs(self):
+        """ Bus IDs of the mapped buses that have a load in the network """
+
+        return self.bus_IDs_mapping[self.bus_IDs_mapping.isin(self.net.load.index)]
+
+
+    def _get_bus_selection(self, bus_IDs=None):
+        """ Return bus IDs, peak load values, load IDs and weight matrix (load IDs × bus IDs) for 
+            a subset of the mapped buses with loads in the network
+        """
+
+        if bus_IDs is None:
+            bus_IDs = self.bus_IDs
+        else:
+            bus_IDs = pd.Index(data = bus_IDs)
+            I_unmapped = ~bus_IDs.isin(self.bus_IDs)
+            if I_unmapped.any():
+                raise KeyError('Buses without mapped load profile or load in the network: ' + str(bus_IDs[I_unmapped].tolist()))
+
+        load_max = self.net.load.loc[bus_IDs, self.column].to_numpy(dtype=np.float64)
+
+        # Only the load IDs that are mapped to the selected buses need to be read
+        weights = self.weights[:, self.bus_IDs_mapping.get_indexer(bus_IDs)]
+        i_load_IDs = np.unique(weights.indices)
+        weights = weights[i_load_IDs, :]
+
+        return bus_IDs, load_max, self.load_IDs[i_load_IDs], weights
+
+
+    def _get_index(self, time_steps):
+        """ Return (0-indexed) time step index for a slice or array of time steps """
+
+        return pd.Index(data = np.arange(len(self.load_profiles.loaddata.index))[time_steps])
+
+
+    def get_load(self, time_steps=slice(None), bus_IDs=None):
+        """
+        Get load time series in absolute values for a subset of time steps and buses
+
+        Inputs:
+            time_steps: Slice or array with positional (0-indexed) indices of time steps, e.g. 
+                as returned by load_profiles.get_time_steps_days (optional; default: all time steps)
+            bus_IDs: List of bus IDs (optional; default: all mapped buses with loads in the network)
+
+        Outputs:
+            load_time_series: DataFrame with load time series (e.g. in MW); indices are time steps 
+                (0-indexed) and columns are bus IDs
+        """
+
+        bus_IDs, load_max, load_IDs, weights = self._get_bus_selection(bus_IDs)
+        profiles = self.load_profiles.get_rel_values(time_steps, load_IDs)
+        values = np.asarray(profiles @ weights) * load_max
+
+        load_time_series = pd.DataFrame(values, index = self._get_index(time_steps), columns = bus_IDs)
+
+        return load_time_series
+
+
+    def get_sum(self, time_steps=slice(None), bus_IDs=None):
+        """
+        Get the sum of the load time series of a subset of buses (e.g. the buses of a feeder), 
+        without evaluating the load time series of the individual buses
+
+        Inputs:
+            time_steps: Slice or array with positional (0-indexed) indices of time steps 
+                (optional; default: all time steps)
+            bus_IDs: List of bus IDs (optional; default: all mapped buses with loads in the network)
+
+        Outputs:
+            load_sum: Series with aggregated load time series (e.g. in MW); indices are 
+                time steps (0-indexed)
+        """
+
+        bus_IDs, load_max, load_IDs, weights = self._get_bus_selection(bus_IDs)
+        profiles = self.load_profiles.get_rel_values(time_steps, load_IDs)
+        values = profiles @ (weights @ load_max)
+
+        load_sum = pd.Series(values, index = self._get_index(time_steps))
+
+        return load_sum
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for sensitivities of bus voltages and line loadings to the load demand at each bus,
+for fast (linearized) what-if analyses of load changes in radial grids such as the CINELDI
+MV reference grid.
+"""
+
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+import hashlib
+import radial_power_flow as rpf
+
+# Maximum number of sets of sensitivities kept in the cache of get_load_sensitivity
+CACHE_SIZE = 16
+
+# Columns of the network tables that define the topology and the base loads of the network
+TOPOLOGY_COLUMNS = {'bus': ['vn_kv','in_service'],
+    'line': ['from_bus','to_bus','length_km','r_ohm_per_km','x_ohm_per_km','c_nf_per_km','max_i_ka','df','parallel','in_service'],
+    'ext_grid': ['bus','vm_pu','va_degree','in_service']}
+LOAD_COLUMNS = {'load': ['bus','p_mw','q_mvar','scaling','in_service'],
+    'sgen': ['bus','p_mw','q_mvar','scaling','in_service']}
+
+# Cache of sensitivities with keys as returned by get_network_key
+_sensitivity_cache = {}
+
+
+def get_network_key(net):
+    """ Get keys identifying the topology and the base loads of a pandapower network
+
+        Inputs:
+            net: pandapower network
+
+        Outputs:
+            topology_key: Hash of the buses, lines and external grid connection of the network
+            load_key: Hash of the loads and static generators of the network
+    """
+
+    keys = []
+    for columns in [TOPOLOGY_COLUMNS, LOAD_COLUMNS]:
+        h = hashlib.sha1()
+        for table, cols in columns.items():
+            h.update(table.encode())
+            h.update(pd.util.hash_pandas_object(net[table][cols], index=True).to_numpy().tobytes())
+        keys.append(h.hexdigest())
+    if 'sn_mva' in net:
+        keys[0] = hashlib.sha1((keys[0] + str(net.sn_mva) + str(net.f_hz)).encode()).hexdigest()
+
+    return keys[0], keys[1]
+
+
+def get_load_sensitivity(net):
+    """ Get the sensitivities of bus voltages and line loadings for a network, computing them
+        only if the topology or the base loads of the network have changed since they were
+        last computed for a network
+
+        Inputs:
+            net: pandapower network (as set up by pandapower_read_csv)
+
+        Outputs:
+            sens: load_sensitivity object for the current operating point of the network
+    """
+
+    key = get_network_key(net)
+    if key in _sensitivity_cache:
+        sens = _sensitivity_cache.pop(key)
+    else:
+        sens = load_sensitivity(net)
+    _sensitivity_cache[key] = sens
+
+    # Keep the most recently used sensitivities only
+    while len(_sensitivity_cache) > CACHE_SIZE:
+        del _sensitivity_cache[next(iter(_sensitivity_cache))]
+
+    return sens
+
+
+class load_sensitivity(object):
+    """ Sensitivities of bus voltage magnitudes and line loadings to the active and reactive
+        power demand at each bus, linearized around the operating point given by the current
+        loads of a radial pandapower network. The sensitivities are obtained from the power
+        flow Jacobian matrix at the operating point, solved by radial_power_flow.
+    """
+
+    def __init__(self, net):
+        """
+        Solve the power flow for the operating point and calculate the sensitivities
+
+        Inputs:
+            net: pandapower network (as set up by pandapower_read_csv)
+        """
+
+        model = rpf.radial_power_flow(net)
+        p_mw, q_mvar = model.get_bus_injections()
+        V, converged, n_iterations = model.solve(p_mw, q_mvar)
+        if not converged.all():
+            raise ValueError('The power flow for the operating point did not converge')
+        V = V[0]
+
+        n_bus = len(model.bus_IDs)
+        n_line = len(model.line_IDs)
+
+        # Bus admittance matrix of the lines (pi model)
+        A = sp.csr_matrix((np.r_[np.ones(n_line), -np.ones(n_line)], (np.r_[np.arange(n_line), np.arange(n_line)],
+            np.r_[model.f_bus, model.t_bus])), shape = (n_line, n_bus))
+        Ybus = (A.T @ sp.diags(1 / model.z_branch) @ A + sp.diags(model.y_sh_bus)).toarray()
+
+        # Derivatives of the complex power injections with respect to voltage angles and magnitudes
+        i_bus = np.flatnonzero(model.supplied & (np.arange(n_bus) != model.i_root))
+        V_s = np.where(model.supplied, V, 0)
+        I_bus = Ybus @ V_s
+        V_norm = np.where(model.supplied, V_s / np.abs(np.where(model.supplied, V, 1)), 0)
+        dS_dVa = 1j * np.diag(V_s) @ np.conj(np.diag(I_bus) - Ybus * V_s)
+        dS_dVm = np.diag(V_s) @ np.conj(Ybus * V_norm) + np.diag(np.conj(I_bus) * V_norm)
+        dS_dVa = dS_dVa[np.ix_(i_bus, i_bus)]
+        dS_dVm = dS_dVm[np.ix_(i_bus, i_bus)]
+        jacobian = np.block([[dS_dVa.real, dS_dVm.real], [dS_dVa.imag, dS_dVm.imag]])
+
+        # Sensitivities of voltage angles (rad) and magnitudes (p.u.) to demand (MW or Mvar),
+        # which is negative injection
+        n = len(i_bus)
+        M = -np.linalg.inv(jacobian) / model.sn_mva
+        dva_dp = np.zeros((n_bus, n_bus))
+        dva_dq = np.zeros((n_bus, n_bus))
+        dvm_dp = np.zeros((n_bus, n_bus))
+        dvm_dq = np.zeros((n_bus, n_bus))
+        dva_dp[np.ix_(i_bus, i_bus)] = M[:n, :n]
+        dva_dq[np.ix_(i_bus, i_bus)] = M[:n, n:]
+        dvm_dp[np.ix_(i_bus, i_bus)] = M[n:, :n]
+        dvm_dq[np.ix_(i_bus, i_bus)] = M[n:, n:]
+        dvm_dp[~model.supplied] = np.nan
+        dvm_dq[~model.supplied] = np.nan
+
+        # Sensitivities of the line currents at the end of each line with the highest current
+        I_series = (V[model.f_bus] - V[model.t_bus]) / model.z_branch
+        I_f = I_series + V[model.f_bus] * model.y_sh_half
+        I_t = -I_series + V[model.t_bus] * model.y_sh_half
+        from_side = np.abs(I_f) >= np.abs(I_t)
+        I_line = np.where(from_side, I_f, I_t)
+        dloading = []
+        for dva, dvm in [(dva_dp, dvm_dp), (dva_dq, dvm_dq)]:
+            dV = V_s[:, None] * (1j * dva + np.nan_to_num(dvm) / np.where(model.supplied, np.abs(V_s), 1)[:, None])
+            dI_series = (dV[model.f_bus] - dV[model.t_bus]) / model.z_branch[:, None]
+            dI_f = dI_series + dV[model.f_bus] * model.y_sh_half[:, None]
+            dI_t = -dI_series + dV[model.t_bus] * model.y_sh_half[:, None]
+            dI = np.where(from_side[:, None], dI_f, dI_t)
+            di_ka = np.real(np.conj(I_line)[:, None] * dI) / np.abs(I_line)[:, None] * model.i_base_ka[:, None]
+            dloading.append(di_ka / model.max_i_ka[:, None] * 100)
+
+        results = model.get_results(V[None, :])
+
+        self.model = model
+        self.bus_IDs = model.bus_IDs
+        self.line_IDs = model.line_IDs
+        self.p_mw = p_mw[0]
+        self.q_mvar = q_mvar[0]
+        self.V = V
+        self.vm_pu = results['res_bus']['vm_pu'].to_numpy()[0]
+        self.loading_percent = results['res_line']['loading_percent'].to_numpy()[0]
+        self.dvm_dp = dvm_dp
+        self.dvm_dq = dvm_dq
+        self.dloading_dp = dloading[0]
+        self.dloading_dq = dloading[1]
+
+
+    def predict(self, delta_p_mw, delta_q_mvar=None):
+        """
+        Predict bus voltages and line loadings for changes in the demand at each bus
+        by the linearized model
+
+        Inputs:
+            delta_p_mw: Array (buses, or operating states × buses) with the change in active power demand (MW)
+            delta_q_mvar: Array (same shape) with the change in reactive power demand (Mvar)
+                (optional; default: no change)
+
+        Outputs:
+            vm_pu: Array (operating states × buses) with predicted bus voltage magnitudes (p.u.)
+            loading_percent: Array (operating states × lines) with predicted line loadings (%)
+        """
+
+        delta_p_mw = np.atleast_2d(delta_p_mw)
+        vm_pu = self.vm_pu + delta_p_mw @ self.dvm_dp.T
+        loading_percent = self.loading_percent + delta_p_mw @ self.dloading_dp.T
+        if delta_q_mvar is not None:
+            delta_q_mvar = np.atleast_2d(delta_q_mvar)
+            vm_pu += delta_q_mvar @ self.dvm_dq.T
+            loading_percent += delta_q_mvar @ self.dloading_dq.T
+
+        return vm_pu, loading_percent
+
+
+    def solve(self, delta_p_mw, delta_q_mvar=None):
+        """
+        Solve the power flow exactly for changes in the demand at each bus (same inputs and
+        outputs as predict)
+        """
+
+        delta_p_mw = np.atleast_2d(delta_p_mw)
+        if delta_q_mvar is None:
+            delta_q_mvar = np.zeros(delta_p_mw.shape)
+        V, converged, n_iterations = self.model.solve(self.p_mw + delta_p_mw, self.q_mvar + np.atleast_2d(delta_q_mvar),
+            v_init = np.tile(self.V, (delta_p_mw.shape[0], 1)))
+        results = self.model.get_results(V)
+        vm_pu = results['res_bus']['vm_pu'].to_numpy()
+        loading_percent = results['res_line']['loading_percent'].to_numpy()
+        vm_pu[~converged] = np.nan
+        loading_percent[~converged] = np.nan
+
+        return vm_pu, loading_percent
+
+
+    def scale_loads(self, bus_IDs, scaling_factors, scale_q=True, bus_IDs_voltage=None, min_vm_pu=None,
+        max_loading_percent=None, exact='boundary'):
+        """
+        What-if analysis of scaling the demand at a set of buses by a range of scaling factors
+
+        Inputs:
+            bus_IDs: List of IDs of the buses where the demand is scaled
+            scaling_factors: List of scaling factors (relative to the demand at the operating point)
+            scale_q: True to scale the reactive power demand as well (optional; default: True)
+            bus_IDs_voltage: List of IDs of buses to consider for the lowest voltage
+                (optional; default: all buses)
+            min_vm_pu: Lower voltage limit (p.u.) (optional)
+            max_loading_percent: Upper line loading limit (%) (optional)
+            exact: 'none' to use the linearized model only, 'boundary' to solve the power flow
+                exactly for the scaling factors next to where a limit is first violated, or 'all'
+                to solve it exactly for all scaling factors (optional; default: 'boundary')
+
+        Outputs:
+            results: DataFrame with one row per scaling factor and columns 'p_mw' (aggregated
+                demand at the scaled buses), 'min_vm_pu', 'max_loading_percent', 'exact' (True
+                if the row is from an exact power flow solution) and 'violation' (True if a
+                limit is violated)
+        """
+
+        i_bus = self.bus_IDs.get_indexer(bus_IDs)
+        if (i_bus < 0).any():
+            raise KeyError('Buses not in network: ' + str(list(np.asarray(bus_IDs)[i_bus < 0])))
+        if bus_IDs_voltage is None:
+            i_bus_voltage = slice(None)
+        else:
+            i_bus_voltage = self.bus_IDs.get_indexer(bus_IDs_voltage)
+
+        scaling_factors = np.asarray(scaling_factors, dtype=np.float64)
+        delta_p_mw = np.zeros((len(scaling_factors), len(self.bus_IDs)))
+        delta_q_mvar = np.zeros((len(scaling_factors), len(self.bus_IDs)))
+        delta_p_mw[:, i_bus] = (scaling_factors[:, None] - 1) * self.p_mw[i_bus]
+        if scale_q:
+            delta_q_mvar[:, i_bus] = (scaling_factors[:, None] - 1) * self.q_mvar[i_bus]
+
+        vm_pu, loading_percent = self.predict(delta_p_mw, delta_q_mvar)
+        I_exact = np.zeros(len(scaling_factors), dtype=bool)
+
+        def get_violation(vm_pu, loading_percent):
+            violation = np.zeros(vm_pu.shape[0], dtype=bool)
+            if min_vm_pu is not None:
+                violation |= np.nanmin(vm_pu[:, i_bus_voltage], axis=1) < min_vm_pu
+            if max_loading_percent is not None:
+                violation |= np.nanmax(loading_percent, axis=1) > max_loading_percent
+            return violation
+
+        if exact == 'all':
+            I_exact[:] = True
+        elif exact == 'boundary':
+            # Solve exactly for the scaling factors around the first predicted violation, and
+            # move on if the exact solution moves the boundary
+            order = np.argsort(scaling_factors)
+            violation = get_violation(vm_pu, loading_percent)[order]
+            while violation.any():
+                k = np.argmax(violation)
+                I_new = np.zeros(len(scaling_factors), dtype=bool)
+                I_new[order[max(k-1, 0):k+1]] = True
+                I_new &= ~I_exact
+                if not I_new.any():
+                    break
+                vm_pu[I_new], loading_percent[I_new] = self.solve(delta_p_mw[I_new], delta_q_mvar[I_new])
+                I_exact |= I_new
+                violation = get_violation(vm_pu, loading_percent)[order]
+        elif exact != 'none':
+            raise ValueError('Unknown value of argument exact: ' + str(exact))
+
+        if exact == 'all':
+            vm_pu, loading_percent = self.solve(delta_p_mw, delta_q_mvar)
+
+        results = pd.DataFrame(index = pd.Index(scaling_factors, name='scaling_factor'), data = {
+            'p_mw': (self.p_mw[i_bus] + delta_p_mw[:, i_bus]).sum(axis=1),
+            'min_vm_pu': np.nanmin(vm_pu[:, i_bus_voltage], axis=1),
+            'max_loading_percent': np.nanmax(loading_percent, axis=1),
+            'exact': I_exact,
+            'violation': get_violation(vm_pu, loading_percent)})
+
+        return results
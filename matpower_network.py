@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for a lightweight network model of grids on the MATPOWER format such as the CINELDI MV
+reference grid, holding the bus and branch data as NumPy arrays together with the admittance
+and incidence matrices, for analyses that do not need a full pandapower network.
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import scipy.sparse as sp
+import grid_data_schema as gs
+import pandapower_read_csv as ppcsv
+
+# Columns of the bus and branch data arrays (as in the current version of the grid data files),
+# with the default values used for columns that are not in the grid data files
+BUS_COLUMNS = {'bus_i': np.nan, 'type': 1, 'Pd': 0, 'Qd': 0, 'Gs': 0, 'Bs': 0, 'area': 1, 'Vm': 1.0, 'Va': 0.0,
+    'base_kV': np.nan, 'zone': 1, 'Vmax': 1.1, 'Vmin': 0.9}
+BRANCH_COLUMNS = {'f_bus': np.nan, 't_bus': np.nan, 'br_r': np.nan, 'br_x': np.nan, 'br_b': 0, 'rate_A': 0,
+    'rate_B': 0, 'rate_C': 0, 'tap': 0, 'shift': 0, 'br_status': 1, 'angmin': -360, 'angmax': 360}
+
+# Column indices of the bus and branch data arrays
+BUS_INDEX = {col: i for i, col in enumerate(BUS_COLUMNS)}
+BRANCH_INDEX = {col: i for i, col in enumerate(BRANCH_COLUMNS)}
+
+# Translation of column names of the previous version of the grid data files that differ from
+# the current version also after translation by grid_data_schema
+COLUMN_ALIASES = {'bus_type': 'type', 'bus_area': 'area'}
+
+
+def get_data_array(df, columns):
+    """ Get a contiguous 2D array (rows × columns) with the given columns of a DataFrame, using the
+        default value of each column that is not in the DataFrame
+
+        Inputs:
+            df: DataFrame with bus or branch data
+            columns: Dictionary with column names as keys and default values as values
+                (BUS_COLUMNS or BRANCH_COLUMNS)
+
+        Outputs:
+            data: 2D float64 array with the data
+    """
+
+    df = df.rename(columns = COLUMN_ALIASES)
+    data = np.empty((len(df.index), len(columns)))
+    for i, (col, default) in enumerate(columns.items()):
+        if col in df.columns:
+            data[:, i] = df[col].to_numpy(dtype=np.float64)
+        elif np.isnan(default):
+            raise KeyError('Column ' + col + ' is missing in the grid data')
+        else:
+            data[:, i] = default
+
+    return data
+
+
+class matpower_network(object):
+    """ Lightweight network model with bus and branch data as contiguous NumPy arrays on the
+        MATPOWER format (in the column order of BUS_COLUMNS and BRANCH_COLUMNS), lookup of the
+        position of each bus ID, and the incidence and bus admittance matrices (which are set up
+        when first requested). Only the arrays are included when the object is pickled, e.g.
+        when it is sent to worker processes.
+    """
+
+    def __init__(self, bus, branch, baseMVA=10, branch_extra=None):
+        """
+        Set up the network model from bus and branch data
+
+        Inputs:
+            bus: DataFrame with bus data (with the column names of the current version of the
+                grid data files) or 2D array with columns as in BUS_COLUMNS
+            branch: DataFrame with branch data (with the column names of the current version of
+                the grid data files) or 2D array with columns as in BRANCH_COLUMNS
+            baseMVA: Base apparent power value of the per-unit branch data (optional; default: 10 MVA)
+            branch_extra: DataFrame with extra branch data (optional; default: None)
+        """
+
+        if isinstance(bus, pd.DataFrame):
+            bus = get_data_array(bus, BUS_COLUMNS)
+        if isinstance(branch, pd.DataFrame):
+            branch = get_data_array(branch, BRANCH_COLUMNS)
+        bus = np.ascontiguousarray(bus, dtype=np.float64)
+        branch = np.ascontiguousarray(branch, dtype=np.float64)
+        if bus.shape[1] != len(BUS_COLUMNS) or branch.shape[1] != len(BRANCH_COLUMNS):
+            raise ValueError('The bus and branch data must have ' + str(len(BUS_COLUMNS)) + ' and '
+                + str(len(BRANCH_COLUMNS)) + ' columns, respectively')
+
+        # Lookup of the position of each bus ID
+        bus_IDs = bus[:, BUS_INDEX['bus_i']].astype(np.int64)
+        if len(np.unique(bus_IDs)) < len(bus_IDs):
+            raise ValueError('Bus IDs must be unique')
+        bus_position = np.full(bus_IDs.max(initial=-1) + 2, -1, dtype=np.int64)
+        bus_position[bus_IDs] = np.arange(len(bus_IDs))
+
+        self.baseMVA = baseMVA
+        self.bus = bus
+        self.branch = branch
+        self.branch_extra = branch_extra
+        self.bus_IDs = bus_IDs
+        self.bus_position = bus_position
+        self.n_bus = len(bus_IDs)
+        self.n_branch = branch.shape[0]
+        self.f_bus = self.get_bus_positions(branch[:, BRANCH_INDEX['f_bus']].astype(np.int64))
+        self.t_bus = self.get_bus_positions(branch[:, BRANCH_INDEX['t_bus']].astype(np.int64))
+        self.in_service = branch[:, BRANCH_INDEX['br_status']] != 0
+        self._matrices = {}
+
+
+    def __getstate__(self):
+        """ Pickle the arrays only (the matrices are set up again when requested) """
+
+        state = self.__dict__.copy()
+        state['_matrices'] = {}
+
+        return state
+
+
+    def get_bus_positions(self, bus_IDs):
+        """
+        Get the positions of buses in the bus data array
+
+        Inputs:
+            bus_IDs: Bus ID or array of bus IDs
+
+        Outputs:
+            positions: Position or array of positions of the buses
+        """
+
+        bus_IDs = np.asarray(bus_IDs, dtype=np.int64)
+        valid = (bus_IDs >= 0) & (bus_IDs < len(self.bus_position))
+        positions = np.where(valid, self.bus_position[np.where(valid, bus_IDs, -1)], -1)
+        if (positions < 0).any():
+            raise KeyError('Bus IDs not in network: ' + str(list(np.atleast_1d(bus_IDs)[np.atleast_1d(positions) < 0])))
+
+        return positions if positions.ndim > 0 else int(positions)
+
+
+    def get_bus_column(self, col):
+        """ Get a column of the bus data array (as a view) by its name in BUS_COLUMNS """
+
+        return self.bus[:, BUS_INDEX[col]]
+
+
+    def get_branch_column(self, col):
+        """ Get a column of the branch data array (as a view) by its name in BRANCH_COLUMNS """
+
+        return self.branch[:, BRANCH_INDEX[col]]
+
+
+    def get_incidence_matrix(self):
+        """
+        Get the branch-bus incidence matrix (branches × buses) of all branches, with element (k,i)
+        equal to 1 if bus i is the from bus of branch k and -1 if it is the to bus
+
+        Outputs:
+            C: Sparse incidence matrix
+        """
+
+        if 'C' not in self._matrices:
+            Cf, Ct = self.get_connection_matrices()
+            self._matrices['C'] = (Cf - Ct).tocsr()
+
+        return self._matrices['C']
+
+
+    def get_connection_matrices(self):
+        """
+        Get the connection matrices (branches × buses) for the from buses and the to buses of
+        all branches
+
+        Outputs:
+            Cf, Ct: Sparse connection matrices with element (k,i) equal to 1 if bus i is the from
+                bus (Cf) or the to bus (Ct) of branch k
+        """
+
+        if 'Cf' not in self._matrices:
+            i_branch = np.arange(self.n_branch)
+            ones = np.ones(self.n_branch)
+            self._matrices['Cf'] = sp.csr_matrix((ones, (i_branch, self.f_bus)), shape = (self.n_branch, self.n_bus))
+            self._matrices['Ct'] = sp.csr_matrix((ones, (i_branch, self.t_bus)), shape = (self.n_branch, self.n_bus))
+
+        return self._matrices['Cf'], self._matrices['Ct']
+
+
+    def get_Ybus(self):
+        """
+        Get the bus admittance matrix (p.u.) of the in-service branches (pi model with off-nominal
+        tap ratio and phase shift) and the bus shunts, in the same way as MATPOWER (makeYbus)
+
+        Outputs:
+            Ybus: Sparse bus admittance matrix (buses × buses)
+            Yf, Yt: Sparse branch admittance matrices (branches × buses) giving the branch
+                currents at the from and to ends of each branch from the bus voltages
+        """
+
+        if 'Ybus' not in self._matrices:
+            br_r = self.get_branch_column('br_r')
+            br_x = self.get_branch_column('br_x')
+            br_b = self.get_branch_column('br_b')
+            tap = self.get_branch_column('tap')
+
+            Ys = self.in_service / (br_r + 1j*br_x)
+            Bc = self.in_service * br_b
+            tap = np.where(tap == 0, 1.0, tap) * np.exp(1j*np.deg2rad(self.get_branch_column('shift')))
+            Ytt = Ys + 1j*Bc/2
+            Yff = Ytt / (tap * np.conj(tap))
+            Yft = -Ys / np.conj(tap)
+            Ytf = -Ys / tap
+            Ysh = (self.get_bus_column('Gs') + 1j*self.get_bus_column('Bs')) / self.baseMVA
+
+            Cf, Ct = self.get_connection_matrices()
+            Yf = (sp.diags(Yff) @ Cf + sp.diags(Yft) @ Ct).tocsr()
+            Yt = (sp.diags(Ytf) @ Cf + sp.diags(Ytt) @ Ct).tocsr()
+            Ybus = (Cf.T @ Yf + Ct.T @ Yt + sp.diags(Ysh)).tocsr()
+            self._matrices.update({'Ybus': Ybus, 'Yf': Yf, 'Yt': Yt})
+
+        return self._matrices['Ybus'], self._matrices['Yf'], self._matrices['Yt']
+
+
+    def to_pandapower(self):
+        """
+        Set up a pandapower network for the network model (as read_net_from_csv in pandapower_read_csv)
+
+        Outputs:
+            net: pandapower net DataFrame for network
+        """
+
+        bus = pd.DataFrame(self.bus, columns = list(BUS_COLUMNS))
+        branch = pd.DataFrame(self.branch, columns = list(BRANCH_COLUMNS))
+        branch_extra = None if self.branch_extra is None else self.branch_extra.copy()
+
+        return ppcsv.create_net(bus, branch, self.baseMVA, branch_extra)
+
+
+def read_matpower_network_from_csv(folder, baseMVA=10, DiB_version=True):
+    """ Read network data from .csv files into a lightweight network model
+
+        Inputs:
+            folder: path of folder with grid data files
+            baseMVA: Base apparent power value of the per-unit branch data (optional; default: 10 MVA)
+            DiB_version: True if assuming files and file names as for data set published
+                in connection with Data in Brief (DiB) manuscript; False if assuming
+                previous version (until around August 2022)
+
+        Outputs:
+            network: matpower_network object for network
+    """
+
+    filename_bus, filename_branch, filename_branch_extra = ppcsv.get_grid_filenames(folder, DiB_version)
+
+    bus = gs.read_grid_table(filename_bus, 'bus')
+    # (there are some NaN rows in the .csv file that should be omitted)
+    bus = bus.loc[bus['bus_i'].notna()]
+    branch = gs.read_grid_table(filename_branch, 'branch')
+    branch_extra = None
+    if os.path.isfile(filename_branch_extra):
+        branch_extra = gs.read_grid_table(filename_branch_extra)
+
+    network = matpower_network(bus, branch, baseMVA, branch_extra)
+
+    return network
@@ -8,24 +8,48 @@ reference grid based on input .csv files on the MATPOWER format.
 """
 
 import pandas as pd
+import numpy as np
 import os
 import pandapower as pp
 import math
+import contextlib
+import grid_data_schema as gs
+import hashlib
+import pickle
 
+# Subfolder (of the folder of the grid data files) used for network cache files by default
+NET_CACHE_SUBFOLDER = '.net_cache'
 
-def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
-    """ Read network data from .csv file and convert to pandapower
+# Version of the network cache files (to be increased when read_net_from_csv is changed so that
+# cache files written by previous versions are not used)
+NET_CACHE_VERSION = 1
+
+# Pickled networks read by this process, with the cache file name as key
+_net_cache = {}
+
+# Columns of the network tables that are recorded by network snapshots (the mutable data of
+# the network that are typically changed when investigating variants of the network)
+SNAPSHOT_COLUMNS = {'bus': ['in_service'],
+    'load': ['p_mw','q_mvar','scaling','in_service'],
+    'sgen': ['p_mw','q_mvar','scaling','in_service'],
+    'line': ['length_km','r_ohm_per_km','x_ohm_per_km','c_nf_per_km','max_i_ka','parallel','in_service'],
+    'switch': ['closed'],
+    'ext_grid': ['vm_pu','va_degree','in_service']}
+
+
+def get_grid_filenames(folder, DiB_version=True):
+    """ Return full paths of the grid data files of the CINELDI reference grid
 
         Inputs:
             folder: path of folder with grid data files
-            baseMVA: Base apparent power value to use in the per-unit conversion 
-                (optional; default: 10 MVA)
-            DiB_version: True if assuming files and file names as for data set published 
-                in connection with Data in Brief (DiB) manuscript; False if assuming 
-                previous version (until around August 2022)
+            DiB_version: True for file names as for data set published in connection with
+                Data in Brief (DiB) manuscript; False for previous version (optional; default: True)
 
         Outputs:
-            net: pandapower net DataFrame for network            
+            filename_bus: Full path of bus data file
+            filename_branch: Full path of branch data file
+            filename_branch_extra: Full path of extra branch data file (which does not
+                necessarily exist)
     """
 
     # Hard coding file names for CINELDI reference grid data
@@ -33,23 +57,62 @@ def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
         filename_bus = 'CINELDI_MV_reference_grid_base_bus.csv'
         filename_branch = 'CINELDI_MV_reference_grid_base_branch.csv'
         filename_branch_extra = 'CINELDI_MV_reference_grid_base_branch_extra.csv'
-        filename_bus_extra = 'CINELDI_MV_reference_grid_base_bus_extra.csv'        
     else:
         filename_bus = 'Cineldi124Bus_Busdata.csv'
         filename_branch = 'Cineldi124Bus_Branch.csv'
         filename_branch_extra = 'Cineldi124Bus_Branch_extra.csv'
 
+    return (os.path.join(folder, filename_bus), os.path.join(folder, filename_branch),
+        os.path.join(folder, filename_branch_extra))
+
+
+def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
+    """ Read network data from .csv file and convert to pandapower
+
+        Inputs:
+            folder: path of folder with grid data files
+            baseMVA: Base apparent power value to use in the per-unit conversion 
+                (optional; default: 10 MVA)
+            DiB_version: True if assuming files and file names as for data set published 
+                in connection with Data in Brief (DiB) manuscript; False if assuming 
+                previous version (until around August 2022)
+
+        Outputs:
+            net: pandapower net DataFrame for network            
+    """
+
+    filename_bus_fullpath, filename_branch_fullpath, filename_branch_extra_fullpath = get_grid_filenames(folder, DiB_version)
+
     # Read files from .csv files
-    filename_bus_fullpath = os.path.join(folder, filename_bus)
-    filename_branch_fullpath = os.path.join(folder, filename_branch)    
-    bus = pd.read_csv(filename_bus_fullpath,sep=';')
-    branch = pd.read_csv(filename_branch_fullpath,sep=';')
+    # (with the decimal separator detected from each file and with the current column names)
+    bus = gs.read_grid_table(filename_bus_fullpath, 'bus')
+    branch = gs.read_grid_table(filename_branch_fullpath, 'branch')
 
     # Only try to read extra branch data if input file exists
-    filename_branch_extra_fullpath = os.path.join(folder, filename_branch_extra)
-    branch_extra_exists = os.path.isfile(filename_branch_extra_fullpath)
-    if branch_extra_exists:
-        branch_extra = pd.read_csv(filename_branch_extra_fullpath,sep=';')        
+    branch_extra = None
+    if os.path.isfile(filename_branch_extra_fullpath):
+        branch_extra = gs.read_grid_table(filename_branch_extra_fullpath)
+
+    net = create_net(bus, branch, baseMVA, branch_extra)
+
+    return net
+
+
+def create_net(bus, branch, baseMVA=10, branch_extra=None):
+    """ Set up pandapower network from bus and branch data on the MATPOWER format
+
+        Inputs:
+            bus: DataFrame with bus data (with the column names of the current version of
+                the grid data files)
+            branch: DataFrame with branch data (with the column names of the current version
+                of the grid data files)
+            baseMVA: Base apparent power value to use in the per-unit conversion
+                (optional; default: 10 MVA)
+            branch_extra: DataFrame with extra branch data (optional; default: None)
+
+        Outputs:
+            net: pandapower net DataFrame for network
+    """
 
     # Assuming the grid to be operated at frequency 50 Hz
     f_hz = 50.0
@@ -57,159 +120,283 @@ def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
     # Initialize pandapower network
     net = pp.create_empty_network(name='CINELDI_reference_grid', f_hz=f_hz, sn_mva=baseMVA, add_stdtypes=True)
 
-    # Initialize pandapower power flow results DataFrame
-    res_bus = pd.DataFrame(columns = ['vm_pu','va_degree','p_mw','q_mvar'])
+    # Bus data (without the NaN rows in the .csv file)
+    bus = bus.loc[bus['bus_i'].notna()]
+    bus_ID = bus['bus_i'].to_numpy().astype(int)
+    vn_kv = bus['base_kV'].to_numpy(dtype=np.float64)
+    zone = bus['zone'].to_numpy(dtype=np.float64)
+    Va_degrees = bus['Va'].to_numpy(dtype=np.float64)
+    Vm = bus['Vm'].to_numpy(dtype=np.float64)
+    max_vm_pu = bus['Vmax'].to_numpy(dtype=np.float64)
+    min_vm_pu = bus['Vmin'].to_numpy(dtype=np.float64)
+    Pd = bus['Pd'].to_numpy(dtype=np.float64)
+    Qd = bus['Qd'].to_numpy(dtype=np.float64)
 
-    if 'baseKV' in bus.columns:
-        s_base_kV = bus['baseKV']
-    else:
-        s_base_kV = bus['base_kV']
-
-    # Read bus and load data
-    for i_bus in bus.index:
-        
-        if 'ID' in bus.columns:
-            bus_ID = bus.loc[i_bus,'ID']
-        else:
-            bus_ID = bus.loc[i_bus,'bus_i']
-        
-        if not pd.isna(bus_ID):
-            # Read data from .csv file (but there are some NaN rows that should be omitted)
-
-            bus_name = int(bus_ID)
-            vn_kv = s_base_kV[i_bus]
-            bus_type = 'b'
-            zone = bus.loc[i_bus,'zone']
-            in_service = True
-            if 'Va - degr' in bus.columns:
-                Va_degrees  = bus.loc[i_bus,'Va - degr']
-            else:
-                Va_degrees  = bus.loc[i_bus,'Va']
-            Vm = bus.loc[i_bus,'Vm']
-            if 'max_Vm' in bus.columns:
-                max_vm_pu = bus.loc[i_bus,'max_Vm']
-            else:
-                max_vm_pu = bus.loc[i_bus,'Vmax']
-            if 'max_Vm' in bus.columns:
-                min_vm_pu = bus.loc[i_bus,'min_Vm']            
-            else:
-                min_vm_pu = bus.loc[i_bus,'Vmin']            
-            Pd = bus.loc[i_bus,'Pd']
-            Qd = bus.loc[i_bus,'Qd']
-
-            # Fix problem with decimal operators ',' used in the .csv file
-            if type(vn_kv) == str:
-                vn_kv = float(vn_kv.replace(',','.'))
-            if type(zone) == str:
-                zone = float(zone.replace(',','.'))
-            if type(max_vm_pu) == str:
-                max_vm_pu = float(max_vm_pu.replace(',','.'))
-            if type(min_vm_pu) == str:
-                min_vm_pu = float(min_vm_pu.replace(',','.'))
-            if type(Va_degrees) == str:
-                Va_degrees = float(Va_degrees.replace(',','.'))
-            if type(Vm) == str:
-                Vm = float(Vm.replace(',','.'))
-            if type(Pd) == str:
-                Pd = float(Pd.replace(',','.'))                
-            if type(Qd) == str:
-                Qd = float(Qd.replace(',','.'))     
-
-            # Adding bus  to network
-            pp.create_bus(net,index=bus_ID,name=bus_name,vn_kv=vn_kv,type=bus_type, zone=zone, in_service=in_service, max_vm_pu=max_vm_pu, min_vm_pu=min_vm_pu)
-
-            # Adding corresponding entry in results DataFrame
-            res_row = pd.DataFrame({'vm_pu': [Vm], 'va_degree': [Va_degrees], 'p_mw': [Pd], 'q_mvar': [Qd]}, index=[bus_ID])
-            res_bus = pd.concat([res_bus, res_row])
-
-            if Pd != 0 and Qd != 0:
-                # Adding load to network for this bus
-                # (NB: Now we use the bus number as name for the bus; 
-                # this assumes there will only be one load per bus, but that may change...)
-                pp.create_load(net,bus=bus_ID,name=bus_name,p_mw=Pd,q_mvar=Qd)
+    # Adding buses to network
+    pp.create_buses(net, len(bus_ID), index=bus_ID, name=bus_ID, vn_kv=vn_kv, type='b', zone=zone,
+        in_service=True, max_vm_pu=max_vm_pu, min_vm_pu=min_vm_pu)
+
+    # Adding loads to network for buses with load
+    # (NB: Now we use the bus number as name for the bus;
+    # this assumes there will only be one load per bus, but that may change...)
+    I_load = (Pd != 0) & (Qd != 0)
+    if I_load.any():
+        pp.create_loads(net, buses=bus_ID[I_load], name=bus_ID[I_load], p_mw=Pd[I_load], q_mvar=Qd[I_load])
 
     # Set the row indices for the load DataFrame to be the load names
     net.load.set_index('name',drop=False,inplace=True)
 
     # Add bus results DataFrame to network
-    net.res_bus = res_bus
+    net.res_bus = pd.DataFrame(index = bus_ID, data = {'vm_pu': Vm, 'va_degree': Va_degrees, 'p_mw': Pd, 'q_mvar': Qd})
 
     # Read line data (and we assume there are no transformers)
-    for i_branch in branch.index:
-        f_bus = branch.loc[i_branch,'f_bus']
-        t_bus = branch.loc[i_branch,'t_bus']
-        if 'r' in branch.columns:
-            r = branch.loc[i_branch,'r']
-        else:
-            r = branch.loc[i_branch,'br_r']
-        if 'x' in branch.columns:
-            x = branch.loc[i_branch,'x']
-        else:
-            x = branch.loc[i_branch,'br_x']
-        if 'b' in branch.columns:
-            b = branch.loc[i_branch,'b']
-        else:
-            b = branch.loc[i_branch,'br_b']        
-        if 'rateA' in branch.columns:
-            rateA = branch.loc[i_branch,'rateA']
-        else:
-            rateA = branch.loc[i_branch,'rate_A']
-        if 'rateB' in branch.columns:
-            rateB = branch.loc[i_branch,'rateB']
-        else:
-            rateB = branch.loc[i_branch,'rate_B']
-        if 'rateC' in branch.columns:
-            rateC = branch.loc[i_branch,'rateC']
-        else:
-            rateC = branch.loc[i_branch,'rate_C']
-        shift = branch.loc[i_branch,'shift']
-        br_status = branch.loc[i_branch,'br_status']
-
-        # Fix problem with decimal operators ',' used in the .csv file
-        if type(r) == str:
-            r = float(r.replace(',','.'))
-        if type(x) == str:
-            x = float(x.replace(',','.'))
-        if type(b) == str:
-            b = float(b.replace(',','.'))
-        if type(rateA) == str:
-            rateA = float(rateA.replace(',','.'))                
-        if type(rateB) == str:
-            rateB = float(rateB.replace(',','.'))   
-        if type(rateC) == str:
-            rateC = float(rateC.replace(',','.'))
-        if type(shift) == str:
-            shift = float(shift.replace(',','.'))   
-        if type(br_status) == str:
-            br_status = float(br_status.replace(',','.'))
-        
-        # Converting line rating to units kA from units MVA
-        base_kV = s_base_kV[f_bus]
-        max_i_ka = rateA / base_kV  / math.sqrt(3)
-
-        # Base impedance value (ohm)
-        Zni = base_kV**2/baseMVA  
-
-        # pandapower assumes impedance to be given in ohm per km and in addition specifies line length in km;
-        # we give impedances in ohm and set the length to 1
-        length_km = 1
-
-        # Converting from p.u. to ohm
-        r_ohm = r * Zni
-        x_ohm = x * Zni
-
-        # Converting charging susceptance from p.u. to ohm
-        omega = math.pi * f_hz  # 1/s
-        c_nf_per_km = b/Zni/omega*1e9/2
-
-        # Adding line to network
-        pp.create_line_from_parameters(net, from_bus=f_bus, to_bus=t_bus, length_km=length_km, r_ohm_per_km = r_ohm, x_ohm_per_km = x_ohm, c_nf_per_km = c_nf_per_km, max_i_ka = max_i_ka, in_service=br_status)
+    f_bus = branch['f_bus'].to_numpy().astype(int)
+    t_bus = branch['t_bus'].to_numpy().astype(int)
+    r = branch['br_r'].to_numpy(dtype=np.float64)
+    x = branch['br_x'].to_numpy(dtype=np.float64)
+    b = branch['br_b'].to_numpy(dtype=np.float64)
+    rateA = branch['rate_A'].to_numpy(dtype=np.float64)
+    br_status = branch['br_status'].to_numpy(dtype=np.float64)
+
+    # Converting line rating to units kA from units MVA (with the base voltage of the from bus)
+    base_kV = pd.Series(vn_kv, index = bus_ID).loc[f_bus].to_numpy()
+    max_i_ka = rateA / base_kV  / math.sqrt(3)
+
+    # Base impedance value (ohm)
+    Zni = base_kV**2/baseMVA
+
+    # pandapower assumes impedance to be given in ohm per km and in addition specifies line length in km;
+    # we give impedances in ohm and set the length to 1
+    length_km = 1
+
+    # Converting from p.u. to ohm
+    r_ohm = r * Zni
+    x_ohm = x * Zni
+
+    # Converting charging susceptance from p.u. to ohm
+    omega = math.pi * f_hz  # 1/s
+    c_nf_per_km = b/Zni/omega*1e9/2
+
+    # Adding lines to network
+    pp.create_lines_from_parameters(net, from_buses=f_bus, to_buses=t_bus, length_km=length_km, r_ohm_per_km = r_ohm,
+        x_ohm_per_km = x_ohm, c_nf_per_km = c_nf_per_km, max_i_ka = max_i_ka, in_service=br_status != 0)
 
     # Specify main feeder (MF) and point of common coupling to the external (HV) power grid
     bus_MF = 1
     pp.create_ext_grid(net, bus_MF)
   
-    if branch_extra_exists:
+    if branch_extra is not None:
         net.branch_extra = branch_extra
 
     return net
+
+
+def get_net_cache_filename(folder, baseMVA=10, DiB_version=True, cache_folder=None):
+    """ Return file name of the binary cache file for the network read from a folder with grid
+        data files. The file name depends on the contents of the grid data files and on the
+        arguments of read_net_from_csv, so that a changed grid data file is never matched with
+        an outdated cache file.
+
+        Inputs:
+            folder: path of folder with grid data files
+            baseMVA, DiB_version: Arguments of read_net_from_csv
+            cache_folder: Folder for cache files (optional; default: subfolder of folder)
+
+        Outputs:
+            cache_filename: Full path of the cache file (which does not necessarily exist)
+    """
+
+    folder = os.path.abspath(folder)
+    if cache_folder is None:
+        cache_folder = os.path.join(folder, NET_CACHE_SUBFOLDER)
+
+    key_args = '%s|%r|%r|%d' % (folder, float(baseMVA), bool(DiB_version), NET_CACHE_VERSION)
+    h = hashlib.sha1()
+    for filename in get_grid_filenames(folder, DiB_version):
+        if os.path.isfile(filename):
+            with open(filename, 'rb') as f:
+                h.update(f.read())
+        h.update(b'|')
+
+    cache_filename = os.path.join(cache_folder, 'net_%s_%s.pkl' % (
+        hashlib.sha1(key_args.encode('utf-8')).hexdigest()[:8], h.hexdigest()[:16]))
+
+    return cache_filename
+
+
+def read_net_from_csv_cached(folder, baseMVA=10, DiB_version=True, cache_folder=None):
+    """ Read network data from .csv file and convert to pandapower as read_net_from_csv, but
+        reusing the network from a binary cache file (or from memory) if the grid data files
+        have not changed since they were last read. The cache file is written the first time
+        and replaced automatically when a grid data file changes.
+
+        Inputs:
+            folder: path of folder with grid data files
+            baseMVA: Base apparent power value to use in the per-unit conversion
+                (optional; default: 10 MVA)
+            DiB_version: True if assuming files and file names as for data set published
+                in connection with Data in Brief (DiB) manuscript; False if assuming
+                previous version (until around August 2022)
+            cache_folder: Folder for cache files (optional; default: subfolder of folder)
+
+        Outputs:
+            net: pandapower net DataFrame for network (a new copy for every call, which
+                can be modified freely)
+    """
+
+    cache_filename = get_net_cache_filename(folder, baseMVA, DiB_version, cache_folder)
+
+    # Network read before by this process
+    if cache_filename in _net_cache:
+        return pickle.loads(_net_cache[cache_filename])
+
+    # Network in cache file
+    data = None
+    if os.path.isfile(cache_filename):
+        try:
+            with open(cache_filename, 'rb') as f:
+                data = f.read()
+            net = pickle.loads(data)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            print('Warning: Could not read network cache file ' + cache_filename + '; reading grid data files instead')
+            data = None
+
+    if data is None:
+        net = read_net_from_csv(folder, baseMVA = baseMVA, DiB_version = DiB_version)
+        data = pickle.dumps(net, protocol = pickle.HIGHEST_PROTOCOL)
+        write_net_cache(cache_filename, data)
+
+    _net_cache[cache_filename] = data
+
+    return net
+
+
+def write_net_cache(cache_filename, data):
+    """ Write pickled network to binary cache file (replacing cache files for previous
+        versions of the same grid data files)
+
+        Inputs:
+            cache_filename: Full path of the cache file (as returned by get_net_cache_filename)
+            data: Pickled network (bytes)
+    """
+
+    try:
+        cache_folder, filename = os.path.split(cache_filename)
+        os.makedirs(cache_folder, exist_ok=True)
+
+        # Write to a temporary file first so that other processes never see a partially written cache file
+        filename_tmp = cache_filename + '.%d.tmp' % os.getpid()
+        with open(filename_tmp, 'wb') as f:
+            f.write(data)
+        os.replace(filename_tmp, cache_filename)
+
+        # Remove cache files for previous versions of the grid data files (with the same arguments)
+        prefix = filename[:len('net_') + 8]
+        for filename_old in os.listdir(cache_folder):
+            if filename_old != filename and filename_old.startswith(prefix) and filename_old.endswith('.pkl'):
+                os.remove(os.path.join(cache_folder, filename_old))
+    except OSError:
+        print('Warning: Could not write network cache file ' + cache_filename)
+
+
+def take_snapshot(net, tables=SNAPSHOT_COLUMNS):
+    """ Record the mutable data of a network so that they can later be restored
+
+        Inputs:
+            net: pandapower network (as set up by read_net_from_csv)
+            tables: Dictionary with the network tables to record as keys and lists of the
+                columns to record as values (optional; default: SNAPSHOT_COLUMNS)
+
+        Outputs:
+            snapshot: Dictionary with the index and copies of the recorded columns of each table
+    """
+
+    snapshot = {}
+    for table, cols in tables.items():
+        df = net[table]
+        snapshot[table] = (df.index.copy(), {col: df[col].to_numpy(copy=True) for col in cols if col in df.columns})
+
+    return snapshot
+
+
+def restore_snapshot(net, snapshot):
+    """ Restore the mutable data of a network in place from a snapshot. Rows that have been added
+        to the recorded tables after the snapshot was taken (e.g. new loads added by
+        load_scenarios.apply_scenario_to_net) are removed. Power flow results are not restored.
+
+        Inputs:
+            net: pandapower network that the snapshot was taken of
+            snapshot: Snapshot as returned by take_snapshot
+    """
+
+    for table, (index, values) in snapshot.items():
+        if not net[table].index.equals(index):
+            if not index.isin(net[table].index).all():
+                print('Rows of table ' + table + ' have been removed after the snapshot was taken')
+                raise ValueError('Cannot restore table ' + table + ' from snapshot')
+            net[table] = net[table].loc[index]
+        df = net[table]
+        for col, col_values in values.items():
+            # Only columns that have been changed are written back
+            current_values = df[col].to_numpy()
+            if current_values.dtype != col_values.dtype or not np.array_equal(current_values, col_values, equal_nan=col_values.dtype.kind == 'f'):
+                df[col] = col_values.copy()
+
+
+class snapshot_log(object):
+    """ Undo log of snapshots of the mutable data of a network, for investigating variants of a
+        network without reading it from file again, e.g.:
+
+            log = snapshot_log(net)
+            with log.variant():
+                net.load['scaling'] = 2
+                pp.runpp(net)
+            # The load scaling factors are restored here
+    """
+
+    def __init__(self, net, tables=SNAPSHOT_COLUMNS):
+        """
+        Inputs:
+            net: pandapower network (as set up by read_net_from_csv)
+            tables: Network tables and columns to record (optional; default: SNAPSHOT_COLUMNS)
+        """
+
+        self.net = net
+        self.tables = tables
+        self._log = []
+
+
+    def __len__(self):
+        return len(self._log)
+
+
+    def push(self):
+        """ Take a snapshot of the network and add it to the log """
+
+        self._log.append(take_snapshot(self.net, self.tables))
+
+
+    def restore(self):
+        """ Restore the network from the last snapshot in the log (keeping it in the log) """
+
+        if len(self._log) == 0:
+            raise IndexError('No snapshots in the log')
+        restore_snapshot(self.net, self._log[-1])
+
+
+    def undo(self):
+        """ Restore the network from the last snapshot in the log and remove it from the log """
+
+        self.restore()
+        self._log.pop()
+
+
+    @contextlib.contextmanager
+    def variant(self):
+        """ Context in which changes to the mutable data of the network are undone on exit """
+
+        self.push()
+        try:
+            yield self.net
+        finally:
+            self.undo()
@@ -11,6 +11,8 @@ for the CINELDI MV reference system.
 
 import pandas as pd
 import os
+import load_profiles as lp
+import grid_data_schema as gs
 
 # %% Define input data
 
@@ -49,17 +51,20 @@ filename_load_data_fullpath = os.path.join(path_data_set,filename_load_data)
 
 reldata_input = pd.read_csv(filename_reldata_input_fullpath, sep=';')
 reldata_input.set_index('main_type',drop=True,inplace=True)
-bus = pd.read_csv(filename_bus_fullpath, sep=';')
+bus = gs.read_grid_table(filename_bus_fullpath, 'bus')
 bus.set_index('bus_i',drop=True,inplace=True)
-branch = pd.read_csv(filename_branch_fullpath, sep=';')
-branch_extra = pd.read_csv(filename_branch_extra_fullpath, sep=';')
+branch = gs.read_grid_table(filename_branch_fullpath, 'branch')
+branch_extra = gs.read_grid_table(filename_branch_extra_fullpath)
 line_types = pd.read_csv(filename_line_types_fullpath, sep=';')
 line_types.set_index('type',drop=True,inplace=True)
 share_load = pd.read_csv(filename_share_load_fullpath, sep=';')
 share_load.drop(columns = ['time_series_ID'],inplace=True)
 mapping_load = pd.read_csv(filename_mapping_load_fullpath, sep=';')
 mapping_load.set_index('bus_i',drop=False,inplace=True)
-load_data = pd.read_csv(filename_load_data_fullpath, sep=';')
+load_profiles = lp.load_profiles(filename_load_data_fullpath)
+
+# Mean value of each load time series (from the precomputed load statistics)
+load_mean = load_profiles.get_statistics()['series']['mean']
 
 
 # %% Calculate line reliability data
@@ -104,7 +109,7 @@ for bus_i in load_point_data.index:
     # Find the dominant customer type for the load point
     time_series_ID = mapping_load.loc[bus_i,'time_series_ID']
     P_ref_MW = bus.loc[bus_i,'Pd']
-    P_avg_MW = load_data[str(time_series_ID)].mean() * bus.loc[bus_i,'Pd']
+    P_avg_MW = load_mean[time_series_ID] * bus.loc[bus_i,'Pd']
     load_point_data.loc[bus_i,'P_avg_MW'] = P_avg_MW
     load_point_data.loc[bus_i,'customer_type'] = share_load.loc[time_series_ID].idxmax()
     load_point_data.loc[bus_i,'P_ref_MW'] = P_ref_MW
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for probabilistic (Monte Carlo) load flow analysis of radial grids such as the CINELDI MV
+reference grid, sampling operating states from load time series and uncertain load additions
+from scenarios for long-term load development.
+"""
+
+import pandas as pd
+import numpy as np
+import math
+import radial_power_flow as rpf
+
+
+def sample_scenario_additions(rng, n_samples, point_loads, year, bus_IDs, p_realization=1.0,
+    scale_uncertainty=0.0, power_factor=0.95):
+    """ Sample uncertain load additions from a scenario for long-term load development
+
+        Inputs:
+            rng: numpy random number generator
+            n_samples: Number of samples
+            point_loads: DataFrame with point load additions as in the scenario data returned by
+                load_scenarios.read_scenario_from_csv (entry 'point_loads'), with columns 'year_rel',
+                'bus_i', 'load_added_MW' and optionally 'power_factor' and 'probability'
+            year: Year in the analysis horizon relative to the reference year; additions up to
+                this year are included
+            bus_IDs: Index of the bus IDs of the network
+            p_realization: Probability that each addition is realized, used for additions without a
+                value in column 'probability' (optional; default: 1.0)
+            scale_uncertainty: Relative uncertainty of the magnitude of each addition; the magnitude
+                is scaled by a factor drawn uniformly between 1 - scale_uncertainty and
+                1 + scale_uncertainty (optional; default: 0.0)
+            power_factor: Power factor for additions without a value in column 'power_factor'
+                (optional; default: 0.95)
+
+        Outputs:
+            p_add_mw: 2D array (samples × buses) with added active power demand (MW)
+            q_add_mvar: 2D array (samples × buses) with added reactive power demand (Mvar)
+    """
+
+    point_loads = point_loads.loc[point_loads['year_rel'] <= year]
+    n_entries = len(point_loads.index)
+    i_bus = bus_IDs.get_indexer(point_loads['bus_i'])
+    if (i_bus < 0).any():
+        raise KeyError('Buses in scenario not in network: ' + str(list(point_loads['bus_i'][i_bus < 0])))
+
+    if 'probability' in point_loads.columns:
+        p_entries = point_loads['probability'].fillna(p_realization).to_numpy(dtype=np.float64)
+    else:
+        p_entries = np.full(n_entries, p_realization)
+    if 'power_factor' in point_loads.columns:
+        pf_entries = point_loads['power_factor'].fillna(power_factor).to_numpy(dtype=np.float64)
+    else:
+        pf_entries = np.full(n_entries, power_factor)
+
+    realized = rng.random((n_samples, n_entries)) < p_entries
+    scale = 1 + scale_uncertainty * (2 * rng.random((n_samples, n_entries)) - 1)
+    p_entries_mw = realized * scale * point_loads['load_added_MW'].to_numpy(dtype=np.float64)
+
+    p_add_mw = np.zeros((n_samples, len(bus_IDs)))
+    q_add_mvar = np.zeros((n_samples, len(bus_IDs)))
+    for i_entry in range(n_entries):
+        p_add_mw[:, i_bus[i_entry]] += p_entries_mw[:, i_entry]
+        q_add_mvar[:, i_bus[i_entry]] += p_entries_mw[:, i_entry] * math.tan(math.acos(pf_entries[i_entry]))
+
+    return p_add_mw, q_add_mvar
+
+
+def run_probabilistic_load_flow(net, profiles_mapped, scenario_data=None, year=0, p_realization=1.0,
+    scale_uncertainty=0.0, sigma_perturbation=0.0, correlation=0.5, percentiles=[1,5,50,95,99],
+    max_loading_percent=100, batch_size=1000, min_samples=2000, max_samples=50000,
+    tolerance_probability=0.005, tolerance_vm_pu=0.0005, tolerance_loading_percent=0.5, seed=0):
+    """ Run probabilistic load flow by Monte Carlo simulation. Operating states are sampled by
+        drawing random time steps from a set of load profiles, optionally with random perturbations
+        of the load demand at each bus (correlated between buses) and with uncertain load additions
+        from a scenario. The power flow is solved for batches of samples simultaneously by
+        radial_power_flow, and sampling stops when the statistics are stable.
+
+        Inputs:
+            net: pandapower network (as set up by pandapower_read_csv)
+            profiles_mapped: DataFrame with relative load profiles (unitless) as returned by
+                load_profiles.map_rel_load_profiles; time steps are sampled from its rows
+            scenario_data: Scenario data as returned by load_scenarios.read_scenario_from_csv
+                (optional; default: no load additions)
+            year: Year in the analysis horizon relative to the reference year (optional; default: 0)
+            p_realization: Probability that each load addition in the scenario is realized
+                (optional; default: 1.0; see sample_scenario_additions)
+            scale_uncertainty: Relative uncertainty of the magnitude of each load addition
+                (optional; default: 0.0; see sample_scenario_additions)
+            sigma_perturbation: Standard deviation of relative random perturbations of the load
+                demand at each bus (optional; default: 0.0, i.e. no perturbation)
+            correlation: Correlation between the perturbations at different buses
+                (optional; default: 0.5)
+            percentiles: List of percentiles to report (optional; default: [1,5,50,95,99])
+            max_loading_percent: Upper line loading limit (%) (optional; default: 100)
+            batch_size: Number of samples solved simultaneously (optional; default: 1000)
+            min_samples: Minimum number of samples (optional; default: 2000)
+            max_samples: Maximum number of samples drawn, including samples where the power flow
+                does not converge (optional; default: 50000)
+            tolerance_probability: Largest standard error of the exceedance probabilities for the
+                statistics to be considered stable (optional; default: 0.005)
+            tolerance_vm_pu: Largest change of the percentiles of the bus voltages (p.u.) from the
+                previous batch for the statistics to be considered stable (optional; default: 0.0005)
+            tolerance_loading_percent: Largest change of the percentiles of the line loadings (%)
+                from the previous batch for the statistics to be considered stable (optional; default: 0.5)
+            seed: Seed of the random number generator (optional; default: 0)
+
+        Outputs:
+            results: Dictionary with entries
+                'vm_pu': DataFrame (buses × percentiles) with percentiles of the bus voltages (p.u.)
+                'loading_percent': DataFrame (lines × percentiles) with percentiles of the line loadings (%)
+                'exceedance_bus': DataFrame (buses × limits) with the probability of voltage below
+                    the lower limit ('min_vm_pu') and above the upper limit ('max_vm_pu') of each bus
+                'exceedance_line': Series with the probability of loading above the limit of each line
+                'p_violation': Probability that any limit is violated (samples where the power flow
+                    did not converge are counted as violations)
+                'p_not_converged': Probability that the power flow does not converge; the exceedance
+                    probabilities of each bus and line are relative to all samples drawn and may be
+                    underestimated by up to this value
+                'n_samples': Number of samples drawn
+                'n_not_converged': Number of samples where the power flow did not converge (not used
+                    for the percentiles)
+                'converged': True if the statistics were stable before max_samples was reached
+                'history': DataFrame with the largest standard error of the exceedance probabilities
+                    and the largest change of the percentiles after each batch
+    """
+
+    rng = np.random.default_rng(seed)
+    model = rpf.radial_power_flow(net)
+
+    # Demand at each bus for all time steps, and the relative profile of each bus (used for the
+    # load additions; constant for buses without a profile)
+    p_mw, q_mvar = model.get_bus_injections(profiles_mapped)
+    profile_bus = profiles_mapped.reindex(columns = model.bus_IDs).to_numpy(dtype=np.float64)
+    profile_bus[:, np.isnan(profile_bus).all(axis=0)] = 1
+    n_time_steps = p_mw.shape[0]
+
+    min_vm_pu = net.bus['min_vm_pu'].to_numpy(dtype=np.float64)[model.supplied]
+    max_vm_pu = net.bus['max_vm_pu'].to_numpy(dtype=np.float64)[model.supplied]
+    bus_IDs = model.bus_IDs[model.supplied]
+
+    vm_samples = []
+    loading_samples = []
+    n_exceed = {'min_vm_pu': np.zeros(len(bus_IDs)), 'max_vm_pu': np.zeros(len(bus_IDs)),
+        'max_loading_percent': np.zeros(len(model.line_IDs))}
+    n_violation = 0
+    n_drawn = 0
+    n_samples = 0
+    n_not_converged = 0
+    converged = False
+    history = []
+    vm_percentiles_prev = None
+    loading_percentiles_prev = None
+
+    while n_drawn < max_samples:
+        n_batch = min(batch_size, max_samples - n_drawn)
+
+        # Sample time steps, perturbations and load additions
+        i_t = rng.integers(0, n_time_steps, n_batch)
+        p_batch = p_mw[i_t]
+        q_batch = q_mvar[i_t]
+        if sigma_perturbation > 0:
+            z = math.sqrt(correlation) * rng.standard_normal((n_batch, 1)) \
+                + math.sqrt(1 - correlation) * rng.standard_normal((n_batch, len(model.bus_IDs)))
+            factor = np.maximum(1 + sigma_perturbation * z, 0)
+            p_batch = p_batch * factor
+            q_batch = q_batch * factor
+        if scenario_data is not None:
+            p_add_mw, q_add_mvar = sample_scenario_additions(rng, n_batch, scenario_data['point_loads'], year,
+                model.bus_IDs, p_realization, scale_uncertainty)
+            p_batch = p_batch + p_add_mw * profile_bus[i_t]
+            q_batch = q_batch + q_add_mvar * profile_bus[i_t]
+
+        V, converged_batch, n_iterations = model.solve(p_batch, q_batch)
+        n_not_converged_batch = np.count_nonzero(~converged_batch)
+        n_not_converged += n_not_converged_batch
+        V = V[converged_batch]
+
+        vm_pu = np.abs(V[:, model.supplied])
+        I_series = (V[:, model.f_bus] - V[:, model.t_bus]) / model.z_branch
+        i_ka = np.maximum(np.abs(I_series + V[:, model.f_bus] * model.y_sh_half),
+            np.abs(-I_series + V[:, model.t_bus] * model.y_sh_half)) * model.i_base_ka
+        loading_percent = i_ka / model.max_i_ka * 100
+
+        exceed_min = vm_pu < min_vm_pu
+        exceed_max = vm_pu > max_vm_pu
+        exceed_loading = loading_percent > max_loading_percent
+        n_exceed['min_vm_pu'] += exceed_min.sum(axis=0)
+        n_exceed['max_vm_pu'] += exceed_max.sum(axis=0)
+        n_exceed['max_loading_percent'] += exceed_loading.sum(axis=0)
+        n_violation += np.count_nonzero(exceed_min.any(axis=1) | exceed_max.any(axis=1) | exceed_loading.any(axis=1)) \
+            + n_not_converged_batch
+        vm_samples.append(vm_pu.astype(np.float32))
+        loading_samples.append(loading_percent.astype(np.float32))
+        n_samples += V.shape[0]
+        n_drawn += n_batch
+
+        if n_samples == 0:
+            if n_drawn >= min_samples:
+                break
+            continue
+
+        # Convergence of the statistics: standard error of the exceedance probabilities and
+        # change of the percentiles from the previous batch
+        std_error = max(np.sqrt(np.maximum(n / n_drawn * (1 - n / n_drawn), 1 / n_drawn) / n_drawn).max(initial=0)
+            for n in list(n_exceed.values()) + [n_violation])
+        vm_percentiles = np.percentile(np.concatenate(vm_samples), percentiles, axis=0)
+        loading_percentiles = np.percentile(np.concatenate(loading_samples), percentiles, axis=0)
+        if vm_percentiles_prev is None:
+            change_vm, change_loading = np.inf, np.inf
+        else:
+            change_vm = np.abs(vm_percentiles - vm_percentiles_prev).max(initial=0)
+            change_loading = np.abs(loading_percentiles - loading_percentiles_prev).max(initial=0)
+        vm_percentiles_prev, loading_percentiles_prev = vm_percentiles, loading_percentiles
+        history.append({'n_samples': n_drawn, 'std_error_probability': std_error,
+            'change_vm_pu': change_vm, 'change_loading_percent': change_loading})
+
+        if n_drawn >= min_samples and std_error <= tolerance_probability \
+            and change_vm <= tolerance_vm_pu and change_loading <= tolerance_loading_percent:
+            converged = True
+            break
+
+    if n_samples == 0:
+        raise ValueError('The power flow did not converge for any of the ' + str(n_drawn) + ' samples')
+    elif n_not_converged > 0:
+        print('Warning: The power flow did not converge for ' + str(n_not_converged) + ' of ' + str(n_drawn)
+            + ' samples; these are counted as violations')
+
+    results = {
+        'vm_pu': pd.DataFrame(vm_percentiles_prev.T, index = bus_IDs, columns = percentiles),
+        'loading_percent': pd.DataFrame(loading_percentiles_prev.T, index = model.line_IDs, columns = percentiles),
+        'exceedance_bus': pd.DataFrame(index = bus_IDs, data = {
+            'min_vm_pu': n_exceed['min_vm_pu'] / n_drawn,
+            'max_vm_pu': n_exceed['max_vm_pu'] / n_drawn}),
+        'exceedance_line': pd.Series(n_exceed['max_loading_percent'] / n_drawn, index = model.line_IDs,
+            name = 'max_loading_percent'),
+        'p_violation': n_violation / n_drawn,
+        'p_not_converged': n_not_converged / n_drawn,
+        'n_samples': n_drawn,
+        'n_not_converged': n_not_converged,
+        'converged': converged,
+        'history': pd.DataFrame(history)}
+
+    return results
@@ -15,6 +15,7 @@ import os
 import math
 import pandapower as pp
 import pandapower_read_csv as ppcsv
+import grid_data_schema as gs
 
 # %% Set up paths and parameters
 
@@ -27,9 +28,6 @@ path_data_set = 'C:/Users/ivespe/Data_sets/CINELDI_MV_reference_system'
 # True if rateA (branch flow limit) is in p.u. and should be converted to units MVA 
 do_mult_rateA = True
 
-# Decimal separator sign to expect when reading the grid data
-decimal_sep_in = ','
-
 # Decimal separator sign to use in the modified grid data
 decimal_sep_out = '.'
 
@@ -74,10 +72,11 @@ filename_Excel_out_fullpath = os.path.join(path_data_set,filename_Excel_new)
 # Read standard cable type data
 line_type_data = pd.read_csv(filename_line_types_fullpath, sep=';')
 
-# Read grid data from .csv files
-branch = pd.read_csv(filename_branch_fullpath, sep=';', decimal=decimal_sep_in)    
-bus = pd.read_csv(filename_bus_fullpath, sep=';', decimal=decimal_sep_in)
-df_installation_year = pd.read_csv(filename_installation_year_fullpath, sep=';', decimal=decimal_sep_in)
+# Read grid data from .csv files (with the decimal separator detected from each file), translating
+# the column names to standard MATPOWER format (but lowercase)
+branch = gs.read_grid_table(filename_branch_fullpath, 'branch')
+bus = gs.read_grid_table(filename_bus_fullpath, 'bus')
+df_installation_year = gs.read_grid_table(filename_installation_year_fullpath)
 
 # %% Calculate branch susceptance (and branch length)
 
@@ -94,12 +93,12 @@ branch_extra = pd.DataFrame(columns = ['type','length_km','installation_year','l
 # Read line data (and we assume there are no transformers)
 for i_branch in branch.index:
     f_bus = branch.loc[i_branch,'f_bus']
-    rateA = branch.loc[i_branch,'rateA']
-    r = branch.loc[i_branch,'r']
-    x = branch.loc[i_branch,'x']
+    rateA = branch.loc[i_branch,'rate_A']
+    r = branch.loc[i_branch,'br_r']
+    x = branch.loc[i_branch,'br_x']
     
     # Converting line rating to units A from p.u. (in units of baseMVA)
-    baseKV = bus.loc[f_bus,'baseKV']
+    baseKV = bus.loc[f_bus,'base_kV']
     I_max = round(rateA * baseMVA / baseKV  / math.sqrt(3) * 1000)
 
     # Base impedance value (ohm)
@@ -145,11 +144,11 @@ for i_branch in branch.index:
     # Converting charging susceptance from μF (per km) to p.u.
     c_μf = c_μf_per_km * length_km 
     b = 2*omega*Zni*c_μf/1e6 
-    branch.loc[i_branch,'b'] = b
+    branch.loc[i_branch,'br_b'] = b
 
     if do_mult_rateA:
         # Convert branch rating from p.u. to units MVA
-        branch.loc[i_branch,'rateA'] = rateA * baseMVA
+        branch.loc[i_branch,'rate_A'] = rateA * baseMVA
 
     # Add information to branch extra data fields
     branch_extra.loc[i_branch,'length_km'] = length_km
@@ -163,40 +162,8 @@ if 'reserve' in branch.columns:
 
 # %% Update bus voltage limits
 
-bus['min_Vm'] = Vmin
-bus['max_Vm'] = Vmax
-
-# %% Translate bus column names to standard MATPOWER format (but lowercase)
-
-bus_col_translate = {'ID': 'bus_i', 'type': 'bus_type', 'area_num': 'bus_area', 'Va - degr': 'Va',
-    'baseKV': 'base_kV', 'max_Vm': 'Vmax', 'min_Vm': 'Vmin'}
-
-bus_cols = bus.columns.to_list()
-bus_cols_new = []
-
-for col in bus_cols:
-    if col in bus_col_translate.keys():
-        bus_cols_new.append( bus_col_translate[col] )
-    else:
-        bus_cols_new.append(col)
-
-bus.columns = bus_cols_new
-
-# %% Translate branch column names to standard MATPOWER format (but lowercase)
-
-branch_col_translate = {'r': 'br_r', 'x': 'br_x', 'b': 'br_b', 'rateA': 'rate_A',
-    'rateB': 'rate_B', 'rateC': 'rate_C', 'ratio': 'tap'}
-
-branch_cols = branch.columns.to_list()
-branch_cols_new = []
-
-for col in branch_cols:
-    if col in branch_col_translate.keys():
-        branch_cols_new.append( branch_col_translate[col] )
-    else:
-        branch_cols_new.append(col)
-
-branch.columns = branch_cols_new
+bus['Vmin'] = Vmin
+bus['Vmax'] = Vmax
 
 # %% Create additional bus data (with parameters for ZIP load model)
 
@@ -216,7 +183,7 @@ bus_extra.to_csv(filename_bus_extra_out_fullpath, sep = ';', decimal = decimal_s
 
 # %% Do an extra round reading and writing to .csv to include power flow solution in data set (which is a rather awkward solution, I know...)
 
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10, DiB_version=True)
+net = ppcsv.read_net_from_csv_cached(path_data_set, baseMVA=10, DiB_version=True)
 
 # Solve power flow equations and update voltage data in the bus matrix
 pp.runpp(net, init='results', algorithm='bfsw')
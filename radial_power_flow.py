@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for fast power flow calculations for radial distribution grids such as the CINELDI MV
+reference grid, using a backward/forward sweep that solves the power flow for many operating
+states (e.g. all time steps of a time series) simultaneously.
+"""
+
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+import time_series_power_flow as tspf
+import radial_topology as rt
+
+
+class radial_power_flow(object):
+    """ Backward/forward sweep power flow solver for a radial pandapower network (as set up by
+        pandapower_read_csv) with a single external grid connection. Lines are represented by
+        the pi model and loads and static generators as constant power injections.
+    """
+
+    def __init__(self, net):
+        """
+        Set up the tree ordering of the network and the per-unit branch and bus data
+
+        Inputs:
+            net: pandapower network (only buses, in-service lines, loads, static generators
+                and the external grid are considered)
+        """
+
+        # Tree ordering: parent bus, and branch to the parent bus, of each bus in breadth-first order
+        topology = rt.radial_topology(net)
+        ext_grid = net.ext_grid.loc[net.ext_grid['in_service']]
+        bus_IDs = topology.bus_IDs
+        n_bus = len(bus_IDs)
+        line = net.line.loc[topology.line_IDs]
+        f_bus = topology.f_bus
+        t_bus = topology.t_bus
+
+        # Path matrix (buses × branches) with K[i,k] = 1 if branch k is on the path from the root to bus i
+        K = topology.get_path_matrix()
+
+        # Per-unit series impedance and shunt susceptance of the lines (with base voltage of the from bus)
+        sn_mva = net.sn_mva
+        vn_kv = net.bus['vn_kv'].to_numpy(dtype=np.float64)
+        z_base = vn_kv[f_bus]**2 / sn_mva
+        parallel = line['parallel'].to_numpy(dtype=np.float64)
+        length_km = line['length_km'].to_numpy(dtype=np.float64)
+        z_branch = (line['r_ohm_per_km'].to_numpy() + 1j*line['x_ohm_per_km'].to_numpy()) * length_km / parallel / z_base
+        b_branch = 2 * np.pi * net.f_hz * line['c_nf_per_km'].to_numpy() * 1e-9 * length_km * parallel * z_base
+        if 'g_us_per_km' in line.columns:
+            g_branch = line['g_us_per_km'].fillna(0).to_numpy() * 1e-6 * length_km * parallel * z_base
+        else:
+            g_branch = np.zeros(len(line.index))
+        y_sh_half = (g_branch + 1j*b_branch) / 2
+
+        # Shunt admittance at each bus from the line charging (half of each line at each end)
+        y_sh_bus = np.zeros(n_bus, dtype=complex)
+        np.add.at(y_sh_bus, f_bus, y_sh_half)
+        np.add.at(y_sh_bus, t_bus, y_sh_half)
+
+        self.net = net
+        self.topology = topology
+        self.bus_IDs = bus_IDs
+        self.line_IDs = line.index
+        self.sn_mva = sn_mva
+        self.i_root = topology.i_root
+        self.v_root = ext_grid['vm_pu'].iloc[0] * np.exp(1j*np.deg2rad(ext_grid['va_degree'].iloc[0]))
+        self.parent = topology.parent
+        self.parent_branch = topology.parent_branch
+        self.order = topology.order
+        self.K = K.tocsc()
+        self.KT = K.T.tocsr()
+        self.f_bus = f_bus
+        self.t_bus = t_bus
+        self.z_branch = z_branch
+        self.y_sh_half = y_sh_half
+        self.y_sh_bus = y_sh_bus
+        self.supplied = topology.supplied
+        self.i_base_ka = sn_mva / (np.sqrt(3) * vn_kv[f_bus])
+        self.max_i_ka = line['max_i_ka'].to_numpy(dtype=np.float64) * line['df'].to_numpy(dtype=np.float64) * parallel
+
+
+    def get_bus_injections(self, profiles_mapped=None, time_steps=None):
+        """
+        Return active and reactive power demand at each bus for the loads and static generators
+        of the network, either for the current load scaling factors or for relative load profiles
+        mapped to the buses
+
+        Inputs:
+            profiles_mapped: DataFrame with relative load profiles (unitless) as returned by
+                load_profiles.map_rel_load_profiles (optional; default: use net.load['scaling'])
+            time_steps: List of time steps (index values of profiles_mapped) (optional; default: all)
+
+        Outputs:
+            p_mw: 2D array (time steps × buses) with net active power demand (MW)
+            q_mvar: 2D array (time steps × buses) with net reactive power demand (Mvar)
+        """
+
+        net = self.net
+        load = net.load.loc[net.load['in_service']]
+        if profiles_mapped is None:
+            scaling = load['scaling'].to_numpy(dtype=np.float64)[None,:]
+        else:
+            if time_steps is not None:
+                profiles_mapped = profiles_mapped.loc[time_steps]
+            scaling = tspf.get_scaling_time_series(net, profiles_mapped)[:, net.load['in_service'].to_numpy()]
+
+        # Sum the loads at each bus with an incidence matrix (loads × buses)
+        i_load_bus = self.bus_IDs.get_indexer(load['bus'])
+        C_load = sp.csr_matrix((np.ones(len(i_load_bus)), (np.arange(len(i_load_bus)), i_load_bus)),
+            shape = (len(i_load_bus), len(self.bus_IDs)))
+        p_mw = np.asarray((scaling * load['p_mw'].to_numpy()) @ C_load)
+        q_mvar = np.asarray((scaling * load['q_mvar'].to_numpy()) @ C_load)
+
+        # Static generators are included as constant negative demand
+        sgen = net.sgen.loc[net.sgen['in_service']]
+        if len(sgen.index) > 0:
+            i_sgen_bus = self.bus_IDs.get_indexer(sgen['bus'])
+            np.subtract.at(p_mw, (slice(None), i_sgen_bus), (sgen['p_mw'] * sgen['scaling']).to_numpy())
+            np.subtract.at(q_mvar, (slice(None), i_sgen_bus), (sgen['q_mvar'] * sgen['scaling']).to_numpy())
+
+        return p_mw, q_mvar
+
+
+    def solve(self, p_mw, q_mvar, v_init=None, max_iteration=100, tolerance_pu=1e-9, y_sh_bus=None):
+        """
+        Solve the power flow for a set of operating states simultaneously
+
+        Inputs:
+            p_mw: 2D array (operating states × buses) with net active power demand (MW) at each bus
+            q_mvar: 2D array (operating states × buses) with net reactive power demand (Mvar) at each bus
+            v_init: 2D complex array (operating states × buses) with initial bus voltages (p.u.)
+                (optional; default: flat start from the voltage of the external grid)
+            max_iteration: Maximum number of iterations (optional; default: 100)
+            tolerance_pu: Tolerance for the largest change in bus voltage (p.u.) between two
+                iterations (optional; default: 1e-9)
+            y_sh_bus: Complex array (buses, or operating states × buses) with shunt admittance at
+                each bus (p.u.) (optional; default: line charging of the in-service lines)
+
+        Outputs:
+            V: 2D complex array (operating states × buses) with bus voltages (p.u.); NaN for buses
+                that are not connected to the external grid
+            converged: Boolean array with True for the operating states that converged
+            n_iterations: Number of iterations
+        """
+
+        S = (np.atleast_2d(p_mw) + 1j*np.atleast_2d(q_mvar)) / self.sn_mva
+        if y_sh_bus is None:
+            y_sh_bus = self.y_sh_bus
+        n_states = S.shape[0]
+
+        if v_init is None:
+            V = np.full(S.shape, self.v_root, dtype=complex)
+        else:
+            V = np.array(v_init, dtype=complex)
+        V[:, ~self.supplied] = np.nan
+        V[:, self.i_root] = self.v_root
+
+        converged = np.zeros(n_states, dtype=bool)
+        for n_iterations in range(1, max_iteration+1):
+            # Current drawn at each bus by loads and line charging
+            I_bus = np.conj(S / V) + V * y_sh_bus
+            I_bus[:, ~self.supplied] = 0
+
+            # Backward sweep: branch current is the sum of the currents drawn downstream of the branch
+            J = (self.KT @ I_bus.T).T
+
+            # Forward sweep: voltage drop is the sum of the voltage drops along the path from the root
+            V_new = self.v_root - (self.K @ (J * self.z_branch).T).T
+            V_new[:, ~self.supplied] = np.nan
+
+            dV_max = np.nanmax(np.abs(V_new - V), axis=1, initial=0)
+            V = V_new
+            converged = dV_max < tolerance_pu
+            if converged.all():
+                break
+
+        return V, converged, n_iterations
+
+
+    def get_results(self, V, time_steps=None):
+        """
+        Calculate bus and line results from the bus voltages of a power flow solution
+
+        Inputs:
+            V: 2D complex array (operating states × buses) with bus voltages (p.u.) as returned by solve
+            time_steps: Index for the operating states (optional; default: 0-indexed integers)
+
+        Outputs:
+            results: Dictionary with entries 'res_bus' and 'res_line', which are dictionaries with a
+                DataFrame (operating states × buses or lines) for each result quantity, using the same
+                column names as net.res_bus and net.res_line in pandapower
+        """
+
+        if time_steps is None:
+            time_steps = pd.RangeIndex(V.shape[0])
+
+        V_f = V[:, self.f_bus]
+        V_t = V[:, self.t_bus]
+
+        # Series current in the direction from the from bus to the to bus
+        I_series = (V_f - V_t) / self.z_branch
+
+        # Currents flowing into the line at each end (including the line charging)
+        I_f = I_series + V_f * self.y_sh_half
+        I_t = -I_series + V_t * self.y_sh_half
+        S_f = V_f * np.conj(I_f) * self.sn_mva
+        S_t = V_t * np.conj(I_t) * self.sn_mva
+
+        i_from_ka = np.abs(I_f) * self.i_base_ka
+        i_to_ka = np.abs(I_t) * self.i_base_ka
+        i_ka = np.maximum(i_from_ka, i_to_ka)
+
+        res_bus = {'vm_pu': np.abs(V), 'va_degree': np.rad2deg(np.angle(V))}
+        res_line = {'p_from_mw': S_f.real, 'q_from_mvar': S_f.imag, 'p_to_mw': S_t.real, 'q_to_mvar': S_t.imag,
+            'pl_mw': S_f.real + S_t.real, 'ql_mvar': S_f.imag + S_t.imag, 'i_from_ka': i_from_ka, 'i_to_ka': i_to_ka,
+            'i_ka': i_ka, 'loading_percent': i_ka / self.max_i_ka * 100}
+
+        results = {
+            'res_bus': {col: pd.DataFrame(values, index = time_steps, columns = self.bus_IDs) for col, values in res_bus.items()},
+            'res_line': {col: pd.DataFrame(values, index = time_steps, columns = self.line_IDs) for col, values in res_line.items()}}
+
+        return results
+
+
+    def run_time_series(self, profiles_mapped, time_steps=None, max_iteration=100, tolerance_pu=1e-9):
+        """
+        Run power flow for all time steps of a set of load profiles mapped to the buses of the
+        network simultaneously (corresponds to time_series_power_flow.run_time_series)
+
+        Inputs:
+            profiles_mapped: DataFrame with relative load profiles (unitless) as returned by
+                load_profiles.map_rel_load_profiles; indices are time steps and columns are bus IDs
+            time_steps: List of time steps (index values of profiles_mapped) (optional; default: all)
+            max_iteration: Maximum number of iterations (optional; default: 100)
+            tolerance_pu: Tolerance for bus voltages (p.u.) (optional; default: 1e-9)
+
+        Outputs:
+            results: Dictionary with entries 'res_bus' and 'res_line' (see get_results), and
+                'converged' for a Series with True for time steps where the power flow converged
+        """
+
+        if time_steps is None:
+            time_steps = profiles_mapped.index
+        time_steps = pd.Index(data = time_steps)
+
+        p_mw, q_mvar = self.get_bus_injections(profiles_mapped, time_steps)
+        V, converged, n_iterations = self.solve(p_mw, q_mvar, max_iteration = max_iteration, tolerance_pu = tolerance_pu)
+
+        results = self.get_results(V, time_steps)
+        results['converged'] = pd.Series(converged, index = time_steps)
+
+        return results
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for the topology of radial distribution grids such as the CINELDI MV reference grid:
+tree ordering of the buses from the external grid connection, paths to the root, buses
+downstream of each line, and aggregation of load (time series) into line flows.
+"""
+
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+
+
+def get_tree_ordering(n_bus, f_bus, t_bus, i_root):
+    """ Find the tree ordering of a radial network by a breadth-first search from the root bus
+
+        Inputs:
+            n_bus: Number of buses
+            f_bus: Array with (positional) from bus of each branch
+            t_bus: Array with (positional) to bus of each branch
+            i_root: Positional index of the root bus
+
+        Outputs:
+            parent: Array with the parent bus of each bus (-1 for the root and for buses not
+                connected to the root)
+            parent_branch: Array with the branch connecting each bus to its parent bus (-1 for
+                the root and for buses not connected to the root)
+            order: Array with the buses connected to the root in breadth-first order
+                (starting with the root)
+            depth: Array with the number of branches between each bus and the root (-1 for
+                buses not connected to the root)
+    """
+
+    n_branch = len(f_bus)
+    adjacency = sp.csr_matrix((np.r_[np.arange(n_branch), np.arange(n_branch)] + 1,
+        (np.r_[f_bus, t_bus], np.r_[t_bus, f_bus])), shape = (n_bus, n_bus))
+
+    parent = np.full(n_bus, -1)
+    parent_branch = np.full(n_bus, -1)
+    depth = np.full(n_bus, -1)
+    depth[i_root] = 0
+    visited = np.zeros(n_bus, dtype=bool)
+    visited[i_root] = True
+    order = [np.array([i_root])]
+    n_visited = 1
+    while len(order[-1]) > 0:
+        level = order[-1]
+        rows = adjacency[level]
+        i_parent = np.repeat(level, np.diff(rows.indptr))
+        i_child = rows.indices
+        i_branch = rows.data - 1
+        I_new = ~visited[i_child]
+        if len(np.unique(i_child[I_new])) < I_new.sum() or (visited[i_child] & (i_child != parent[i_parent])).any():
+            raise ValueError('The network is not radial')
+        i_child = i_child[I_new]
+        parent[i_child] = i_parent[I_new]
+        parent_branch[i_child] = i_branch[I_new]
+        depth[i_child] = len(order)
+        visited[i_child] = True
+        n_visited += len(i_child)
+        order.append(i_child)
+
+    if n_branch != n_visited - 1 + np.count_nonzero(~visited[f_bus] & ~visited[t_bus]):
+        raise ValueError('The network is not radial')
+
+    return parent, parent_branch, np.concatenate(order), depth
+
+
+class radial_topology(object):
+    """ Topology of a radial pandapower network with a single external grid connection (the root),
+        considering the in-service lines. Besides the tree ordering, the buses are numbered in
+        depth-first order, so that the buses downstream of each line are a contiguous range of
+        this numbering; this gives the downstream buses of a line without searching, and the
+        downstream sums for all lines with a single cumulative sum.
+    """
+
+    def __init__(self, net):
+        """
+        Set up the tree ordering and depth-first numbering of the network
+
+        Inputs:
+            net: pandapower network (as set up by pandapower_read_csv)
+        """
+
+        ext_grid = net.ext_grid.loc[net.ext_grid['in_service']]
+        if len(ext_grid.index) != 1:
+            raise ValueError('The radial topology requires exactly one external grid connection')
+
+        bus_IDs = net.bus.index
+        n_bus = len(bus_IDs)
+        line = net.line.loc[net.line['in_service'].astype(bool)]
+        f_bus = bus_IDs.get_indexer(line['from_bus'])
+        t_bus = bus_IDs.get_indexer(line['to_bus'])
+        i_root = bus_IDs.get_loc(ext_grid['bus'].iloc[0])
+
+        parent, parent_branch, order, depth = get_tree_ordering(n_bus, f_bus, t_bus, i_root)
+        supplied = depth >= 0
+
+        # Number of buses in the subtree of each bus (accumulated from the deepest buses upwards)
+        size = supplied.astype(int)
+        for d in range(depth.max(), 0, -1):
+            level = order[depth[order] == d]
+            np.add.at(size, parent[level], size[level])
+
+        # Depth-first numbering: the subtree of each bus is numbered from tin to tout (exclusive),
+        # with the bus itself first and the subtrees of its children in consecutive blocks
+        tin = np.full(n_bus, -1)
+        tin[i_root] = 0
+        for d in range(1, depth.max() + 1):
+            level = order[depth[order] == d]
+            level = level[np.argsort(parent[level], kind='stable')]
+            size_level = size[level]
+            offset = np.cumsum(size_level) - size_level
+            i_first = np.searchsorted(parent[level], parent[level])
+            tin[level] = tin[parent[level]] + 1 + offset - offset[i_first]
+        tout = np.where(supplied, tin + size, -1)
+        preorder = np.empty(np.count_nonzero(supplied), dtype=int)
+        preorder[tin[supplied]] = np.flatnonzero(supplied)
+
+        # Bus at the downstream (child) and upstream (parent) end of each line
+        line_child = np.where(parent_branch[t_bus] == np.arange(len(t_bus)), t_bus, f_bus)
+        line_parent = np.where(line_child == t_bus, f_bus, t_bus)
+
+        self.bus_IDs = bus_IDs
+        self.line_IDs = line.index
+        self.i_root = i_root
+        self.f_bus = f_bus
+        self.t_bus = t_bus
+        self.parent = parent
+        self.parent_branch = parent_branch
+        self.order = order
+        self.depth = depth
+        self.supplied = supplied
+        self.size = size
+        self.tin = tin
+        self.tout = tout
+        self.preorder = preorder
+        self.line_child = line_child
+        self.line_parent = line_parent
+        self._line_lookup = {frozenset(pair): line_ID for pair, line_ID in
+            zip(zip(line['from_bus'], line['to_bus']), line.index)}
+
+
+    def get_line_ID(self, bus_ID_1, bus_ID_2):
+        """ Get the ID of the in-service line between two buses (in any direction) """
+
+        key = frozenset((bus_ID_1, bus_ID_2))
+        if key not in self._line_lookup:
+            raise KeyError('No in-service line between bus ' + str(bus_ID_1) + ' and bus ' + str(bus_ID_2))
+
+        return self._line_lookup[key]
+
+
+    def get_downstream_buses(self, line_ID, positional=False):
+        """
+        Get the buses downstream of a line, i.e. the buses that are supplied through the line
+
+        Inputs:
+            line_ID: ID of the line
+            positional: True to return positional indices of the buses instead of bus IDs
+                (optional; default: False)
+
+        Outputs:
+            buses: Bus IDs (or positional indices) in depth-first order, starting with the bus
+                at the downstream end of the line
+        """
+
+        i_child = self.line_child[self.line_IDs.get_loc(line_ID)]
+        i_buses = self.preorder[self.tin[i_child]:self.tout[i_child]]
+
+        if positional:
+            return i_buses
+        return self.bus_IDs[i_buses]
+
+
+    def get_path_to_root(self, bus_ID):
+        """
+        Get the path from a bus to the root (external grid connection)
+
+        Inputs:
+            bus_ID: ID of the bus
+
+        Outputs:
+            bus_IDs: List of IDs of the buses on the path, starting with the bus itself and ending with the root
+            line_IDs: List of IDs of the lines on the path, starting with the line to the parent bus
+        """
+
+        i = self.bus_IDs.get_loc(bus_ID)
+        if not self.supplied[i]:
+            raise ValueError('Bus ' + str(bus_ID) + ' is not connected to the external grid')
+
+        i_buses = [i]
+        i_lines = []
+        while self.parent[i] >= 0:
+            i_lines.append(self.parent_branch[i])
+            i = self.parent[i]
+            i_buses.append(i)
+
+        return list(self.bus_IDs[i_buses]), list(self.line_IDs[i_lines])
+
+
+    def get_path_matrix(self):
+        """
+        Build the path matrix of the network, i.e. a sparse matrix (buses × lines) where element
+        (i,k) is 1 if line k is on the path from the root to bus i
+
+        Outputs:
+            K: Sparse path matrix
+        """
+
+        # Column k has ones for the buses downstream of line k
+        tin_child = self.tin[self.line_child]
+        size_child = self.size[self.line_child]
+        cols = np.repeat(np.arange(len(self.line_IDs)), size_child)
+        starts = np.repeat(tin_child - np.r_[0, np.cumsum(size_child)[:-1]], size_child)
+        rows = self.preorder[np.arange(len(cols)) + starts]
+        K = sp.csc_matrix((np.ones(len(rows)), (rows, cols)), shape = (len(self.bus_IDs), len(self.line_IDs)))
+
+        return K
+
+
+    def aggregate_downstream(self, values):
+        """
+        Aggregate values at the buses (e.g. a load time series) to the lines, i.e. sum the values
+        of the buses downstream of each line, for all lines by a single cumulative sum over the
+        buses in depth-first order
+
+        Inputs:
+            values: DataFrame (e.g. time steps × bus IDs, such as a load time series mapped to the
+                buses; missing buses count as zero) or 2D array (rows × buses in the order of bus_IDs)
+
+        Outputs:
+            flows: DataFrame (or 2D array if values is an array) with the sum of the values
+                downstream of each line (rows × lines)
+        """
+
+        if isinstance(values, pd.DataFrame):
+            X = values.reindex(columns = self.bus_IDs, fill_value = 0).to_numpy(dtype=np.float64)
+        else:
+            X = np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+        X = np.nan_to_num(X[:, self.preorder])
+        cumsum = np.zeros((X.shape[0], X.shape[1] + 1))
+        np.cumsum(X, axis=1, out=cumsum[:, 1:])
+        flows = cumsum[:, self.tout[self.line_child]] - cumsum[:, self.tin[self.line_child]]
+
+        if isinstance(values, pd.DataFrame):
+            return pd.DataFrame(flows, index = values.index, columns = self.line_IDs)
+        return flows
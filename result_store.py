@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for storing time series of power flow results compactly on disk (one float32 file per
+result quantity, appended in chunks) and for querying and summarizing the stored results
+without loading all of them into memory.
+"""
+
+import pandas as pd
+import numpy as np
+import os
+
+# Result quantities that are stored by default for each table of power flow results
+DEFAULT_QUANTITIES = {'res_bus': ['vm_pu','va_degree'],
+    'res_line': ['loading_percent','p_from_mw','q_from_mvar'],
+    'res_load': ['p_mw']}
+
+# Network tables with the elements (columns) of each table of power flow results
+ELEMENT_TABLES = {'res_bus': 'bus', 'res_line': 'line', 'res_load': 'load'}
+
+ELEMENTS_FILENAME = 'elements.npz'
+TIME_INDEX_FILENAME = 'time_index.npy'
+
+
+def index_to_array(index):
+    """ Convert an index (element IDs or time steps) to an array that can be saved without pickling """
+
+    values = pd.Index(index).to_numpy()
+    if values.dtype == object:
+        values = pd.Index(pd.Index(index).tolist()).to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+
+    return values
+
+
+def get_data_filename(folder, table, quantity):
+    """ Get full path of the file with the values of a result quantity in a result store folder """
+
+    return os.path.join(folder, table + '.' + quantity + '.f32')
+
+
+class result_store(object):
+
+    def __init__(self, folder, net=None, quantities=None, chunksize=1000):
+        """
+        Create a new result store (if net is given) or open an existing result store
+
+        Inputs:
+            folder: Folder for the files of the result store
+            net: pandapower network that the results are for (optional; if given, a new result
+                store is created in folder, replacing any results that are already stored there)
+            quantities: Dictionary with table names ('res_bus', 'res_line' and 'res_load') as keys
+                and lists of result quantities (column names of the table) as values
+                (optional; default: DEFAULT_QUANTITIES; only used when creating a new store)
+            chunksize: Number of time steps that are collected in memory before they are
+                appended to the files (optional; default: 1000)
+
+        NB: When an existing result store is opened, only the time steps with values stored for
+        all quantities are used, in case appending was interrupted. The files are not changed
+        when the store is opened, so that it can be read while results are being appended by
+        another process; values beyond these time steps are removed from the files at the first
+        flush, i.e. only when appending to the reopened store.
+        """
+
+        self.folder = folder
+        self.chunksize = chunksize
+
+        if net is not None:
+            if quantities is None:
+                quantities = DEFAULT_QUANTITIES
+            self.quantities = {table: list(cols) for table, cols in quantities.items()}
+            self.element_IDs = {table: pd.Index(net[ELEMENT_TABLES[table]].index) for table in self.quantities.keys()}
+
+            os.makedirs(folder, exist_ok=True)
+            np.savez(os.path.join(folder, ELEMENTS_FILENAME),
+                tables = np.array(list(self.quantities.keys())),
+                **{'quantities_' + table: np.array(cols) for table, cols in self.quantities.items()},
+                **{'IDs_' + table: index_to_array(IDs) for table, IDs in self.element_IDs.items()})
+            for table, cols in self.quantities.items():
+                for col in cols:
+                    open(get_data_filename(folder, table, col), 'wb').close()
+            self.time_index = pd.Index([])
+            np.save(os.path.join(folder, TIME_INDEX_FILENAME), index_to_array(self.time_index))
+        else:
+            if not os.path.isfile(os.path.join(folder, ELEMENTS_FILENAME)):
+                print('No result store found in folder ' + folder)
+                raise FileNotFoundError(os.path.join(folder, ELEMENTS_FILENAME))
+            with np.load(os.path.join(folder, ELEMENTS_FILENAME)) as elements:
+                self.quantities = {table: elements['quantities_' + table].tolist() for table in elements['tables']}
+                self.element_IDs = {table: pd.Index(elements['IDs_' + table]) for table in self.quantities.keys()}
+            self.time_index = pd.Index(np.load(os.path.join(folder, TIME_INDEX_FILENAME)))
+
+            # Only time steps with values for all quantities are valid (in case appending was interrupted)
+            n_time_steps = len(self.time_index)
+            for table, cols in self.quantities.items():
+                for col in cols:
+                    n_bytes = os.path.getsize(get_data_filename(folder, table, col))
+                    n_time_steps = min(n_time_steps, n_bytes // (4 * max(len(self.element_IDs[table]), 1)))
+            self.time_index = self.time_index[:n_time_steps]
+
+        # Values beyond the valid time steps are removed from the files at the first flush
+        self._truncate_files = net is None
+        self._buffer = {table: {col: [] for col in cols} for table, cols in self.quantities.items()}
+        self._buffer_time_steps = []
+
+
+    @property
+    def n_time_steps(self):
+        """ Number of time steps that have been appended (including those not yet written to the files) """
+
+        return len(self.time_index) + len(self._buffer_time_steps)
+
+
+    def append(self, results, time_steps=None):
+        """
+        Append results for a set of time steps
+
+        Inputs:
+            results: Dictionary with tables of results as returned by
+                time_series_power_flow.run_time_series or radial_power_flow.run_time_series, i.e.
+                with table names as keys and dictionaries with a DataFrame (time steps × elements)
+                for each result quantity as values; quantities that are missing are stored as NaN
+            time_steps: Time steps of the results (optional; default: the index of the DataFrames)
+        """
+
+        if time_steps is None:
+            for table_results in results.values():
+                if isinstance(table_results, dict) and len(table_results) > 0:
+                    time_steps = next(iter(table_results.values())).index
+                    break
+        time_steps = list(time_steps)
+
+        for table, cols in self.quantities.items():
+            table_results = results.get(table, {})
+            for col in cols:
+                if col in table_results:
+                    values = table_results[col]
+                    if isinstance(values, pd.DataFrame):
+                        values = values.reindex(columns = self.element_IDs[table]).to_numpy()
+                    values = np.asarray(values, dtype=np.float32).reshape(len(time_steps), len(self.element_IDs[table]))
+                else:
+                    values = np.full((len(time_steps), len(self.element_IDs[table])), np.nan, dtype=np.float32)
+                self._buffer[table][col].append(values)
+
+        self._buffer_time_steps.extend(time_steps)
+        if len(self._buffer_time_steps) >= self.chunksize:
+            self.flush()
+
+
+    def append_net(self, time_step, net):
+        """
+        Append the power flow results of a pandapower network (net.res_bus etc.) for one time step
+
+        Inputs:
+            time_step: Time step of the results
+            net: pandapower network for which power flow has been run
+        """
+
+        results = {table: {col: net[table][col].to_numpy()[np.newaxis, :] for col in cols if col in net[table].columns}
+            for table, cols in self.quantities.items()}
+        self.append(results, time_steps = [time_step])
+
+
+    def flush(self):
+        """ Write time steps collected in memory to the files of the result store """
+
+        if len(self._buffer_time_steps) == 0:
+            return
+
+        # Remove values beyond the valid time steps of a reopened store (in case appending was
+        # interrupted), so that the new time steps are appended in place
+        if self._truncate_files:
+            for table, cols in self.quantities.items():
+                n_bytes = len(self.time_index) * len(self.element_IDs[table]) * 4
+                for col in cols:
+                    filename = get_data_filename(self.folder, table, col)
+                    if os.path.getsize(filename) > n_bytes:
+                        os.truncate(filename, n_bytes)
+            self._truncate_files = False
+
+        for table, cols in self.quantities.items():
+            for col in cols:
+                with open(get_data_filename(self.folder, table, col), 'ab') as file:
+                    for values in self._buffer[table][col]:
+                        file.write(np.ascontiguousarray(values, dtype=np.float32).tobytes())
+                self._buffer[table][col] = []
+
+        # The time index is written after the values, so that it never refers to values that are not stored
+        self.time_index = self.time_index.append(pd.Index(self._buffer_time_steps))
+        np.save(os.path.join(self.folder, TIME_INDEX_FILENAME), index_to_array(self.time_index))
+        self._buffer_time_steps = []
+
+
+    def close(self):
+        """ Write any remaining time steps to the files of the result store """
+
+        self.flush()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def get_memmap(self, table, quantity):
+        """
+        Get the stored values of a result quantity as a read-only memory-mapped array
+
+        Inputs:
+            table: Table of results ('res_bus', 'res_line' or 'res_load')
+            quantity: Result quantity (column name of the table, e.g. 'vm_pu')
+
+        Outputs:
+            values: Memory-mapped float32 array (time steps × elements)
+        """
+
+        if table not in self.quantities or quantity not in self.quantities[table]:
+            raise KeyError('Result quantity ' + str(quantity) + ' of table ' + str(table) + ' is not stored')
+
+        shape = (len(self.time_index), len(self.element_IDs[table]))
+        if shape[0] * shape[1] == 0:
+            return np.zeros(shape, dtype=np.float32)
+
+        return np.memmap(get_data_filename(self.folder, table, quantity), dtype=np.float32, mode='r', shape=shape)
+
+
+    def _get_time_selection(self, start, end):
+        """ Get the positional indices of the time steps from start to end (both inclusive) """
+
+        if start is None and end is None:
+            return slice(None)
+        if self.time_index.is_monotonic_increasing:
+            return self.time_index.slice_indexer(start, end)
+        i_start = 0 if start is None else self.time_index.get_loc(start)
+        i_end = len(self.time_index) - 1 if end is None else self.time_index.get_loc(end)
+        return slice(i_start, i_end + 1)
+
+
+    def _get_element_selection(self, table, element_IDs):
+        """ Get the positional indices of a set of elements of a table """
+
+        if element_IDs is None:
+            return slice(None)
+        i_elements = self.element_IDs[table].get_indexer(element_IDs)
+        if (i_elements < 0).any():
+            raise KeyError('Elements not in table ' + table + ': ' + str(list(np.asarray(element_IDs)[i_elements < 0])))
+        return i_elements
+
+
+    def get_values(self, table, quantity, start=None, end=None, element_IDs=None):
+        """
+        Get stored values of a result quantity for a time range and a set of elements
+
+        Inputs:
+            table: Table of results ('res_bus', 'res_line' or 'res_load')
+            quantity: Result quantity (column name of the table, e.g. 'vm_pu')
+            start: First time step of the time range (optional; default: first stored time step)
+            end: Last time step of the time range (inclusive) (optional; default: last stored time step)
+            element_IDs: List of IDs of elements (e.g. buses or lines) (optional; default: all)
+
+        Outputs:
+            values: DataFrame (time steps × elements) with the stored values
+        """
+
+        self.flush()
+        i_time = self._get_time_selection(start, end)
+        i_elements = self._get_element_selection(table, element_IDs)
+
+        values = self.get_memmap(table, quantity)[i_time][:, i_elements]
+
+        return pd.DataFrame(np.array(values), index = self.time_index[i_time],
+            columns = self.element_IDs[table][i_elements])
+
+
+    def get_summary(self, table, quantity, over='time', start=None, end=None, element_IDs=None, n_rows_block=8760):
+        """
+        Calculate summary statistics of a result quantity, reading the stored values in blocks of time steps
+
+        Inputs:
+            table: Table of results ('res_bus', 'res_line' or 'res_load')
+            quantity: Result quantity (column name of the table, e.g. 'vm_pu')
+            over: 'time' for statistics of each element over time, or 'elements' for statistics
+                of each time step over elements (e.g. minimum voltage in the grid for each hour)
+                (optional; default: 'time')
+            start, end: Time range (see get_values) (optional; default: all stored time steps)
+            element_IDs: List of IDs of elements (optional; default: all)
+            n_rows_block: Number of time steps read at a time (optional; default: 8760)
+
+        Outputs:
+            summary: DataFrame with columns 'min', 'max' and 'mean' (and 'time_min' and 'time_max'
+                with the time steps of the minimum and maximum values if over is 'time'),
+                with one row for each element or time step
+        """
+
+        self.flush()
+        i_time = self._get_time_selection(start, end)
+        i_elements = self._get_element_selection(table, element_IDs)
+        time_index = self.time_index[i_time]
+        element_index = self.element_IDs[table][i_elements]
+        values = self.get_memmap(table, quantity)[i_time]
+
+        if over == 'elements':
+            blocks = [np.array(values[i:i + n_rows_block][:, i_elements], dtype=np.float64)
+                for i in range(0, len(time_index), n_rows_block)]
+            summary = pd.DataFrame(index = time_index, data = {
+                'min': np.concatenate([np.nanmin(block, axis=1) for block in blocks]) if blocks else [],
+                'max': np.concatenate([np.nanmax(block, axis=1) for block in blocks]) if blocks else [],
+                'mean': np.concatenate([np.nanmean(block, axis=1) for block in blocks]) if blocks else []})
+        elif over == 'time':
+            n_elements = len(element_index)
+            val_min = np.full(n_elements, np.inf)
+            val_max = np.full(n_elements, -np.inf)
+            i_min = np.zeros(n_elements, dtype=int)
+            i_max = np.zeros(n_elements, dtype=int)
+            val_sum = np.zeros(n_elements)
+            n_values = np.zeros(n_elements)
+            for i in range(0, len(time_index), n_rows_block):
+                block = np.array(values[i:i + n_rows_block][:, i_elements], dtype=np.float64)
+                block_min = np.where(np.isnan(block), np.inf, block)
+                block_max = np.where(np.isnan(block), -np.inf, block)
+                i_block_min = block_min.argmin(axis=0)
+                i_block_max = block_max.argmax(axis=0)
+                I_min = block_min[i_block_min, np.arange(n_elements)] < val_min
+                I_max = block_max[i_block_max, np.arange(n_elements)] > val_max
+                val_min[I_min] = block_min[i_block_min, np.arange(n_elements)][I_min]
+                val_max[I_max] = block_max[i_block_max, np.arange(n_elements)][I_max]
+                i_min[I_min] = i + i_block_min[I_min]
+                i_max[I_max] = i + i_block_max[I_max]
+                val_sum += np.nansum(block, axis=0)
+                n_values += np.count_nonzero(~np.isnan(block), axis=0)
+            I_no_values = n_values == 0
+            val_min[I_no_values] = np.nan
+            val_max[I_no_values] = np.nan
+            with np.errstate(invalid='ignore', divide='ignore'):
+                val_mean = val_sum / n_values
+            summary = pd.DataFrame(index = element_index, data = {
+                'min': val_min, 'max': val_max, 'mean': val_mean,
+                'time_min': time_index[i_min] if len(time_index) > 0 else None,
+                'time_max': time_index[i_max] if len(time_index) > 0 else None})
+        else:
+            raise ValueError('Unknown value of argument over: ' + str(over))
+
+        return summary
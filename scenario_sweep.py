@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for running sweeps of power flow analyses over combinations of load development
+scenarios, years, load scaling factors and representative days in parallel processes.
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import copy
+import itertools
+import concurrent.futures
+import load_scenarios as ls
+import pandapower_read_csv as ppcsv
+import radial_power_flow as rpf
+import time_series_power_flow as tspf
+
+# Data shared by all tasks in a worker process (set once per process by _init_worker)
+_sweep_data = None
+
+
+def _init_worker(sweep_data):
+    """ Store the data shared by all tasks in the worker process, with a copy of the network
+        that the tasks modify and a snapshot to restore the network from before each task
+    """
+
+    global _sweep_data
+    _sweep_data = dict(sweep_data)
+    _sweep_data['net'] = copy.deepcopy(sweep_data['net'])
+    _sweep_data['snapshot'] = ppcsv.take_snapshot(_sweep_data['net'])
+
+
+def _run_task(task):
+    """ Run power flow analysis for one combination of scenario, year, load scaling factor and day
+
+        Inputs:
+            task: Tuple with task number, scenario label, year, load scaling factor and day
+                (None for the peak load model)
+
+        Outputs:
+            result: Dictionary with the task parameters and the results (or failure report) of the task
+    """
+
+    i_task, scenario, year, load_scale, day = task
+    result = {'task': i_task, 'scenario': scenario, 'year': year, 'load_scale': load_scale, 'day': day,
+        'status': 'ok', 'min_vm_pu': np.nan, 'max_loading_percent': np.nan, 'losses_mw': np.nan,
+        'losses_mwh': np.nan, 'error': ''}
+
+    try:
+        net = _sweep_data['net']
+        ppcsv.restore_snapshot(net, _sweep_data['snapshot'])
+        ls.apply_scenario_to_net(net, _sweep_data['scenarios'][scenario], year, load_scale = load_scale)
+
+        if day is None:
+            # Peak load model, with the current load scaling factors of the network
+            profiles = pd.DataFrame(index = [0], columns = net.load.index, data = [net.load['scaling'].to_numpy()])
+        else:
+            profiles = _sweep_data['profiles_days'][day]
+
+        if _sweep_data['solver'] == 'radial':
+            results = rpf.radial_power_flow(net).run_time_series(profiles)
+        else:
+            results = tspf.run_time_series(net, profiles, algorithm = _sweep_data['algorithm'])
+
+        if not results['converged'].all():
+            result['status'] = 'not converged'
+            result['error'] = 'Power flow did not converge for time steps ' + str(list(results['converged'].index[~results['converged']]))
+
+        converged = results['converged'].to_numpy()
+        if converged.any():
+            losses_mw = results['res_line']['pl_mw'].to_numpy()[converged].sum(axis=1)
+            result['min_vm_pu'] = np.nanmin(results['res_bus']['vm_pu'].to_numpy()[converged])
+            result['max_loading_percent'] = np.nanmax(results['res_line']['loading_percent'].to_numpy()[converged])
+            result['losses_mw'] = losses_mw.max()
+            result['losses_mwh'] = losses_mw.sum()
+
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = type(e).__name__ + ': ' + str(e)
+
+    return result
+
+
+def run_scenario_sweep(net, filenames_scenario, years, load_scales=[1.0], repr_days=None, load_profiles=None,
+    filename_load_mapping=None, solver='radial', algorithm='bfsw', n_processes=None):
+    """ Run power flow analyses for all combinations of load development scenarios, years,
+        load scaling factors and representative days, distributing the analyses over several
+        processes. The base network and the load profiles are sent to each worker process once.
+
+        NB: When called from a script, the call must be protected by if __name__ == '__main__'
+        on platforms that start worker processes by spawning (e.g. Windows).
+
+        Inputs:
+            net: pandapower network for the base case (as set up by pandapower_read_csv)
+            filenames_scenario: List of full paths of scenario files (see load_scenarios.py),
+                or dictionary with scenario labels as keys and full paths as values
+            years: List of years in the analysis horizon relative to the reference year
+            load_scales: List of scaling factors for the load demand values in the scenario data
+                (optional; default: [1.0])
+            repr_days: List with indices of representative days of the year (1-indexed) for
+                which the power flow is run for every hour, or None to use a peak load model
+                (optional; default: None)
+            load_profiles: load_profiles object (required if repr_days is given)
+            filename_load_mapping: Full path to file defining how load profiles are mapped onto
+                buses of the grid model (required if repr_days is given)
+            solver: 'radial' to use radial_power_flow (solving all hours of a day simultaneously)
+                or 'pandapower' to use pandapower.runpp (optional; default: 'radial')
+            algorithm: Power flow algorithm for pandapower.runpp if solver is 'pandapower'
+                (optional; default: 'bfsw')
+            n_processes: Number of worker processes (optional; default: number of CPUs;
+                1 runs all tasks in the current process)
+
+        Outputs:
+            results: DataFrame with one row per combination (in the order of the combinations of
+                scenarios, years, load scaling factors and days) with columns 'scenario', 'year',
+                'load_scale', 'day', 'status' ('ok', 'not converged' or 'failed'), 'min_vm_pu',
+                'max_loading_percent', 'losses_mw' (highest over the hours), 'losses_mwh' (sum
+                over the hours) and 'error' (error message for tasks that failed)
+    """
+
+    if not isinstance(filenames_scenario, dict):
+        filenames_scenario = {os.path.splitext(os.path.basename(filename))[0]: filename for filename in filenames_scenario}
+
+    # Read scenario files once
+    scenarios = {}
+    for scenario, filename in filenames_scenario.items():
+        folder, filename_point_load = os.path.split(filename)
+        scenarios[scenario] = ls.read_scenario_from_csv(folder, filename_point_load = filename_point_load)
+
+    # Extract the mapped load profiles for each representative day once
+    profiles_days = {}
+    if repr_days is None:
+        days = [None]
+    else:
+        days = list(repr_days)
+        for day in days:
+            profiles_days[day] = load_profiles.map_rel_load_profiles(filename_load_mapping, [day])
+
+    tasks = [(i_task,) + combination for i_task, combination in
+        enumerate(itertools.product(scenarios.keys(), years, load_scales, days))]
+
+    sweep_data = {'net': net, 'scenarios': scenarios, 'profiles_days': profiles_days, 'solver': solver,
+        'algorithm': algorithm}
+
+    if n_processes is None:
+        n_processes = os.cpu_count()
+
+    if n_processes == 1 or len(tasks) == 1:
+        _init_worker(sweep_data)
+        result_list = [_run_task(task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = n_processes, initializer = _init_worker,
+            initargs = (sweep_data,)) as executor:
+            chunksize = max(1, len(tasks) // (4*n_processes))
+            result_list = list(executor.map(_run_task, tasks, chunksize = chunksize))
+
+    results = pd.DataFrame(result_list).set_index('task')
+
+    return results
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for generating synthetic, scaled-up versions of the CINELDI MV reference grid (with
+many feeders and up to e.g. 100 000 buses) for scaling studies. The grid data, load mapping
+and load time series are written in the same format as the reference data set, so that they
+can be read by pandapower_read_csv, load_profiles and the scripts for reliability analysis.
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import math
+import shutil
+import grid_data_schema as gs
+import pandapower_read_csv as ppcsv
+import radial_topology as rt
+
+# File names of data files in the reference data set (besides the grid data files returned by
+# pandapower_read_csv.get_grid_filenames)
+FILENAME_BUS_EXTRA = 'CINELDI_MV_reference_grid_base_bus_extra.csv'
+FILENAME_LINE_TYPES = 'distribution_line_types_in_reference_grid.csv'
+FILENAME_MAPPING_LOAD = 'mapping_loads_to_CINELDI_MV_reference_grid.csv'
+FILENAME_LOAD_DATA = 'load_data_CINELDI_MV_reference_system.csv'
+FILENAME_SHARE_LOAD = 'share_load_per_customer_type.csv'
+
+# Files of the reference data set that are copied unchanged to the synthetic data set (if they exist)
+FILENAMES_COPY = [FILENAME_LINE_TYPES, 'reldata_for_component_types.csv', 'load_profiles_charging_stations.csv']
+
+# ID of the bus connected to the external grid (as assumed by pandapower_read_csv)
+BUS_ID_ROOT = 1
+
+# Largest number of values of the synthetic load time series generated at a time
+BLOCK_SIZE_TIME_SERIES = 5000000
+
+
+def get_feeders(n_bus, f_bus, t_bus, i_root):
+    """ Find the feeders of a radial grid, i.e. the subtrees below the first bus from the root
+        with more than one branch to downstream buses (the main substation bus), and the trunk
+        between the root and this bus
+
+        Inputs:
+            n_bus: Number of buses
+            f_bus: Array with (positional) from bus of each in-service branch
+            t_bus: Array with (positional) to bus of each in-service branch
+            i_root: Positional index of the root bus
+
+        Outputs:
+            trunk: Array with positional indices of the buses from the bus next to the root to the
+                bus that the feeders are connected to (empty if the feeders are connected to the root)
+            feeders: List with an array for each feeder with the positional indices of its buses
+                in breadth-first order (starting with the bus next to the main substation bus)
+    """
+
+    parent, parent_branch, order, depth = rt.get_tree_ordering(n_bus, f_bus, t_bus, i_root)
+
+    i_hub = i_root
+    trunk = []
+    while True:
+        children = order[parent[order] == i_hub]
+        if len(children) != 1:
+            break
+        i_hub = children[0]
+        trunk.append(i_hub)
+    if len(children) == 0:
+        raise ValueError('The reference grid has no feeders')
+
+    # Feeder of each bus below the hub, following the breadth-first order
+    feeder = np.full(n_bus, -1)
+    feeder[children] = np.arange(len(children))
+    for i in order[depth[order] > depth[i_hub] + 1]:
+        feeder[i] = feeder[parent[i]]
+    feeders = [order[feeder[order] == i_feeder] for i_feeder in range(len(children))]
+
+    return np.array(trunk, dtype=int), feeders
+
+
+def get_line_parameters(line_types, types, length_km, base_kV, baseMVA=10, f_hz=50.0):
+    """ Calculate per-unit branch data for lines of standard line types (in the same way as
+        in process_grid_data.py)
+
+        Inputs:
+            line_types: DataFrame with line type data, indexed by line type (as in the file
+                distribution_line_types_in_reference_grid.csv)
+            types: Array with the line type of each line
+            length_km: Array with the length of each line (km)
+            base_kV: Array with the base voltage of the from bus of each line (kV)
+            baseMVA: Base apparent power value (optional; default: 10 MVA)
+            f_hz: Frequency (optional; default: 50 Hz)
+
+        Outputs:
+            br_r, br_x, br_b: Arrays with per-unit resistance, reactance and charging susceptance
+                (NaN for lines of unknown type)
+            rate_A: Array with line ratings (MVA) (NaN for lines of unknown type)
+    """
+
+    line_type_data = line_types.reindex(types)
+    Zni = base_kV**2/baseMVA
+    omega = math.pi * f_hz
+
+    br_r = line_type_data['R_ohm_per_km'].to_numpy(dtype=np.float64) * length_km / Zni
+    br_x = line_type_data['X_ohm_per_km'].to_numpy(dtype=np.float64) * length_km / Zni
+    c_μf = line_type_data['Cd_nF_per_km'].to_numpy(dtype=np.float64) / 1000 * length_km
+    br_b = 2*omega*Zni*c_μf/1e6
+    rate_A = math.sqrt(3) * base_kV * line_type_data['Imax_A'].to_numpy(dtype=np.float64) / 1000
+
+    return br_r, br_x, br_b, rate_A
+
+
+def write_time_series_variants(filename_in, filename_out, time_series_IDs_new, time_series_IDs_source, rng,
+    max_shift_hours=2, noise=0.05):
+    """ Write a load data file with the load time series of a reference load data file followed by
+        synthetic variants of them. Each variant is a reference time series shifted by a random
+        number of time steps and multiplied by random noise. The variants are generated and
+        written a block of time steps at a time, formatting each row with a single format string
+        (which is much faster than DataFrame.to_csv for files with many columns).
+
+        Inputs:
+            filename_in: Full path of the reference load data file
+            filename_out: Full path of the load data file to write
+            time_series_IDs_new: Array with the IDs of the synthetic time series
+            time_series_IDs_source: Array with the ID of the reference time series that each
+                synthetic time series is a variant of
+            rng: numpy random number generator
+            max_shift_hours: Largest shift (number of time steps) (optional; default: 2)
+            noise: Standard deviation of the relative noise (optional; default: 0.05)
+    """
+
+    loaddata = pd.read_csv(filename_in, sep=';', index_col=0, decimal=gs.detect_decimal_separator(filename_in))
+    X = loaddata.to_numpy(dtype=np.float64)
+    n_time_steps = X.shape[0]
+    i_source = loaddata.columns.get_indexer([str(ID) for ID in time_series_IDs_source])
+    if (i_source < 0).any():
+        raise KeyError('Time series in load mapping not in load data file: '
+            + str(list(np.asarray(time_series_IDs_source)[i_source < 0])))
+    shift = rng.integers(-max_shift_hours, max_shift_hours + 1, len(i_source))
+    columns = list(loaddata.columns) + [str(ID) for ID in time_series_IDs_new]
+
+    index = loaddata.index.astype(str).to_list()
+    row_format = '%s' + ';%.6g' * len(columns) + '\n'
+    n_rows_block = max(1, BLOCK_SIZE_TIME_SERIES // max(len(columns), 1))
+    with open(filename_out, 'w') as f:
+        f.write(';'.join([str(loaddata.index.name or '')] + columns) + '\n')
+        for i_start in range(0, n_time_steps, n_rows_block):
+            t = np.arange(i_start, min(i_start + n_rows_block, n_time_steps))
+            X_new = X[(t[:, None] - shift) % n_time_steps, i_source]
+            X_new *= np.maximum(1 + noise * rng.standard_normal(X_new.shape), 0)
+            f.writelines(row_format % (index[i_t], *row) for i_t, row in zip(t, np.hstack([X[t], X_new]).tolist()))
+
+
+def generate_synthetic_grid(folder_ref, folder_out, n_buses, baseMVA=10, length_variation=0.2, load_variation=0.2,
+    new_time_series=True, max_shift_hours=2, noise_time_series=0.05, seed=0):
+    """ Generate a synthetic radial grid by replicating the feeders of the reference grid and
+        connecting the copies to the external grid bus, and write it to files in the same format
+        as the reference data set. The reference grid itself is kept as the first part of the
+        synthetic grid. For each copy, a feeder is drawn at random and copied together with the
+        trunk between the external grid bus and the main substation bus (if any), so that the
+        trunk of the reference grid does not supply all copies. The last copy is truncated (in
+        breadth-first order) to get the requested number of buses. Normally open lines within
+        a feeder are copied with the feeder.
+
+        The line lengths and the load demand of the copies vary randomly around those of the
+        reference grid. Branch data of lines of the standard line types are calculated from the
+        line type data (as in process_grid_data.py); other branch data are scaled with the length.
+        The load points of the copies are mapped to synthetic variants of the load time series of
+        the corresponding load points of the reference grid (see write_time_series_variants).
+
+        Inputs:
+            folder_ref: Path of folder with the reference data set
+            folder_out: Path of folder to write the synthetic data set to (is created if it does
+                not exist)
+            n_buses: Number of buses of the synthetic grid (at least the number of buses of the
+                reference grid)
+            baseMVA: Base apparent power value of the per-unit branch data (optional; default: 10 MVA)
+            length_variation: Relative variation of the line lengths; the length of each copied
+                line is scaled by a factor drawn uniformly between 1 - length_variation and
+                1 + length_variation (optional; default: 0.2)
+            load_variation: Relative variation of the load demand at each copied bus (as for
+                length_variation) (optional; default: 0.2)
+            new_time_series: True to map the copied load points to new synthetic time series;
+                False to map them to the same time series as in the reference grid
+                (optional; default: True)
+            max_shift_hours: Largest time shift of the synthetic time series (number of time steps)
+                (optional; default: 2)
+            noise_time_series: Standard deviation of the relative noise of the synthetic time series
+                (optional; default: 0.05)
+            seed: Seed of the random number generator (optional; default: 0)
+
+        Outputs:
+            summary: Dictionary with the number of buses ('n_buses'), branches ('n_branches'),
+                feeders ('n_feeders') and load time series ('n_time_series') of the synthetic data set
+    """
+
+    rng = np.random.default_rng(seed)
+
+    # Read reference data set
+    filename_bus, filename_branch, filename_branch_extra = ppcsv.get_grid_filenames(folder_ref)
+    bus = gs.read_grid_table(filename_bus, 'bus')
+    bus = bus.loc[bus['bus_i'].notna()].reset_index(drop=True)
+    bus['bus_i'] = bus['bus_i'].astype(int)
+    branch = gs.read_grid_table(filename_branch, 'branch')
+    branch['f_bus'] = branch['f_bus'].astype(int)
+    branch['t_bus'] = branch['t_bus'].astype(int)
+    branch_extra = gs.read_grid_table(filename_branch_extra) if os.path.isfile(filename_branch_extra) else None
+
+    filenames_optional = {name: os.path.join(folder_ref, name) for name in
+        [FILENAME_BUS_EXTRA, FILENAME_LINE_TYPES, FILENAME_MAPPING_LOAD, FILENAME_LOAD_DATA, FILENAME_SHARE_LOAD]}
+    tables = {name: gs.read_grid_table(filename) for name, filename in filenames_optional.items()
+        if os.path.isfile(filename) and name != FILENAME_LOAD_DATA}
+    bus_extra = tables.get(FILENAME_BUS_EXTRA)
+    mapping = tables.get(FILENAME_MAPPING_LOAD)
+    share_load = tables.get(FILENAME_SHARE_LOAD)
+    line_types = tables.get(FILENAME_LINE_TYPES)
+    if line_types is not None:
+        line_types = line_types.set_index('type')
+    has_load_data = os.path.isfile(filenames_optional[FILENAME_LOAD_DATA])
+
+    n_bus_ref = len(bus.index)
+    if n_buses < n_bus_ref:
+        raise ValueError('The synthetic grid must have at least as many buses as the reference grid (' + str(n_bus_ref) + ')')
+
+    bus_IDs = pd.Index(bus['bus_i'])
+    f_bus = bus_IDs.get_indexer(branch['f_bus'])
+    t_bus = bus_IDs.get_indexer(branch['t_bus'])
+    in_service = branch['br_status'].to_numpy(dtype=np.float64) != 0
+    i_root = bus_IDs.get_loc(BUS_ID_ROOT)
+    trunk, feeders = get_feeders(n_bus_ref, f_bus[in_service], t_bus[in_service], i_root)
+    base_kV = bus['base_kV'].to_numpy(dtype=np.float64)
+
+    # Copies of feeders (with the trunk), connected to the external grid bus
+    bus_list, branch_list, branch_extra_list, bus_extra_list, mapping_list = [bus], [branch], [branch_extra], [bus_extra], [mapping]
+    n_bus_total = n_bus_ref
+    n_feeders = len(feeders)
+    bus_ID_next = bus_IDs.max() + 1
+    while n_bus_total < n_buses:
+        i_copy = np.r_[trunk, feeders[rng.integers(len(feeders))]]
+        i_copy = i_copy[:n_buses - n_bus_total]
+        bus_ID_new = np.full(n_bus_ref, -1)
+        bus_ID_new[i_copy] = bus_ID_next + np.arange(len(i_copy))
+        bus_ID_new[i_root] = BUS_ID_ROOT
+        map_bus_ID = pd.Series(bus_ID_new[i_copy], index = bus_IDs[i_copy])
+
+        # Buses, with the load demand varying around that of the reference bus
+        bus_copy = bus.iloc[i_copy].copy()
+        bus_copy['bus_i'] = bus_ID_new[i_copy]
+        load_factor = rng.uniform(1 - load_variation, 1 + load_variation, len(i_copy))
+        bus_copy['Pd'] *= load_factor
+        bus_copy['Qd'] *= load_factor
+        bus_list.append(bus_copy)
+
+        # Branches between buses of the copy (including the branch to the external grid bus),
+        # with the line lengths varying around those of the reference lines
+        i_branch = np.flatnonzero((bus_ID_new[f_bus] >= 0) & (bus_ID_new[t_bus] >= 0))
+        branch_copy = branch.iloc[i_branch].copy()
+        branch_copy['f_bus'] = bus_ID_new[f_bus[i_branch]]
+        branch_copy['t_bus'] = bus_ID_new[t_bus[i_branch]]
+        length_factor = rng.uniform(1 - length_variation, 1 + length_variation, len(i_branch))
+        for col in ['br_r', 'br_x', 'br_b']:
+            branch_copy[col] *= length_factor
+        if branch_extra is not None:
+            branch_extra_copy = branch_extra.iloc[i_branch].copy()
+            branch_extra_copy['length_km'] *= length_factor
+            if line_types is not None:
+                parameters = get_line_parameters(line_types, branch_extra_copy['type'].to_numpy(),
+                    branch_extra_copy['length_km'].to_numpy(dtype=np.float64), base_kV[f_bus[i_branch]], baseMVA)
+                known_type = ~np.isnan(parameters[0])
+                for col, values in zip(['br_r', 'br_x', 'br_b', 'rate_A'], parameters):
+                    branch_copy.loc[known_type, col] = values[known_type]
+            branch_extra_list.append(branch_extra_copy)
+        branch_list.append(branch_copy)
+
+        # Extra bus data and load mapping of the buses of the copy
+        if bus_extra is not None:
+            bus_extra_copy = bus_extra.loc[bus_extra['bus_i'].isin(map_bus_ID.index)].copy()
+            bus_extra_copy['bus_i'] = map_bus_ID[bus_extra_copy['bus_i']].to_numpy()
+            bus_extra_list.append(bus_extra_copy)
+        if mapping is not None:
+            mapping_copy = mapping.loc[mapping['bus_i'].isin(map_bus_ID.index)].copy()
+            mapping_copy['bus_i'] = map_bus_ID[mapping_copy['bus_i']].to_numpy()
+            mapping_list.append(mapping_copy)
+
+        n_bus_total += len(i_copy)
+        n_feeders += 1
+        bus_ID_next += len(i_copy)
+
+    bus_out = pd.concat(bus_list, ignore_index=True)
+    branch_out = pd.concat(branch_list, ignore_index=True)
+
+    # Synthetic load time series for the load points of the copies
+    time_series_IDs_new = []
+    time_series_IDs_source = []
+    if mapping is not None:
+        mapping_out = pd.concat(mapping_list, ignore_index=True)
+        if new_time_series and has_load_data:
+            n_mapping_ref = len(mapping.index)
+            time_series_IDs_source = mapping_out['time_series_ID'].to_numpy(copy=True)[n_mapping_ref:]
+            loaddata_columns = pd.read_csv(filenames_optional[FILENAME_LOAD_DATA], sep=';', index_col=0, nrows=0).columns
+            time_series_ID_next = max(pd.to_numeric(loaddata_columns).max(), mapping['time_series_ID'].max()) + 1
+            time_series_IDs_new = time_series_ID_next + np.arange(len(time_series_IDs_source))
+            mapping_out.loc[n_mapping_ref:, 'time_series_ID'] = time_series_IDs_new
+
+    # Write synthetic data set
+    os.makedirs(folder_out, exist_ok=True)
+    filename_bus_out, filename_branch_out, filename_branch_extra_out = ppcsv.get_grid_filenames(folder_out)
+    bus_out.to_csv(filename_bus_out, sep=';', index=False)
+    branch_out.to_csv(filename_branch_out, sep=';', index=False)
+    if branch_extra is not None:
+        pd.concat(branch_extra_list, ignore_index=True).to_csv(filename_branch_extra_out, sep=';', index=False)
+    if bus_extra is not None:
+        pd.concat(bus_extra_list, ignore_index=True).to_csv(os.path.join(folder_out, FILENAME_BUS_EXTRA), sep=';', index=False)
+    if mapping is not None:
+        mapping_out.to_csv(os.path.join(folder_out, FILENAME_MAPPING_LOAD), sep=';', index=False)
+
+    n_time_series = 0
+    if has_load_data:
+        filename_load_data_out = os.path.join(folder_out, FILENAME_LOAD_DATA)
+        if len(time_series_IDs_new) > 0:
+            write_time_series_variants(filenames_optional[FILENAME_LOAD_DATA], filename_load_data_out,
+                time_series_IDs_new, time_series_IDs_source, rng, max_shift_hours, noise_time_series)
+        else:
+            shutil.copyfile(filenames_optional[FILENAME_LOAD_DATA], filename_load_data_out)
+        n_time_series = len(pd.read_csv(filename_load_data_out, sep=';', index_col=0, nrows=0).columns)
+
+    # Customer type shares of the synthetic time series are those of the reference time series
+    if share_load is not None:
+        share_load_new = share_load.set_index('time_series_ID').reindex(time_series_IDs_source)
+        share_load_new.index = pd.Index(time_series_IDs_new, name = 'time_series_ID')
+        share_load_out = pd.concat([share_load, share_load_new.reset_index()], ignore_index=True)
+        share_load_out.to_csv(os.path.join(folder_out, FILENAME_SHARE_LOAD), sep=';', index=False)
+
+    for filename in FILENAMES_COPY:
+        if os.path.isfile(os.path.join(folder_ref, filename)):
+            shutil.copyfile(os.path.join(folder_ref, filename), os.path.join(folder_out, filename))
+
+    summary = {'n_buses': len(bus_out.index), 'n_branches': len(branch_out.index), 'n_feeders': n_feeders,
+        'n_time_series': n_time_series}
+
+    return summary
@@ -17,6 +17,7 @@ import os
 import load_scenarios as ls
 import load_profiles as lp
 import pandapower_read_csv as ppcsv
+import time_series_power_flow as tspf
 
 # %% Define input data
 
@@ -37,7 +38,7 @@ filename_scenario_fullpath = os.path.join(path_data_set,filename_scenario)
 
 # %% Read pandapower network
 
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+net = ppcsv.read_net_from_csv_cached(path_data_set, baseMVA=10)
 
 # %% Read scenario data
 
@@ -50,6 +51,9 @@ year_rel = 7
 
 ls.apply_scenario_to_net(net,scen,year_rel)
 
+# Record the loads etc. of the network with the scenario applied, to be able to restore them later
+snapshot = ppcsv.take_snapshot(net)
+
 # %% Test running power flow with a peak load model
 # (i.e., all loads are assumed to be at their annual peak load simultaneously)
 
@@ -74,9 +78,11 @@ profiles_mapped = load_profiles.map_rel_load_profiles(filename_load_mapping_full
 # %% Scale loads by normalized load time series and run power flow
 
 # Which hour of the representative day to investigate (0-indexed). By default investigate the peak-load hour of February 28. 
-# (NB: It is necessary to reload the pandapower network and reapply the scenario data before investigating another value of t)
+# (the network is restored from the snapshot, so this cell can be rerun for another value of t)
 t = 19
 
+ppcsv.restore_snapshot(net,snapshot)
+
 for i in net.load.index:
     net.load.loc[i,'scaling'] = profiles_mapped.loc[t,i]
 
@@ -87,4 +93,13 @@ print('Total load demand in the system assuming a time-varying load model with a
 # %% Plot power flow solution for time-varying load model
 
 pp_plotting.pf_res_plotly(net)
+
+# %% Run power flow for all hours of the representative day 
+# (the load scaling factors of the network are restored afterwards)
+
+results_ts = tspf.run_time_series(net,profiles_mapped)
+
+print('Lowest voltage in the system during the representative day: ' + str(results_ts['res_bus']['vm_pu'].min().min()) + ' p.u.')
+print('Highest line loading in the system during the representative day: ' + str(results_ts['res_line']['loading_percent'].max().max()) + ' %')
+
 # %%
@@ -40,7 +40,7 @@ filename_load_profiles_cs_fullpath = os.path.join(path_data_set,filename_load_pr
 
 # %% Read pandapower network
 
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+net = ppcsv.read_net_from_csv_cached(path_data_set, baseMVA=10)
 
 # %% Read scenario data
 
@@ -32,26 +32,21 @@ filename_scenario_fullpath = os.path.join(path_data_set,filename_scenario)
 
 # %% Read grid data
 
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+net = ppcsv.read_net_from_csv_cached(path_data_set, baseMVA=10)
 
 # %% Set up hourly normalized load time series for the full year
 
 # Initialize load profile object 
 load_profiles = lp.load_profiles(filename_load_data_fullpath)
 
-# Get all the days of the year
-repr_days = list(range(1,366))
-
-# Get relative load profiles for representative days mapped to buses of the CINELDI test network;
-# the column index is the bus number (1-indexed) and the row index is the hour of the year (0-indexed)
-profiles_mapped = load_profiles.map_rel_load_profiles(filename_load_mapping_fullpath,repr_days)
+# Map the normalized load time series to the load points of the grid; load time series are only 
+# calculated when requested, and buses that do not have load points in the existing grid are left out
+# (since the load mapping also includes the buses for potential new load points for local energy communities)
+load_mapped = load_profiles.get_mapped_load(net, filename_load_mapping_fullpath)
 
 # %% Calculate load time series in units MW (or, equivalently, MWh/h)
 
-# Scale the normalized load time series by the peak load value for the load points in the grid data set (in units MW);
-# the column index is the bus number (1-indexed) and the row index is the hour of the year (0-indexed)
-load_time_series_mapped = profiles_mapped.mul(net.load['p_mw'])
-
-# Remove the columns corresponding to buses that do not have load points in the existing grid
-# (since the load mapping also includes the buses for potential new load points for local energy communities)
-load_time_series_mapped.dropna(axis=1,inplace=True)
\ No newline at end of file
+# Scale the normalized load time series for all days of the year by the peak load value for the load points 
+# in the grid data set (in units MW); the column index is the bus number (1-indexed) and the row index is 
+# the hour of the year (0-indexed)
+load_time_series_mapped = load_mapped.get_load()
\ No newline at end of file
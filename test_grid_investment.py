@@ -11,7 +11,7 @@ Script for testing code for grid investments
 
 import os
 import pandas as pd
-from pandapower_read_csv import read_net_from_csv
+from pandapower_read_csv import read_net_from_csv_cached
 import grid_dev_plan as gdp
 
 # %% Set up file names and parameters
@@ -31,7 +31,7 @@ cable_data_filename_fullpath = os.path.join(path_data_set,filename_std_cable_typ
 reinf_strategy_filename_fullpath = os.path.join(example_data_folder,filename_reinf_strategy)
 
 # %% Read CINELDI reference network to pandapower network object
-net = read_net_from_csv(path_data_set, baseMVA=10, DiB_version = True)
+net = read_net_from_csv_cached(path_data_set, baseMVA=10, DiB_version = True)
 
 # %% Initialize object for handling grid investments
 grid_inv_data = gdp.grid_investment(cable_data_filename_fullpath,reinf_strategy_filename_fullpath)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-18
+
+@author: ivespe
+
+Module for running time series of power flow calculations for the CINELDI MV reference
+system, applying (mapped) load profiles to the loads of a pandapower network.
+"""
+
+import pandapower as pp
+import pandas as pd
+import numpy as np
+
+
+def get_scaling_time_series(net, profiles_mapped):
+    """ Align load profiles mapped to buses with the loads of a pandapower network
+
+        Inputs:
+            net: pandapower network with loads indexed by bus ID (as set up by pandapower_read_csv)
+            profiles_mapped: DataFrame with relative load profiles (unitless) as returned by
+                load_profiles.map_rel_load_profiles; indices are time steps and columns are bus IDs
+
+        Outputs:
+            scaling: 2D array (time steps × loads in net.load) with the load scaling factor of each
+                load for each time step; loads without load profile keep their current scaling factor
+    """
+
+    scaling = profiles_mapped.reindex(columns = net.load.index).to_numpy(dtype=np.float64)
+    I_no_profile = np.isnan(scaling).all(axis=0)
+    scaling[:, I_no_profile] = net.load['scaling'].to_numpy(dtype=np.float64)[I_no_profile]
+
+    return scaling
+
+
+def run_time_series(net, profiles_mapped, time_steps=None, algorithm='nr',
+    res_bus_columns=['vm_pu','va_degree','p_mw','q_mvar'],
+    res_line_columns=['loading_percent','i_ka','p_from_mw','q_from_mvar','pl_mw','ql_mvar'],
+    res_load_columns=['p_mw'], **kwargs):
+    """ Run power flow for every time step of a set of load profiles mapped to the buses of a network
+
+        The load scaling factors of all loads are updated in bulk for each time step, and each power
+        flow is initialized with the solution for the previous time step. With the Newton-Raphson
+        algorithm (default), the internal power flow data of pandapower (including the admittance
+        matrix) are built once and reused for all time steps.
+
+        Inputs:
+            net: pandapower network with loads indexed by bus ID (as set up by pandapower_read_csv);
+                the load scaling factors are restored when the time series has been run
+            profiles_mapped: DataFrame with relative load profiles (unitless) as returned by
+                load_profiles.map_rel_load_profiles (possibly extended by map_cs_load_profiles);
+                indices are time steps and columns are bus IDs
+            time_steps: List of time steps (index values of profiles_mapped) to run power flow for
+                (optional; default: all time steps)
+            algorithm: Power flow algorithm for pandapower.runpp (optional; default: 'nr';
+                the internal power flow data are only reused for 'nr')
+            res_bus_columns: Columns of net.res_bus to collect for each time step
+                (optional; default: voltages and power injections)
+            res_line_columns: Columns of net.res_line to collect for each time step
+                (optional; default: loading, current, power flow and losses)
+            res_load_columns: Columns of net.res_load to collect for each time step
+                (optional; default: active power)
+            **kwargs: Additional arguments to pandapower.runpp
+
+        Outputs:
+            results: Dictionary with entries 'res_bus', 'res_line' and 'res_load', which are dictionaries
+                with a DataFrame (time steps × buses, lines or loads) for each collected column, and 'converged'
+                for a Series with True for time steps where the power flow converged (the results
+                are NaN for time steps where it did not converge)
+    """
+
+    if time_steps is None:
+        time_steps = profiles_mapped.index
+    time_steps = pd.Index(data = time_steps)
+
+    scaling = get_scaling_time_series(net, profiles_mapped.loc[time_steps])
+    scaling_orig = net.load['scaling'].copy()
+
+    res_bus = {col: np.full((len(time_steps), len(net.bus.index)), np.nan) for col in res_bus_columns}
+    res_line = {col: np.full((len(time_steps), len(net.line.index)), np.nan) for col in res_line_columns}
+    res_load = {col: np.full((len(time_steps), len(net.load.index)), np.nan) for col in res_load_columns}
+    converged = np.zeros(len(time_steps), dtype=bool)
+
+    if algorithm == 'nr':
+        recycle = dict(bus_pq=True, trafo=False, gen=False)
+    else:
+        recycle = None
+
+    # Power flow for the first time step (and after a time step that did not converge) is
+    # initialized in the default way and without reusing internal power flow data
+    init = kwargs.pop('init', 'auto')
+    init_next = init
+    for i_t in range(len(time_steps)):
+        net.load['scaling'] = scaling[i_t]
+
+        try:
+            if init_next == 'results' and recycle is not None:
+                pp.runpp(net, algorithm=algorithm, recycle=recycle, **kwargs)
+            else:
+                pp.runpp(net, algorithm=algorithm, init=init_next, recycle=recycle, **kwargs)
+        except pp.LoadflowNotConverged:
+            # Do not reuse internal power flow data from a power flow that did not converge
+            init_next = init
+            net['_ppc'] = None
+            continue
+
+        for col in res_bus_columns:
+            res_bus[col][i_t] = net.res_bus[col].to_numpy()
+        for col in res_line_columns:
+            res_line[col][i_t] = net.res_line[col].to_numpy()
+        for col in res_load_columns:
+            res_load[col][i_t] = net.res_load[col].to_numpy()
+        converged[i_t] = True
+        init_next = 'results'
+
+    net.load['scaling'] = scaling_orig
+
+    results = {
+        'res_bus': {col: pd.DataFrame(res_bus[col], index = time_steps, columns = net.bus.index) for col in res_bus_columns},
+        'res_line': {col: pd.DataFrame(res_line[col], index = time_steps, columns = net.line.index) for col in res_line_columns},
+        'res_load': {col: pd.DataFrame(res_load[col], index = time_steps, columns = net.load.index) for col in res_load_columns},
+        'converged': pd.Series(converged, index = time_steps)}
+
+    return results